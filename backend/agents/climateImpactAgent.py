@@ -1,10 +1,24 @@
-import requests
+from utils import httpClient, asyncHttpClient
+from utils.cache import TTLCache
+from utils import metrics
+from utils.singleFlight import SingleFlight
+from utils.tileCache import TILES
+from utils.climateStore import get_climate_store, archive_url, parse_archive, default_ingest_range
+from config.config import Config
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import contextvars
 import logging
+import math
+import threading
 
 logger = logging.getLogger(__name__)
 
+MONTH_NAMES = ("January", "February", "March", "April", "May", "June", "July", "August", "September",
+               "October", "November", "December")
+
 class AgentResponse(BaseModel):
     text: str
     suggestions: List[Dict[str, str]]
@@ -14,9 +28,218 @@ class ClimateImpactAgent:
     """Agent to fetch climate and weather information using coordinates."""
     
     def __init__(self):
-        """Initialize the agent."""
-        pass
+        """Initialize the agent and its grid-cell forecast cache."""
+        self.resolution = Config.WEATHER_CACHE_RESOLUTION
+        self.cache = TTLCache(maxsize=Config.WEATHER_CACHE_SIZE, ttl=Config.WEATHER_CACHE_MAX_STALE, namespace='weather')
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-refresh")
+        self._forecast_flight = SingleFlight("open_meteo")
+        self._ingesting = set()
+        self._ingest_lock = threading.Lock()
+        self._ingest_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="climate-ingest")
+        self._counters = {"fresh": 0, "stale": 0, "miss": 0, "tile": 0, "refreshes": 0, "refresh_errors": 0}
+        # Counters are updated from request threads, the refresh pool and tile prefetch workers.
+        self._counters_lock = threading.Lock()
+
+    def _cell(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Snap a point to the center of its weather grid cell."""
+        decimals = max(0, -int(math.floor(math.log10(self.resolution))) + 1)
+        return (round(round(lat / self.resolution) * self.resolution, decimals),
+                round(round(lon / self.resolution) * self.resolution, decimals))
+
+    @staticmethod
+    def forecast_hour() -> str:
+        """The current forecast hour; Open-Meteo's current conditions update hourly."""
+        return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H")
+
+    @staticmethod
+    def _forecasts_url(cells: List[Tuple[float, float]]) -> str:
+        """Open-Meteo URL for one or more cells; for several, the response is a list in the same order."""
+        latitudes = ",".join(str(lat) for lat, _ in cells)
+        longitudes = ",".join(str(lon) for _, lon in cells)
+        return (
+            f"{Config.OPEN_METEO_URL}/v1/forecast?latitude={latitudes}&longitude={longitudes}"
+            f"&current=temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m"
+            f"&daily=temperature_2m_max,temperature_2m_min,weather_code&timezone=auto"
+        )
+
+    @classmethod
+    def _forecast_url(cls, cell: Tuple[float, float]) -> str:
+        return cls._forecasts_url([cell])
+
+    def _fetch_forecast(self, cell: Tuple[float, float]) -> Dict[str, Any]:
+        """
+        Query Open-Meteo for a grid cell and cache the result under the current forecast hour.
+        Concurrent fetches of the same cell (including background refreshes) share one request.
+        """
+        def fetch():
+            response = httpClient.get(self._forecast_url(cell))
+            response.raise_for_status()
+            data = response.json()
+            self.cache.set(cell, {"hour": self.forecast_hour(), "data": data})
+            return data
+
+        with metrics.span("agent.climate_impact.fetch_forecast"):
+            return self._forecast_flight.do(cell, fetch)
+
+    async def _afetch_forecast(self, cell: Tuple[float, float]) -> Dict[str, Any]:
+        """Async variant of _fetch_forecast."""
+        async def fetch():
+            response = await asyncHttpClient.get(self._forecast_url(cell))
+            response.raise_for_status()
+            data = response.json()
+            self.cache.set(cell, {"hour": self.forecast_hour(), "data": data})
+            return data
+
+        with metrics.span("agent.climate_impact.fetch_forecast"):
+            return await self._forecast_flight.ado(cell, fetch)
+
+    def _fetch_forecasts(self, cells: List[Tuple[float, float]]) -> List[Dict[str, Any]]:
+        """Query Open-Meteo for many grid cells in one multi-location request and cache each of them."""
+        with metrics.span("agent.climate_impact.fetch_forecasts") as span:
+            span["locations"] = len(cells)
+            response = httpClient.get(self._forecasts_url(cells))
+            response.raise_for_status()
+            data = response.json()
+        # A single location comes back as an object rather than a list.
+        forecasts = data if isinstance(data, list) else [data]
+        if len(forecasts) != len(cells):
+            raise ValueError(f"Open-Meteo returned {len(forecasts)} forecasts for {len(cells)} locations")
+        hour = self.forecast_hour()
+        for cell, forecast in zip(cells, forecasts):
+            self.cache.set(cell, {"hour": hour, "data": forecast})
+        return forecasts
+
+    def get_forecasts(self, points: List[Tuple[float, float]]) -> Tuple[List[Optional[Dict[str, Any]]], Dict[str, int]]:
+        """
+        Open-Meteo data for many points, sharing the grid-cell cache with get_weather_info.
+
+        Cells fetched in the current forecast hour are served from the cache; all others are
+        fetched in a single multi-location request. If that request fails, stale entries are
+        served instead and cells without any entry are None.
+
+        Returns:
+            tuple: (forecast data or None per point, counts of "fresh", "stale" and "fetched" cells).
+        """
+        cells = [self._cell(lat, lon) for lat, lon in points]
+        hour = self.forecast_hour()
+        found: Dict[Tuple[float, float], Dict[str, Any]] = {}
+        stale: Dict[Tuple[float, float], Dict[str, Any]] = {}
+        for cell in dict.fromkeys(cells):
+            entry = self.cache.get(cell)
+            if entry is not None and entry["hour"] == hour:
+                found[cell] = entry["data"]
+            elif entry is not None:
+                stale[cell] = entry["data"]
+        missing = [cell for cell in dict.fromkeys(cells) if cell not in found]
+        counts = {"fresh": len(found), "stale": 0, "fetched": 0}
+        self._record("fresh", len(found))
+        self._record("miss", len(missing))
+
+        if missing:
+            try:
+                found.update(zip(missing, self._forecast_flight.do(tuple(missing), lambda: self._fetch_forecasts(missing))))
+                counts["fetched"] = len(missing)
+            except Exception as e:
+                if not found and not stale:
+                    raise
+                logger.warning(f"Weather grid fetch failed for {len(missing)} cells, serving stale data: {e}")
+                found.update(stale)
+                counts["stale"] = len(stale)
+                self._record("stale", len(stale))
+        return [found.get(cell) for cell in cells], counts
+
+    def _refresh_in_background(self, cell: Tuple[float, float]) -> None:
+        with self._refresh_lock:
+            if cell in self._refreshing:
+                return
+            self._refreshing.add(cell)
+            self._record("refreshes")
+
+        def refresh():
+            try:
+                self._fetch_forecast(cell)
+            except Exception as e:
+                self._record("refresh_errors")
+                logger.warning(f"Background weather refresh failed for {cell}: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cell)
+
+        self._refresh_executor.submit(contextvars.copy_context().run, refresh)
+
+    def _get_forecast(self, lat: float, lon: float) -> Tuple[Dict[str, Any], str]:
+        """
+        Return Open-Meteo data for the grid cell containing the point, with stale-while-revalidate.
+
+        An entry fetched in the current forecast hour is fresh. An older entry (up to
+        Config.WEATHER_CACHE_MAX_STALE) is served immediately while a background refresh runs.
+        On a miss, a current-hour forecast prefetched for the point's map tile is used if present.
+
+        Returns:
+            tuple: (forecast data, cache status "fresh", "stale", "tile" or "miss").
+        """
+        cell = self._cell(lat, lon)
+        cached = self._lookup_forecast(cell) or self._tile_forecast(lat, lon)
+        if cached is not None:
+            return cached
+        return self._fetch_forecast(cell), "miss"
+
+    async def _aget_forecast(self, lat: float, lon: float) -> Tuple[Dict[str, Any], str]:
+        """Async variant of _get_forecast; stale entries are still refreshed on the background pool."""
+        cell = self._cell(lat, lon)
+        cached = self._lookup_forecast(cell) or self._tile_forecast(lat, lon)
+        if cached is not None:
+            return cached
+        return await self._afetch_forecast(cell), "miss"
+
+    def _lookup_forecast(self, cell: Tuple[float, float]) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Serve a cell from the cache, scheduling a refresh for stale entries. None on a miss."""
+        entry = self.cache.get(cell)
+        if entry is not None:
+            if entry["hour"] == self.forecast_hour():
+                self._record("fresh")
+                return entry["data"], "fresh"
+            self._record("stale")
+            self._refresh_in_background(cell)
+            return entry["data"], "stale"
+        self._record("miss")
+        return None
+
+    def _tile_forecast(self, lat: float, lon: float) -> Optional[Tuple[Dict[str, Any], str]]:
+        """The current-hour forecast of the point's map tile, if the tile cache has one."""
+        entry = TILES.peek(lat, lon)
+        if entry is None or entry["weather"] is None or entry["weather_hour"] != self.forecast_hour():
+            return None
+        self._record("tile")
+        return entry["weather"], "tile"
+
+    def _record(self, counter: str, count: int = 1) -> None:
+        with self._counters_lock:
+            self._counters[counter] += count
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Forecast cache counters."""
+        with self._counters_lock:
+            counters = dict(self._counters)
+        return {**counters, "size": len(self.cache), "resolution": self.resolution}
     
+    @staticmethod
+    def _parse_coordinates(coordinates: Optional[str]) -> Tuple[float, float]:
+        """Parse a 'latitude,longitude' string, raising ValueError with a user-facing message."""
+        if not coordinates or not coordinates.strip():
+            raise ValueError("Coordinates are required to fetch weather info.")
+        
+        lat_lon = coordinates.split(',')
+        if len(lat_lon) != 2:
+            raise ValueError("Coordinates must be in 'latitude,longitude' format.")
+        
+        try:
+            return float(lat_lon[0].strip()), float(lat_lon[1].strip())
+        except ValueError:
+            raise ValueError("Invalid coordinate values provided.")
+
     def get_weather_info(self, location: Optional[str] = "", coordinates: Optional[str] = None) -> dict:
         """
         Fetch weather information using coordinates.
@@ -30,99 +253,230 @@ class ClimateImpactAgent:
         """
         logger.info(f"Fetching location info for: {location}, Coordinates: {coordinates}. TOOL Calling for CLIAMTEImpactAgent")
         try:
-            if not coordinates or not coordinates.strip():
-                raise ValueError("Coordinates are required to fetch weather info.")
-            
-            lat_lon = coordinates.split(',')
-            if len(lat_lon) != 2:
-                raise ValueError("Coordinates must be in 'latitude,longitude' format.")
-            
+            lat, lon = self._parse_coordinates(coordinates)
+            data, cache_status = self._get_forecast(lat, lon)
+            return self._build_response(location, coordinates, lat, lon, data, cache_status)
+        except Exception as e:
+            return self._error_response(coordinates, e)
+
+    async def aget_weather_info(self, location: Optional[str] = "", coordinates: Optional[str] = None) -> dict:
+        """Async variant of get_weather_info for the ASGI serving path."""
+        logger.info(f"Fetching location info for: {location}, Coordinates: {coordinates}. TOOL Calling for CLIAMTEImpactAgent")
+        try:
+            lat, lon = self._parse_coordinates(coordinates)
+            data, cache_status = await self._aget_forecast(lat, lon)
+            return self._build_response(location, coordinates, lat, lon, data, cache_status)
+        except Exception as e:
+            return self._error_response(coordinates, e)
+
+    # Archive pulls cover decades of daily data and take far longer than a forecast request.
+    ARCHIVE_TIMEOUT = 60
+
+    def climate_cell(self, lat: float, lon: float):
+        """
+        The stored climate cell for a point. On a miss, and if Config.CLIMATE_INGEST_ON_MISS is set,
+        the cell's series is pulled from the Open-Meteo archive and ingested in the background: the
+        pull can take far longer than a tool call is allowed (Config.TOOL_TIMEOUT).
+
+        Returns:
+            tuple: (ClimateCell or None, source "store", or "ingesting" while the cell is being loaded).
+        """
+        store = get_climate_store()
+        cell = store.cell(lat, lon)
+        if cell is not None or not Config.CLIMATE_INGEST_ON_MISS:
+            return cell, "store"
+        self._ingest_in_background(store, lat, lon)
+        return None, "ingesting"
+
+    def _ingest_in_background(self, store, lat: float, lon: float) -> None:
+        center = store.cell_center(lat, lon)
+        with self._ingest_lock:
+            if center in self._ingesting:
+                return
+            self._ingesting.add(center)
+
+        def ingest():
             try:
-                lat, lon = float(lat_lon[0].strip()), float(lat_lon[1].strip())
-            except ValueError:
-                raise ValueError("Invalid coordinate values provided.")
-            
-            # Query weather data from Open-Meteo API using the coordinates
-            url = (
-                f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}"
-                f"&current=temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m"
-                f"&daily=temperature_2m_max,temperature_2m_min,weather_code&timezone=auto"
-            )
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            current = data.get('current', {})
-            temperature = current.get('temperature_2m', 'Unknown')
-            humidity = current.get('relative_humidity_2m', 'Unknown')
-            windspeed = current.get('wind_speed_10m', 'Unknown')
-            weather_code = current.get('weather_code', None)
-            
-            weather_desc = {
-                0: "Clear sky",
-                1: "Mainly clear",
-                2: "Partly cloudy",
-                3: "Overcast",
-                45: "Fog",
-                48: "Depositing rime fog",
-                51: "Light drizzle",
-                53: "Moderate drizzle",
-                55: "Dense drizzle",
-                61: "Slight rain",
-                63: "Moderate rain",
-                65: "Heavy rain",
-                71: "Slight snow fall",
-                73: "Moderate snow fall",
-                75: "Heavy snow fall",
-                77: "Snow grains",
-                80: "Slight rain showers",
-                81: "Moderate rain showers",
-                82: "Violent rain showers",
-                85: "Slight snow showers",
-                86: "Heavy snow showers",
-                95: "Thunderstorm",
-                96: "Thunderstorm with slight hail",
-                99: "Thunderstorm with heavy hail"
-            }.get(weather_code, "Unknown weather condition")
-            
-            daily = data.get('daily', {})
-            today_max = daily.get('temperature_2m_max', [None])[0]
-            today_min = daily.get('temperature_2m_min', [None])[0]
-            
-            text = f"Current weather: {weather_desc}, Temperature: {temperature}°C"
-            if today_min is not None and today_max is not None:
-                text += f" (today's range: {today_min}°C to {today_max}°C)"
-            text += f", Humidity: {humidity}%, Wind Speed: {windspeed} km/h."
-            
-            suggestions = [
-                {"label": "View full forecast", "action": f"https://open-meteo.com/en/forecast?lat={lat}&lon={lon}"},
-                {"label": "Check air quality", "action": "check_air_quality"},
-                {"label": "View historical climate data", "action": "view_climate_history"}
-            ]
-            
-            metadata = {
-                "coordinates": f"{lat},{lon}",
-                "location": location if location else f"Coordinates: {lat},{lon}",
-                "type": "weather_info",
-                "current": {
-                    "temperature": temperature,
-                    "weather_condition": weather_desc,
-                    "humidity": humidity,
-                    "wind_speed": windspeed
-                },
-                "daily": {
-                    "max_temperature": today_max,
-                    "min_temperature": today_min
-                }
-            }
-            logger.info(f"Successfully fetched ClimateImpactAgent Data for: {location}, Coordinates: {coordinates}\ntext={text}\nSuggestions={suggestions}\nMetaData={metadata}")
-            return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
-        
+                with metrics.span("agent.climate_impact.ingest_history"):
+                    response = httpClient.get(archive_url(*center, *default_ingest_range()),
+                                              timeout=(Config.HTTP_CONNECT_TIMEOUT, self.ARCHIVE_TIMEOUT))
+                    response.raise_for_status()
+                    store.ingest(lat, lon, *parse_archive(response.json()))
+            except Exception as e:
+                logger.warning(f"Climate history ingest failed for {center}: {e}")
+            finally:
+                with self._ingest_lock:
+                    self._ingesting.discard(center)
+
+        self._ingest_executor.submit(contextvars.copy_context().run, ingest)
+
+    def get_climate_history(self, location: Optional[str] = "", coordinates: Optional[str] = None,
+                            start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+        """
+        Fetch historical climate information (normals, annual anomalies, a period summary) for coordinates.
+
+        Args:
+            location (Optional[str]): Optional name of the location.
+            coordinates (Optional[str]): Coordinates in 'latitude,longitude' format.
+            start_date, end_date (Optional[str]): ISO dates of the period to summarize; the last
+                365 stored days by default.
+
+        Returns:
+            dict: Response containing text, suggestions, and metadata.
+        """
+        logger.info(f"Fetching climate history for: {location}, Coordinates: {coordinates}, {start_date} to {end_date}")
+        try:
+            lat, lon = self._parse_coordinates(coordinates)
+            cell, source = self.climate_cell(lat, lon)
+            return self._build_history_response(location, lat, lon, cell, source, start_date, end_date)
         except Exception as e:
-            logger.error(f"Error in get_weather_info: {str(e)}")
-            response = AgentResponse(
-                text=f"Error fetching weather data: {str(e)}",
-                suggestions=[],
-                metadata={"error": str(e), "coordinates": coordinates}
-            )
-            return response.model_dump()
+            return self._error_response(coordinates, e, "get_climate_history", "climate history")
+
+    async def aget_climate_history(self, location: Optional[str] = "", coordinates: Optional[str] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+        """Async variant of get_climate_history for the ASGI serving path."""
+        logger.info(f"Fetching climate history for: {location}, Coordinates: {coordinates}, {start_date} to {end_date}")
+        try:
+            lat, lon = self._parse_coordinates(coordinates)
+            cell, source = self.climate_cell(lat, lon)
+            return self._build_history_response(location, lat, lon, cell, source, start_date, end_date)
+        except Exception as e:
+            return self._error_response(coordinates, e, "get_climate_history", "climate history")
+
+    @staticmethod
+    def _build_history_response(location: Optional[str], lat: float, lon: float, cell, source: str,
+                                start_date: Optional[str], end_date: Optional[str]) -> dict:
+        """Summarize a climate cell's history as the agent response."""
+        place = location or f"{lat},{lon}"
+        if source == "ingesting":
+            # Reported as an error so the answer is not cached, but not logged as one.
+            message = f"Historical climate data for {place} is being loaded; it will be available in a minute or two."
+            metadata = {"error": message, "pending": True, "coordinates": f"{lat},{lon}", "type": "climate_history"}
+            return AgentResponse(text=message, suggestions=[], metadata=metadata).model_dump()
+        if cell is None:
+            raise ValueError("No historical climate data is stored for this location.")
+        with metrics.span("agent.climate_impact.climate_history"):
+            history = cell.history(start_date, end_date)
+        first, last = history["normals_period"]
+        normals = history["normals"]
+        text = ""
+        if "temperature_2m_mean" in normals:
+            monthly = [(t, m) for m, t in enumerate(normals["temperature_2m_mean"]) if t is not None]
+            if monthly:
+                warmest, coldest = max(monthly), min(monthly)
+                text += (f"Climate normals ({first}-{last}) for {place}: mean temperature "
+                         f"{sum(t for t, _ in monthly) / len(monthly):.1f}°C, warmest month "
+                         f"{MONTH_NAMES[warmest[1]]} ({warmest[0]:.1f}°C), coldest {MONTH_NAMES[coldest[1]]} ({coldest[0]:.1f}°C). ")
+        if "precipitation_sum" in normals and all(p is not None for p in normals["precipitation_sum"]):
+            text += f"Normal annual precipitation is {sum(normals['precipitation_sum']):.0f} mm. "
+
+        period = history["range"]
+        summary = []
+        if period.get("temperature_2m_mean"):
+            summary.append(f"mean temperature {period['temperature_2m_mean']['mean']}°C")
+        if period.get("temperature_2m_max") and period.get("temperature_2m_min"):
+            summary.append(f"extremes {period['temperature_2m_min']['min']}°C to {period['temperature_2m_max']['max']}°C")
+        if period.get("precipitation_sum"):
+            summary.append(f"{period['precipitation_sum']['total']} mm of precipitation")
+        if summary:
+            text += f"From {period['start']} to {period['end']}: {', '.join(summary)}. "
+
+        years, anomalies = history["annual"]["years"], history["annual"]["anomalies"].get("temperature_2m_mean", [])
+        recent = [(year, anomaly) for year, anomaly in zip(years, anomalies) if anomaly is not None]
+        if recent:
+            year, anomaly = recent[-1]
+            text += f"{year} was {abs(anomaly):.1f}°C {'warmer' if anomaly >= 0 else 'colder'} than normal."
+
+        suggestions = [
+            {"label": "View climate data source", "action": f"https://open-meteo.com/en/docs/historical-weather-api#latitude={lat}&longitude={lon}"},
+            {"label": "Get weather", "action": "get_weather"}
+        ]
+        metadata = {
+            "coordinates": f"{lat},{lon}",
+            "location": location if location else f"Coordinates: {lat},{lon}",
+            "type": "climate_history",
+            "source": source,
+            "history": history
+        }
+        return AgentResponse(text=text.strip(), suggestions=suggestions, metadata=metadata).model_dump()
+
+    def _build_response(self, location: Optional[str], coordinates: Optional[str], lat: float, lon: float,
+                        data: Dict[str, Any], cache_status: str) -> dict:
+        """Turn an Open-Meteo forecast payload into the agent response."""
+        current = data.get('current', {})
+        temperature = current.get('temperature_2m', 'Unknown')
+        humidity = current.get('relative_humidity_2m', 'Unknown')
+        windspeed = current.get('wind_speed_10m', 'Unknown')
+        weather_code = current.get('weather_code', None)
+
+        weather_desc = {
+            0: "Clear sky",
+            1: "Mainly clear",
+            2: "Partly cloudy",
+            3: "Overcast",
+            45: "Fog",
+            48: "Depositing rime fog",
+            51: "Light drizzle",
+            53: "Moderate drizzle",
+            55: "Dense drizzle",
+            61: "Slight rain",
+            63: "Moderate rain",
+            65: "Heavy rain",
+            71: "Slight snow fall",
+            73: "Moderate snow fall",
+            75: "Heavy snow fall",
+            77: "Snow grains",
+            80: "Slight rain showers",
+            81: "Moderate rain showers",
+            82: "Violent rain showers",
+            85: "Slight snow showers",
+            86: "Heavy snow showers",
+            95: "Thunderstorm",
+            96: "Thunderstorm with slight hail",
+            99: "Thunderstorm with heavy hail"
+        }.get(weather_code, "Unknown weather condition")
+
+        daily = data.get('daily', {})
+        today_max = daily.get('temperature_2m_max', [None])[0]
+        today_min = daily.get('temperature_2m_min', [None])[0]
+
+        text = f"Current weather: {weather_desc}, Temperature: {temperature}°C"
+        if today_min is not None and today_max is not None:
+            text += f" (today's range: {today_min}°C to {today_max}°C)"
+        text += f", Humidity: {humidity}%, Wind Speed: {windspeed} km/h."
+
+        suggestions = [
+            {"label": "View full forecast", "action": f"https://open-meteo.com/en/forecast?lat={lat}&lon={lon}"},
+            {"label": "Check air quality", "action": "check_air_quality"},
+            {"label": "View historical climate data", "action": "view_climate_history"}
+        ]
+
+        metadata = {
+            "coordinates": f"{lat},{lon}",
+            "location": location if location else f"Coordinates: {lat},{lon}",
+            "type": "weather_info",
+            "cache_status": cache_status,
+            "current": {
+                "temperature": temperature,
+                "weather_condition": weather_desc,
+                "humidity": humidity,
+                "wind_speed": windspeed
+            },
+            "daily": {
+                "max_temperature": today_max,
+                "min_temperature": today_min
+            }
+        }
+        logger.info(f"Successfully fetched ClimateImpactAgent Data for: {location}, Coordinates: {coordinates}\ntext={text}\nSuggestions={suggestions}\nMetaData={metadata}")
+        return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
+
+    @staticmethod
+    def _error_response(coordinates: Optional[str], e: Exception, caller: str = "get_weather_info",
+                        subject: str = "weather data") -> dict:
+        logger.error(f"Error in {caller}: {str(e)}")
+        response = AgentResponse(
+            text=f"Error fetching {subject}: {str(e)}",
+            suggestions=[],
+            metadata={"error": str(e), "coordinates": coordinates}
+        )
+        return response.model_dump()
@@ -1,6 +1,12 @@
-import requests
+from utils import httpClient, asyncHttpClient
+from utils.countryIndex import get_country_index, compact_record
+from utils.tileCache import TILES
+from utils import metrics
+from config.config import Config
+from utils.singleFlight import SingleFlight
+from utils.cache import TTLCache
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,9 +20,204 @@ class AgentResponse(BaseModel):
 class GeoExplorerAgent:
     """Agent to fetch geographical information using various APIs."""
     
+    # REST Countries answers for names the local index lacks, so each is looked up once a day.
+    COUNTRY_FALLBACK_TTL = 24 * 3600
+
     def __init__(self):
-        """Initialize the agent."""
-        pass
+        """Initialize the agent and load the local country index."""
+        get_country_index()
+        self._country_flight = SingleFlight("restcountries")
+        self._country_fallbacks = TTLCache(maxsize=512, ttl=self.COUNTRY_FALLBACK_TTL, namespace='restcountries')
+
+    @staticmethod
+    def _country_url(country: str) -> str:
+        return f"{Config.REST_COUNTRIES_URL}/v3.1/name/{country}?fields=name,population,capital,languages,currencies,timezones,flags"
+
+    def _country_record(self, key: str, status_code: int, payload) -> Optional[Dict[str, Any]]:
+        """The country index record of a REST Countries response, remembering found and unknown names."""
+        if status_code not in (200, 404):
+            return None
+        record = compact_record(payload()[0]) if status_code == 200 else None
+        self._country_fallbacks.set(key, {"record": record})
+        return record
+
+    def _fetch_country(self, country: str) -> Optional[Dict[str, Any]]:
+        """Look a country up on the REST Countries API, returning a country index record."""
+        key = country.casefold()
+        cached = self._country_fallbacks.get(key)
+        if cached is not None:
+            return cached["record"]
+
+        def fetch():
+            country_response = httpClient.get(self._country_url(country))
+            return self._country_record(key, country_response.status_code, country_response.json)
+        return self._country_flight.do(key, fetch)
+
+    async def _afetch_country(self, country: str) -> Optional[Dict[str, Any]]:
+        """Async variant of _fetch_country."""
+        key = country.casefold()
+        cached = self._country_fallbacks.get(key)
+        if cached is not None:
+            return cached["record"]
+
+        async def fetch():
+            country_response = await asyncHttpClient.get(self._country_url(country))
+            return self._country_record(key, country_response.status_code, country_response.json)
+        return await self._country_flight.ado(key, fetch)
+
+    @staticmethod
+    def _indexed_country(country: str) -> Optional[Dict[str, Any]]:
+        """The local country index record of a country name, or None if it is not indexed."""
+        country_index = get_country_index()
+        return country_index.lookup(country) if len(country_index) else None
+
+    @staticmethod
+    def _parse_display_name(rev_geo: Any) -> Dict[str, Any]:
+        """
+        Split a "City, ..., Region, Country" display name into location fields. A two-part
+        "City, Country" name (the offline geocoder's form for places without a region) has no region.
+        """
+        # If reverse_geocode returns a string, parse it
+        if isinstance(rev_geo, str):
+            parts = rev_geo.split(',')
+            if len(parts) >= 3:
+                country = parts[-1].strip()
+                region = parts[-2].strip()
+                city = parts[0].strip()
+            elif len(parts) == 2:
+                country = parts[1].strip()
+                region = "Unknown"
+                city = parts[0].strip()
+            else:
+                country = "Unknown"
+                region = "Unknown"
+                city = rev_geo.strip()
+            return {
+                "country": country,
+                "state": region,
+                "city": city,
+                "full_name": rev_geo
+            }
+        # Assume reverse_geocode returned a dictionary
+        return rev_geo
+
+    @staticmethod
+    def _parse_coordinates(coordinates: Optional[str]) -> Optional[Tuple[float, float]]:
+        """Parse a "lat,lon" string, or return None if it is missing or malformed."""
+        if coordinates is None or not coordinates.strip():
+            return None
+        lat_lon = coordinates.split(',')
+        if len(lat_lon) != 2:
+            return None
+        try:
+            return float(lat_lon[0]), float(lat_lon[1])
+        except ValueError:
+            return None
+
+    def _resolve_location(self, location: str, coordinates: Optional[str]) -> Tuple[Dict[str, Any], float, float]:
+        """Resolve location details from the coordinates, or from the location name as a fallback."""
+        from utils.geoUtils import reverse_geocode, geocode_location
+        point = self._parse_coordinates(coordinates)
+        if point is not None:
+            lat, lon = point
+            try:
+                return self._parse_display_name(reverse_geocode(lat, lon)), lat, lon
+            except ValueError:
+                # If reverse geocoding the coordinates fails, fall back to the location name
+                location_info = geocode_location(location)
+                return location_info, location_info['lat'], location_info['lon']
+
+        # Use location name if no coordinates provided
+        location_info = geocode_location(location)
+        lat, lon = location_info['lat'], location_info['lon']
+        # Optionally try to enrich details via reverse_geocode
+        try:
+            location_info = self._parse_display_name(reverse_geocode(lat, lon))
+        except Exception as e:
+            logger.warning(f"Reverse geocoding fallback failed: {e}")
+        return location_info, lat, lon
+
+    async def _aresolve_location(self, location: str, coordinates: Optional[str]) -> Tuple[Dict[str, Any], float, float]:
+        """Async variant of _resolve_location."""
+        from utils.geoUtils import async_reverse_geocode, async_geocode_location
+        point = self._parse_coordinates(coordinates)
+        if point is not None:
+            lat, lon = point
+            try:
+                return self._parse_display_name(await async_reverse_geocode(lat, lon)), lat, lon
+            except ValueError:
+                location_info = await async_geocode_location(location)
+                return location_info, location_info['lat'], location_info['lon']
+
+        location_info = await async_geocode_location(location)
+        lat, lon = location_info['lat'], location_info['lon']
+        try:
+            location_info = self._parse_display_name(await async_reverse_geocode(lat, lon))
+        except Exception as e:
+            logger.warning(f"Reverse geocoding fallback failed: {e}")
+        return location_info, lat, lon
+
+    def _tile_location(self, coordinates: Optional[str]) -> Optional[Tuple[Dict[str, Any], float, float, Tuple[Any, str, str, str]]]:
+        """Location details and country fields from the map tile cache, if the point's tile is loaded."""
+        point = self._parse_coordinates(coordinates)
+        entry = TILES.peek(*point) if point is not None else None
+        if entry is None or not entry["location_name"]:
+            return None
+        return entry["location"], point[0], point[1], tuple(entry["country"])
+
+    @staticmethod
+    def _country_fields(country_data: Optional[Dict[str, Any]]) -> Tuple[Any, str, str, str]:
+        """(population, capital, languages, timezone) from a country index record."""
+        if not country_data:
+            return "Unknown", "Unknown", "Unknown", "Unknown"
+        population = country_data.get('population') or 'Unknown'
+        capital = (country_data.get('capital') or ['Unknown'])[0]
+        languages = ", ".join(country_data.get('languages', []))
+        timezone = (country_data.get('timezones') or ['Unknown'])[0]
+        return population, capital, languages, timezone
+
+    def _country_info(self, country: str) -> Tuple[Any, str, str, str]:
+        """
+        Fetch additional country information (population, timezone, etc.) from the local
+        country index, falling back to the REST Countries API for names it does not have.
+        """
+        if country == 'Unknown':
+            return self._country_fields(None)
+        try:
+            with metrics.span("agent.geo_explorer.country_info") as span:
+                record = self._indexed_country(country)
+                if record is not None:
+                    span["source"] = "index"
+                    return self._country_fields(record)
+                span["source"] = "restcountries"
+                return self._country_fields(self._fetch_country(country))
+        except Exception as e:
+            logger.warning(f"Error fetching additional country info: {str(e)}")
+            return self._country_fields(None)
+
+    def describe_place(self, display_name: str) -> Tuple[Dict[str, Any], Tuple[Any, str, str, str]]:
+        """
+        Location fields and (population, capital, languages, timezone) of a reverse-geocoded
+        display name, e.g. for filling the map tile cache.
+        """
+        location_info = self._parse_display_name(display_name)
+        return location_info, self._country_info(location_info.get('country', 'Unknown'))
+
+    async def _acountry_info(self, country: str) -> Tuple[Any, str, str, str]:
+        """Async variant of _country_info."""
+        if country == 'Unknown':
+            return self._country_fields(None)
+        try:
+            with metrics.span("agent.geo_explorer.country_info") as span:
+                record = self._indexed_country(country)
+                if record is not None:
+                    span["source"] = "index"
+                    return self._country_fields(record)
+                span["source"] = "restcountries"
+                return self._country_fields(await self._afetch_country(country))
+        except Exception as e:
+            logger.warning(f"Error fetching additional country info: {str(e)}")
+            return self._country_fields(None)
     
     def get_location_info(self, location: str, coordinates: Optional[str] = None) -> dict:
         """
@@ -31,130 +232,75 @@ class GeoExplorerAgent:
         """
         logger.info(f"Fetching location info for: {location}, Coordinates: {coordinates}. TOOL Calling for GEOExplorerAgent")
         try:
-            from utils.geoUtils import reverse_geocode, geocode_location
-            if coordinates is not None and coordinates.strip():
-                # Attempt to parse coordinates from string format
-                lat_lon = coordinates.split(',')
-                if len(lat_lon) == 2:
-                    try:
-                        lat, lon = float(lat_lon[0]), float(lat_lon[1])
-                        # Call reverse_geocode to get location details
-                        rev_geo = reverse_geocode(lat, lon)
-                        # If reverse_geocode returns a string, parse it
-                        if isinstance(rev_geo, str):
-                            parts = rev_geo.split(',')
-                            if len(parts) >= 3:
-                                country = parts[-1].strip()
-                                region = parts[-2].strip()
-                                city = parts[0].strip()
-                            else:
-                                country = "Unknown"
-                                region = "Unknown"
-                                city = rev_geo.strip()
-                            location_info = {
-                                "country": country,
-                                "state": region,
-                                "city": city,
-                                "full_name": rev_geo
-                            }
-                        else:
-                            # Assume reverse_geocode returned a dictionary
-                            location_info = rev_geo
-                    except ValueError:
-                        # If coordinate parsing fails, fall back to geocode_location using location name
-                        location_info = geocode_location(location)
-                        lat, lon = location_info['lat'], location_info['lon']
-                else:
-                    # If coordinates format is invalid, fall back to geocode_location using location name
-                    location_info = geocode_location(location)
-                    lat, lon = location_info['lat'], location_info['lon']
-            else:
-                # Use location name if no coordinates provided
-                location_info = geocode_location(location)
-                lat, lon = location_info['lat'], location_info['lon']
-                # Optionally try to enrich details via reverse_geocode
-                try:
-                    rev_geo = reverse_geocode(lat, lon)
-                    if isinstance(rev_geo, str):
-                        parts = rev_geo.split(',')
-                        if len(parts) >= 3:
-                            country = parts[-1].strip()
-                            region = parts[-2].strip()
-                            city = parts[0].strip()
-                        else:
-                            country = "Unknown"
-                            region = "Unknown"
-                            city = rev_geo.strip()
-                        location_info = {
-                            "country": country,
-                            "state": region,
-                            "city": city,
-                            "full_name": rev_geo
-                        }
-                except Exception as e:
-                    logger.warning(f"Reverse geocoding fallback failed: {e}")
-            
-            # Extract details from location_info dictionary
+            tiled = self._tile_location(coordinates)
+            if tiled is not None:
+                return self._build_response(location, *tiled)
+            location_info, lat, lon = self._resolve_location(location, coordinates)
             country = location_info.get('country', 'Unknown')
-            region = location_info.get('state', location_info.get('region', 'Unknown'))
-            city = location_info.get('city', location_info.get('name', 'Unknown'))
-            
-            # Fetch additional country information (population, timezone, etc.) using REST Countries API
-            try:
-                if country != 'Unknown':
-                    country_info_url = f"https://restcountries.com/v3.1/name/{country}?fields=name,population,capital,languages,currencies,timezones,flags"
-                    country_response = requests.get(country_info_url)
-                    if country_response.status_code == 200:
-                        country_data = country_response.json()[0]
-                        population = country_data.get('population', 'Unknown')
-                        capital = country_data.get('capital', ['Unknown'])[0]
-                        languages = ", ".join(country_data.get('languages', {}).values())
-                        timezone = country_data.get('timezones', ['Unknown'])[0]
-                    else:
-                        population = capital = languages = timezone = "Unknown"
-                else:
-                    population = capital = languages = timezone = "Unknown"
-            except Exception as e:
-                logger.warning(f"Error fetching additional country info: {str(e)}")
-                population = capital = languages = timezone = "Unknown"
-            
-            # Construct the response text and suggestions
-            text = f"{city}, {region}, {country} is located at coordinates {lat}, {lon}. "
-            if country != 'Unknown' and capital != 'Unknown':
-                text += f"The country has a population of approximately {population:,} people. "
-                text += f"The capital is {capital} and the main languages spoken are {languages}. "
-                text += f"The primary timezone is {timezone}."
-            
-            suggestions = [
-                {"label": "View on map", "action": f"map:{lat},{lon}"},
-                {"label": "Get weather", "action": "get_weather"},
-                {"label": "Find nearby places", "action": "find_nearby"}
-            ]
-            
-            metadata = {
-                "coordinates": f"{lat},{lon}",
-                "location": {
-                    "city": city,
-                    "region": region,
-                    "country": country,
-                    "full_name": location_info.get('full_name', location)
-                },
-                "country_info": {
-                    "population": population,
-                    "capital": capital,
-                    "languages": languages,
-                    "timezone": timezone
-                },
-                "type": "location_info"
-            }
-            logger.info(f"Successfully fetched GeoExplorerAgent Data for: {location}\nText={text}\nSuugestions={suggestions}\nMetadata={metadata}")            
-            return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
-        
+            return self._build_response(location, location_info, lat, lon, self._country_info(country))
         except Exception as e:
-            logger.error(f"Error in get_location_info: {str(e)}")
-            response = AgentResponse(
-                text=f"Error fetching geographic information for {location}: {str(e)}",
-                suggestions=[],
-                metadata={"error": str(e), "location": location}
-            )
-            return response.model_dump()
+            return self._error_response(location, e)
+
+    async def aget_location_info(self, location: str, coordinates: Optional[str] = None) -> dict:
+        """Async variant of get_location_info for the ASGI serving path."""
+        logger.info(f"Fetching location info for: {location}, Coordinates: {coordinates}. TOOL Calling for GEOExplorerAgent")
+        try:
+            tiled = self._tile_location(coordinates)
+            if tiled is not None:
+                return self._build_response(location, *tiled)
+            location_info, lat, lon = await self._aresolve_location(location, coordinates)
+            country = location_info.get('country', 'Unknown')
+            return self._build_response(location, location_info, lat, lon, await self._acountry_info(country))
+        except Exception as e:
+            return self._error_response(location, e)
+
+    def _build_response(self, location: str, location_info: Dict[str, Any], lat: float, lon: float,
+                        country_fields: Tuple[Any, str, str, str]) -> dict:
+        """Assemble the agent response from resolved location details and country information."""
+        # Extract details from location_info dictionary
+        country = location_info.get('country', 'Unknown')
+        region = location_info.get('state', location_info.get('region', 'Unknown'))
+        city = location_info.get('city', location_info.get('name', 'Unknown'))
+        population, capital, languages, timezone = country_fields
+        
+        # Construct the response text and suggestions
+        text = f"{city}, {region}, {country} is located at coordinates {lat}, {lon}. "
+        if country != 'Unknown' and capital != 'Unknown':
+            text += f"The country has a population of approximately {population:,} people. "
+            text += f"The capital is {capital} and the main languages spoken are {languages}. "
+            text += f"The primary timezone is {timezone}."
+
+        suggestions = [
+            {"label": "View on map", "action": f"map:{lat},{lon}"},
+            {"label": "Get weather", "action": "get_weather"},
+            {"label": "Find nearby places", "action": "find_nearby"}
+        ]
+
+        metadata = {
+            "coordinates": f"{lat},{lon}",
+            "location": {
+                "city": city,
+                "region": region,
+                "country": country,
+                "full_name": location_info.get('full_name', location)
+            },
+            "country_info": {
+                "population": population,
+                "capital": capital,
+                "languages": languages,
+                "timezone": timezone
+            },
+            "type": "location_info"
+        }
+        logger.info(f"Successfully fetched GeoExplorerAgent Data for: {location}\nText={text}\nSuugestions={suggestions}\nMetadata={metadata}")            
+        return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
+
+    @staticmethod
+    def _error_response(location: str, e: Exception) -> dict:
+        logger.error(f"Error in get_location_info: {str(e)}")
+        response = AgentResponse(
+            text=f"Error fetching geographic information for {location}: {str(e)}",
+            suggestions=[],
+            metadata={"error": str(e), "location": location}
+        )
+        return response.model_dump()
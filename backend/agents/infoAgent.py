@@ -1,21 +1,160 @@
-import requests
+from utils import httpClient, asyncHttpClient
+from config.config import Config
+from utils import metrics
+from utils.singleFlight import SingleFlight
+from utils.wikiIndex import get_wiki_index
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+WIKIPEDIA_API_URL = Config.WIKIPEDIA_API_URL
+
 class AgentResponse(BaseModel):
     text: str
     suggestions: List[Dict[str, str]]
     metadata: Dict[str, Any]
 
 class InfoAgent:
-    """Agent to fetch regional information (history, culture, and cuisine) from Wikipedia."""
+    """
+    Agent to fetch regional information (history, culture, and cuisine) from Wikipedia.
+
+    Aspects are resolved from the local extracts index (utils/wikiIndex.py) when one is
+    installed; only the aspects it misses go to the live MediaWiki API.
+    """
     
-    def __init__(self):
-        """Initialize the agent."""
-        pass
+    def __init__(self, aspects: Optional[List[str]] = None):
+        """
+        Initialize the agent.
+
+        Args:
+            aspects (Optional[List[str]]): Aspects to look up, each fetched as the Wikipedia
+                article "<Aspect> of <location>". Defaults to Config.INFO_AGENT_ASPECTS.
+        """
+        self.aspects = list(aspects) if aspects else list(Config.INFO_AGENT_ASPECTS)
+        self._wikipedia_flight = SingleFlight("wikipedia")
+
+    def _aspect_titles(self, location: str) -> Dict[str, str]:
+        return {aspect: f"{aspect} of {location}" for aspect in self.aspects}
+
+    @staticmethod
+    def _query_params(titles: Dict[str, str]) -> Dict[str, Any]:
+        """MediaWiki query parameters fetching the intro extracts of all titles at once."""
+        return {
+            "action": "query",
+            "format": "json",
+            "formatversion": 2,
+            "prop": "extracts",
+            "exintro": True,
+            "explaintext": True,
+            "exlimit": "max",
+            "redirects": 1,
+            "titles": "|".join(titles.values())
+        }
+
+    @staticmethod
+    def _map_extracts(location: str, titles: Dict[str, str], query: Dict[str, Any]) -> Dict[str, str]:
+        """Map the pages of a batched query back to their aspects via the normalization and redirect tables."""
+        normalized = {item["from"]: item["to"] for item in query.get("normalized", [])}
+        redirects = {item["from"]: item["to"] for item in query.get("redirects", [])}
+        extracts = {page["title"]: page.get("extract") for page in query.get("pages", []) if "title" in page}
+
+        info_parts = {}
+        for aspect, title in titles.items():
+            title = normalized.get(title, title)
+            title = redirects.get(title, title)
+            extract = extracts.get(title)
+            if extract and extract.strip():
+                info_parts[aspect] = extract.strip()
+            else:
+                info_parts[aspect] = InfoAgent._no_information(aspect, location)
+        return info_parts
+
+    @staticmethod
+    def _no_information(aspect: str, location: str) -> str:
+        return f"No information on {aspect.lower()} available for {location}."
+
+    def _local_aspects(self, location: str) -> Dict[str, str]:
+        """
+        Extracts of the aspects found in the local index. Fuzzy matches are prefixed with the
+        article they come from, since it may cover the enclosing region rather than the location.
+        """
+        index = get_wiki_index()
+        if index is None:
+            return {}
+        info_parts = {}
+        for aspect, title in self._aspect_titles(location).items():
+            match = index.lookup(aspect, location)
+            if match is None:
+                continue
+            found_title, extract = match
+            info_parts[aspect] = extract if found_title.casefold() == title.casefold() else f'(From "{found_title}") {extract}'
+        return info_parts
+
+    def _merge(self, location: str, local: Dict[str, str], live: Dict[str, str]) -> Dict[str, str]:
+        return {aspect: local.get(aspect) or live.get(aspect) or self._no_information(aspect, location)
+                for aspect in self.aspects}
+
+    def _live_titles(self, location: str, local: Dict[str, str]) -> Dict[str, str]:
+        """Aspect titles left for the live API, or none when Config.WIKI_LIVE_FALLBACK is off."""
+        if not Config.WIKI_LIVE_FALLBACK:
+            return {}
+        return {aspect: title for aspect, title in self._aspect_titles(location).items() if aspect not in local}
+
+    def fetch_aspects(self, location: str) -> Dict[str, str]:
+        """
+        Fetch the intro extract of every aspect article.
+
+        Aspects are looked up in the local index first. The rest are fetched in one batched
+        MediaWiki query: titles are sent together (joined by "|"), redirects are followed, and
+        the returned pages are mapped back to their aspects through the normalization and
+        redirect tables.
+
+        Args:
+            location (str): The name of the region.
+
+        Returns:
+            dict: Extract (or a "no information" note) per aspect.
+        """
+        with metrics.span("agent.info_agent.fetch_aspects") as span:
+            local = self._local_aspects(location)
+            titles = self._live_titles(location, local)
+            span["local"], span["live"] = len(local), len(titles)
+            if not titles:
+                return self._merge(location, local, {})
+
+            def fetch():
+                response = httpClient.get(WIKIPEDIA_API_URL, params=self._query_params(titles), timeout=10)
+                response.raise_for_status()
+                return response.json().get("query", {})
+
+            query = self._wikipedia_flight.do(tuple(titles.values()), fetch)
+        return self._merge(location, local, self._map_extracts(location, titles, query))
+
+    async def afetch_aspects(self, location: str) -> Dict[str, str]:
+        """Async variant of fetch_aspects. Local lookups run inline; they take well under a millisecond."""
+        with metrics.span("agent.info_agent.fetch_aspects") as span:
+            local = self._local_aspects(location)
+            titles = self._live_titles(location, local)
+            span["local"], span["live"] = len(local), len(titles)
+            if not titles:
+                return self._merge(location, local, {})
+
+            async def fetch():
+                response = await asyncHttpClient.get(WIKIPEDIA_API_URL, params=self._query_params(titles), timeout=10)
+                response.raise_for_status()
+                return response.json().get("query", {})
+
+            query = await self._wikipedia_flight.ado(tuple(titles.values()), fetch)
+        return self._merge(location, local, self._map_extracts(location, titles, query))
+
+    @staticmethod
+    def _parse_coordinates(coordinates: Optional[str]) -> Tuple[float, float]:
+        if not coordinates:
+            raise ValueError("Location information is required.")
+        lat_str, lon_str = coordinates.split(',')
+        return float(lat_str.strip()), float(lon_str.strip())
     
     def get_info(self, location: str, coordinates: Optional[str] = None) -> dict:
         """
@@ -34,67 +173,48 @@ class InfoAgent:
             # If location is empty and coordinates are provided, try to resolve the name.
             if not location or not location.strip():
                 from utils.geoUtils import reverse_geocode
-                if coordinates:
-                    lat_str, lon_str = coordinates.split(',')
-                    lat, lon = float(lat_str.strip()), float(lon_str.strip())
-                    location = reverse_geocode(lat, lon)
-                else:
-                    raise ValueError("Location information is required.")
-            
-            # Create queries for different aspects.
-            queries = {
-                "History": f"History of {location}",
-                "Culture": f"Culture of {location}",
-                "Cuisine": f"Cuisine of {location}"
-            }
-            
-            info_parts = {}
-            for key, query in queries.items():
-                params = {
-                    "action": "query",
-                    "format": "json",
-                    "prop": "extracts",
-                    "exintro": True,
-                    "explaintext": True,
-                    "titles": query
-                }
-                response = requests.get("https://en.wikipedia.org/w/api.php", params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                pages = data.get("query", {}).get("pages", {})
-                extract = None
-                for page_id in pages:
-                    page = pages[page_id]
-                    if "extract" in page and page["extract"]:
-                        extract = page["extract"]
-                        break
-                if extract:
-                    info_parts[key] = extract.strip()
-                else:
-                    info_parts[key] = f"No information on {key.lower()} available for {location}."
-            
-            text = (f"Regional Information for {location}:\n\n"
-                    f"History: {info_parts['History']}\n\n"
-                    f"Culture: {info_parts['Culture']}\n\n"
-                    f"Cuisine: {info_parts['Cuisine']}")
-            
-            suggestions = [
-                {"label": "View Wikipedia", "action": f"https://en.wikipedia.org/wiki/{location.replace(' ', '_')}"}
-            ]
+                location = reverse_geocode(*self._parse_coordinates(coordinates))
             
-            metadata = {
-                "location": location,
-                "info": info_parts,
-                "type": "regional_info"
-            }
-            logger.info(f"Successfully fetched infoAgent Data for: {location}\nText={text}\nSuugestions={suggestions}\nMetadata={metadata}")
-            return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
-        
+            return self._build_response(location, self.fetch_aspects(location))
+        except Exception as e:
+            return self._error_response(location, e)
+
+    async def aget_info(self, location: str, coordinates: Optional[str] = None) -> dict:
+        """Async variant of get_info for the ASGI serving path."""
+        logger.info(f"Fetching location info for: {location}, Coordinates: {coordinates}. TOOL Calling for INFOAgent")
+
+        try:
+            if not location or not location.strip():
+                from utils.geoUtils import async_reverse_geocode
+                location = await async_reverse_geocode(*self._parse_coordinates(coordinates))
+
+            return self._build_response(location, await self.afetch_aspects(location))
         except Exception as e:
-            logger.error(f"Error in get_info: {str(e)}")
-            response = AgentResponse(
-                text=f"Error fetching regional information for {location}: {str(e)}",
-                suggestions=[],
-                metadata={"error": str(e), "location": location}
-            )
-            return response.model_dump()
+            return self._error_response(location, e)
+
+    def _build_response(self, location: str, info_parts: Dict[str, str]) -> dict:
+        text = f"Regional Information for {location}:\n\n" + "\n\n".join(
+            f"{aspect}: {info_parts[aspect]}" for aspect in self.aspects
+        )
+        
+        suggestions = [
+            {"label": "View Wikipedia", "action": f"https://en.wikipedia.org/wiki/{location.replace(' ', '_')}"}
+        ]
+        
+        metadata = {
+            "location": location,
+            "info": info_parts,
+            "type": "regional_info"
+        }
+        logger.info(f"Successfully fetched infoAgent Data for: {location}\nText={text}\nSuugestions={suggestions}\nMetadata={metadata}")
+        return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
+
+    @staticmethod
+    def _error_response(location: str, e: Exception) -> dict:
+        logger.error(f"Error in get_info: {str(e)}")
+        response = AgentResponse(
+            text=f"Error fetching regional information for {location}: {str(e)}",
+            suggestions=[],
+            metadata={"error": str(e), "location": location}
+        )
+        return response.model_dump()
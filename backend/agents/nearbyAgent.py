@@ -0,0 +1,123 @@
+from utils.poiIndex import get_poi_index
+from utils import metrics
+from config.config import Config
+from pydantic import BaseModel
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AgentResponse(BaseModel):
+    text: str
+    suggestions: List[Dict[str, str]]
+    metadata: Dict[str, Any]
+
+class NearbyAgent:
+    """Agent to find points of interest near a location from the local POI index."""
+
+    def __init__(self):
+        """Initialize the agent and load the local POI index."""
+        get_poi_index()
+
+    @staticmethod
+    def _parse_coordinates(coordinates: Optional[str]) -> Optional[Tuple[float, float]]:
+        """Parse a "lat,lon" string, or return None if it is missing or malformed."""
+        if coordinates is None or not coordinates.strip():
+            return None
+        lat_lon = coordinates.split(',')
+        if len(lat_lon) != 2:
+            return None
+        try:
+            return float(lat_lon[0]), float(lat_lon[1])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _categories(category: Optional[str]) -> Optional[List[str]]:
+        if not category:
+            return None
+        return [c.strip() for c in category.split(',') if c.strip()] or None
+
+    def _search(self, location: str, lat: float, lon: float, category: Optional[str], radius_km: Optional[float]) -> dict:
+        """Query the POI index and assemble the agent response."""
+        index = get_poi_index()
+        if index is None:
+            raise ValueError("no local places index is loaded")
+        radius_km = min(radius_km or Config.NEARBY_DEFAULT_RADIUS_KM, Config.NEARBY_MAX_RADIUS_KM)
+        with metrics.span("agent.nearby.query") as span:
+            places = index.query(lat, lon, radius_km=radius_km, k=Config.NEARBY_DEFAULT_LIMIT,
+                                 categories=self._categories(category))
+            span["results"] = len(places)
+        return self._build_response(location, lat, lon, category, radius_km, places)
+
+    def find_places(self, location: str, coordinates: Optional[str] = None, category: Optional[str] = None,
+                    radius_km: Optional[float] = None) -> dict:
+        """
+        Find points of interest near a location, nearest first.
+
+        Args:
+            location (str): Name of the location (e.g., "Paris, France").
+            coordinates (str, optional): Latitude and longitude as a string (e.g., "48.8566,2.3522").
+            category (str, optional): Comma-separated POI categories (e.g., "cafe,restaurant").
+            radius_km (float, optional): Search radius, Config.NEARBY_DEFAULT_RADIUS_KM by default.
+
+        Returns:
+            dict: Response containing text, suggestions, and metadata.
+        """
+        logger.info(f"Finding places near: {location}, Coordinates: {coordinates}, Category: {category}. TOOL Calling for NearbyAgent")
+        try:
+            point = self._parse_coordinates(coordinates)
+            if point is None:
+                from utils.geoUtils import geocode_location
+                location_info = geocode_location(location)
+                point = location_info['lat'], location_info['lon']
+            return self._search(location, point[0], point[1], category, radius_km)
+        except Exception as e:
+            return self._error_response(location, e)
+
+    async def afind_places(self, location: str, coordinates: Optional[str] = None, category: Optional[str] = None,
+                           radius_km: Optional[float] = None) -> dict:
+        """Async variant of find_places for the ASGI serving path."""
+        logger.info(f"Finding places near: {location}, Coordinates: {coordinates}, Category: {category}. TOOL Calling for NearbyAgent")
+        try:
+            point = self._parse_coordinates(coordinates)
+            if point is None:
+                from utils.geoUtils import async_geocode_location
+                location_info = await async_geocode_location(location)
+                point = location_info['lat'], location_info['lon']
+            # The index query is a few milliseconds of NumPy work, cheap enough to run on the event loop.
+            return self._search(location, point[0], point[1], category, radius_km)
+        except Exception as e:
+            return self._error_response(location, e)
+
+    @staticmethod
+    def _build_response(location: str, lat: float, lon: float, category: Optional[str], radius_km: float,
+                        places: List[Dict[str, Any]]) -> dict:
+        what = category or "places"
+        if places:
+            listed = "; ".join(
+                f"{place['name'] or 'Unnamed'} ({place['category']}, {place['distance_km']:.2f} km)" for place in places)
+            text = f"Nearest {what} within {radius_km:g} km of {location}: {listed}."
+        else:
+            text = f"No {what} found within {radius_km:g} km of {location}."
+
+        suggestions = [{"label": f"Show {place['name'] or place['category']} on map", "action": f"map:{place['lat']},{place['lon']}"}
+                       for place in places[:3]]
+        metadata = {
+            "coordinates": f"{lat},{lon}",
+            "category": category,
+            "radius_km": radius_km,
+            "places": places,
+            "type": "nearby_places"
+        }
+        return AgentResponse(text=text, suggestions=suggestions, metadata=metadata).model_dump()
+
+    @staticmethod
+    def _error_response(location: str, e: Exception) -> dict:
+        logger.error(f"Error in find_places: {str(e)}")
+        response = AgentResponse(
+            text=f"Error finding places near {location}: {str(e)}",
+            suggestions=[],
+            metadata={"error": str(e), "location": location}
+        )
+        return response.model_dump()
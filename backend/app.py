@@ -1,34 +1,63 @@
-from flask import Flask
+from flask import Flask, g, request
 from flask_cors import CORS
-from flask_session import Session
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from dotenv import load_dotenv
 import os
 from routes.mapRoutes import map_bp
 from routes.chatRoutes import chat_bp
 from routes.healthRoutes import health_bp
+from routes.limits import limiter
+from utils import metrics
+from utils.sessionStore import init_session_backend
+import time
 
 load_dotenv()
 
 app = Flask(__name__)
+metrics.install_request_id_logging()
 CORS(app, supports_credentials=True)  # Allow credentials (cookies)
 
-# Session configuration
-app.config['SESSION_TYPE'] = 'filesystem'
+# Session configuration (backend selected by SESSION_BACKEND, see utils/sessionStore.py)
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 if not app.config['SECRET_KEY']:
     raise ValueError("SECRET_KEY must be set in environment variables")
-Session(app)
+init_session_backend(app)
 
-# Rate limiting
-limiter = Limiter(app=app, key_func=get_remote_address, default_limits=['200 per day', '50 per hour'])
+# Rate limiting: default limits for every route, plus the per-route limits of the blueprints
+limiter.init_app(app)
+
+# Request IDs and request latency metrics
+@app.before_request
+def start_request_trace():
+    g.request_id = request.headers.get('X-Request-ID') or metrics.new_request_id()
+    g.request_token = metrics.request_id_var.set(g.request_id)
+    g.request_started = time.monotonic()
+
+@app.after_request
+def finish_request_trace(response):
+    if 'request_started' in g:
+        duration = time.monotonic() - g.request_started
+        metrics.HTTP_REQUESTS.observe(duration, endpoint=request.endpoint or 'unknown',
+                                      method=request.method, status=response.status_code)
+        response.headers['X-Request-ID'] = g.request_id
+        response.headers['Server-Timing'] = f"app;dur={duration * 1000:.1f}"
+    return response
+
+@app.teardown_request
+def reset_request_id(exc=None):
+    token = g.pop('request_token', None)
+    if token is not None:
+        try:
+            metrics.request_id_var.reset(token)
+        except (ValueError, RuntimeError):
+            # Streamed responses finish in a different context than they started in.
+            pass
 
 # Register blueprints
 app.register_blueprint(map_bp, url_prefix='/api')
 app.register_blueprint(chat_bp, url_prefix='/api')
 app.register_blueprint(health_bp, url_prefix='/api')
+limiter.exempt(health_bp)  # health checks and metrics scrapes must not be rate limited
 
 if __name__ == '__main__':
     app.run(debug=os.getenv('FLASK_ENV') != 'production', host='0.0.0.0', port=5000)
\ No newline at end of file
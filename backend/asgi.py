@@ -0,0 +1,214 @@
+"""
+ASGI entry point: serves /api/chat and /api/chat/stream on the async pipeline and hands every
+other request to the Flask app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+The Flask app (app.py) stays the WSGI entry point and is unchanged. Under ASGI the chat routes
+await the OpenAI API and the upstream geo/weather/info services instead of holding a worker
+thread per request, so one process can keep many slow chats in flight. Sessions created by
+/api/session (served by Flask) are checked with Flask's own session interface, so both entry
+points share the same sessions. Flask-Limiter limits are not applied to the async chat routes;
+put a limit in front of them at the proxy when needed.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import session
+
+from app import app as flask_app
+from config.config import Config
+from services.asyncLlmService import agenerate_llm_response, aclose as aclose_openai
+from services.llmService import RESPONSE_MODES
+from utils import asyncHttpClient, metrics
+from utils.responseUtils import format_sse, sse_comment
+from routes.chatRoutes import SSE_HEARTBEAT_INTERVAL, parse_bypass_cache
+
+logger = logging.getLogger(__name__)
+
+ASYNC_ROUTES = {
+    "/api/chat": "chat.handle_chat",
+    "/api/chat/stream": "chat.handle_chat_stream",
+}
+
+Headers = List[Tuple[bytes, bytes]]
+
+class ChatApp:
+    """ASGI application that runs the chat routes natively and delegates the rest to Flask."""
+
+    def __init__(self, wsgi_app):
+        self.flask = wsgi_app
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self._inflight: Optional[asyncio.Semaphore] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] in ASYNC_ROUTES:
+            await self._handle_chat(scope, receive, send)
+            return
+        await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncHttpClient.aclose()
+                await aclose_openai()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _session_id(self, cookie: str) -> Optional[str]:
+        """Load the Flask session for the given Cookie header and return its ID if initialized."""
+        with self.flask.test_request_context(headers={"Cookie": cookie} if cookie else None):
+            if "initialized" not in session:
+                return None
+            return session.get("session_id")
+
+    def _cors_headers(self, headers: Dict[bytes, bytes]) -> Headers:
+        origin = headers.get(b"origin")
+        if not origin:
+            return []
+        return [(b"access-control-allow-origin", origin),
+                (b"access-control-allow-credentials", b"true"),
+                (b"vary", b"Origin")]
+
+    async def _handle_chat(self, scope, receive, send):
+        started = time.monotonic()
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1") or metrics.new_request_id()
+        token = metrics.request_id_var.set(request_id)
+        endpoint = ASYNC_ROUTES[scope["path"]]
+        extra = self._cors_headers(headers) + [(b"x-request-id", request_id.encode("latin-1"))]
+        status = 500
+        try:
+            status = await self._dispatch(scope, receive, send, headers, extra, started)
+        except Exception as e:
+            logger.error(f"Chat processing failed: {str(e)}", exc_info=True)
+            await _send_json(send, 500, {"error": "Internal server error"}, extra)
+        finally:
+            metrics.HTTP_REQUESTS.observe(time.monotonic() - started, endpoint=endpoint, method="POST", status=status)
+            metrics.request_id_var.reset(token)
+
+    async def _dispatch(self, scope, receive, send, headers, extra, started) -> int:
+        body = await _read_body(receive)
+
+        # Session validation
+        session_id = await asyncio.to_thread(self._session_id, headers.get(b"cookie", b"").decode("latin-1"))
+        if session_id is None:
+            logger.warning("Unauthorized chat attempt")
+            return await _send_json(send, 401, {"error": "Invalid session"}, extra)
+
+        # Request validation
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or "message" not in data:
+            logger.warning("Invalid request format")
+            return await _send_json(send, 400, {"error": "Message is required"}, extra)
+        response_mode = data.get("response_mode")
+        if response_mode is not None and response_mode not in RESPONSE_MODES:
+            return await _send_json(send, 400, {"error": f"response_mode must be one of: {', '.join(RESPONSE_MODES)}"}, extra)
+        try:
+            bypass_cache = parse_bypass_cache(data)
+        except ValueError as e:
+            return await _send_json(send, 400, {"error": str(e)}, extra)
+
+        if self._inflight is None:
+            self._inflight = asyncio.Semaphore(Config.ASYNC_MAX_INFLIGHT_CHATS)
+        if self._inflight.locked():
+            return await _send_json(send, 503, {"error": "Server is busy, please retry"}, extra + [(b"retry-after", b"1")])
+
+        logger.info(f"Chat request - Session: {session_id}, Model: {data.get('model')}")
+        kwargs = {
+            "message": data["message"],
+            "model": data.get("model", "gpt-4"),
+            "coordinates": data.get("coordinates", {}),
+            "response_mode": response_mode,
+            "use_cache": not bypass_cache,
+        }
+        async with self._inflight:
+            if scope["path"] == "/api/chat/stream":
+                return await self._stream(send, kwargs, extra)
+            response = await agenerate_llm_response(**kwargs)
+            if isinstance(response, dict) and "error" in response:
+                logger.error(f"LLM Error: {response['error']}")
+                return await _send_json(send, 500, response, extra)
+            timing = [(b"server-timing", f"app;dur={(time.monotonic() - started) * 1000:.1f}".encode())]
+            return await _send_json(send, 200, response, extra + timing)
+
+    async def _stream(self, send, kwargs: Dict[str, Any], extra: Headers) -> int:
+        """Async counterpart of /chat/stream: the same SSE events, produced on the event loop."""
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def run_pipeline():
+            try:
+                response = await agenerate_llm_response(
+                    on_event=lambda event, payload: events.put_nowait((event, payload)), **kwargs)
+                if isinstance(response, dict) and "error" in response:
+                    logger.error(f"LLM Error: {response['error']}")
+                    events.put_nowait(("error", response))
+                else:
+                    events.put_nowait(("done", response))
+            except Exception as e:
+                logger.error(f"Chat processing failed: {str(e)}", exc_info=True)
+                events.put_nowait(("error", {"error": "Internal server error"}))
+            finally:
+                events.put_nowait(None)
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no")] + extra,
+        })
+        task = asyncio.create_task(run_pipeline())
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    await send({"type": "http.response.body", "body": sse_comment().encode(), "more_body": True})
+                    continue
+                if item is None:
+                    break
+                await send({"type": "http.response.body", "body": format_sse(*item).encode(), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if not task.done():
+                # The client went away; stop spending upstream calls on this answer.
+                task.cancel()
+        return 200
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+async def _send_json(send, status: int, payload: Any, extra: Headers = ()) -> int:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode())] + list(extra),
+    })
+    await send({"type": "http.response.body", "body": body})
+    return status
+
+app = ChatApp(flask_app)
@@ -0,0 +1,64 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/baseline.json benchmarks/results/latest.json
+
+Exits with status 1 when any scenario's p95 latency or throughput regressed by more than
+--threshold (a fraction, default 0.10).
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List
+
+METRICS = (
+    # (key, label, higher_is_better)
+    ("p50_ms", "p50 ms", False),
+    ("p95_ms", "p95 ms", False),
+    ("p99_ms", "p99 ms", False),
+    ("throughput_rps", "req/s", True),
+    ("alloc_peak_kib", "peak KiB/op", False),
+)
+GATED = ("p95_ms", "throughput_rps")
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """One row per (scenario, metric) present in both runs, with the relative change and a regression flag."""
+    rows = []
+    for name, result in current.get("scenarios", {}).items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for key, label, higher_is_better in METRICS:
+            if base.get(key) is None or result.get(key) is None:
+                continue
+            before, after = float(base[key]), float(result[key])
+            change = (after - before) / before if before else 0.0
+            worse = -change if higher_is_better else change
+            rows.append({"scenario": name, "metric": label, "baseline": before, "current": after, "change": change,
+                         "regression": key in GATED and worse > threshold})
+    return rows
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'scenario':<28} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['scenario']:<28} {row['metric']:<12} {row['baseline']:>10.2f} {row['current']:>10.2f} "
+                     f"{row['change']:>+7.1%}{flag}")
+    return "\n".join(lines)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative regression of p95 and throughput.")
+    args = parser.parse_args(argv)
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    print(format_rows(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+"""
+Load test for the HTTP API under different server/worker configurations.
+
+For every worker configuration the app is started as a real server (gunicorn for app.py,
+Werkzeug's threaded dev server, or uvicorn for asgi.py) against the upstream stubs
+(benchmarks/stubs.py, in their own process), with the session backend chosen by
+--session-backend (SESSION_BACKEND, default sqlite as in the app) and Flask-Limiter in place.
+Closed-loop virtual users, each with its own session, then replay a mix of chat, geocode and
+session traffic at increasing concurrency. Run from the backend directory:
+
+    python -m benchmarks.loadtest --server gunicorn --workers 1,2,4 --threads 1,8 \
+        --concurrency 1,4,16,64 --duration 20 --mix chat_fast=2,chat_polished=1,geocode=6,session=1
+
+Per concurrency level it reports throughput, latency percentiles per route, error and
+rate-limited (429) rates, and queueing delay (client-observed latency minus the app time the
+server reports in its Server-Timing header). The saturation point is the level after which
+throughput stops growing by more than --saturation-gain.
+
+Flask-Limiter stays enabled with RATELIMIT_DEFAULTS set from --rate-limit (default high
+enough not to trip) and the per-route limits (RATELIMIT_ROUTE_LIMITS) off; pass --rate-limit app
+to test with the application's own limits. With several worker processes the default in-memory
+limiter storage is per process.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+from benchmarks.stubs import add_stub_arguments, stub_env
+from utils.sessionStore import SESSION_BACKENDS
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+OPERATIONS = ("chat_fast", "chat_polished", "geocode", "session")
+DEFAULT_MIX = "chat_fast=2,chat_polished=1,geocode=6,session=1"
+
+_SERVER_TIMING = re.compile(r"app;dur=([\d.]+)")
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server not ready after {timeout}s: {url}")
+
+def _stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+def server_command(server: str, workers: int, threads: int, port: int) -> List[str]:
+    address = f"127.0.0.1:{port}"
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--threads", str(threads),
+                "--bind", address, "--log-level", "warning", "app:app"]
+    if server == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "asgi:app", "--workers", str(workers), "--host", "127.0.0.1",
+                "--port", str(port), "--log-level", "warning"]
+    # Werkzeug's threaded server: one process, one thread per connection.
+    return [sys.executable, "-c",
+            f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True, debug=False)"]
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+class VirtualUser(threading.Thread):
+    """Closed-loop user: one keep-alive connection and session, issuing requests back to back."""
+
+    def __init__(self, base_url: str, mix: Dict[str, float], stop_at: float, user_id: int, unique_geocode_ratio: float,
+                 records: List[Tuple], lock: threading.Lock):
+        super().__init__(name=f"user-{user_id}", daemon=True)
+        self.base_url = base_url
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.stop_at = stop_at
+        self.user_id = user_id
+        self.unique_geocode_ratio = unique_geocode_ratio
+        self.records = records
+        self.lock = lock
+        self.random = random.Random(user_id)
+        self.http = requests.Session()
+
+    def _request(self, operation: str, sequence: int) -> requests.Response:
+        if operation == "session":
+            # A new visitor: no cookies, so a fresh session file is written.
+            return requests.post(f"{self.base_url}/api/session", timeout=60)
+        if operation == "geocode":
+            if self.random.random() < self.unique_geocode_ratio:
+                name = f"Loadtest Place {self.user_id}-{sequence}"
+            else:
+                name = f"Loadtest City {self.random.randrange(50)}"
+            return self.http.get(f"{self.base_url}/api/geocode", params={"location": name}, timeout=60)
+        lat, lon = self.random.uniform(-60, 60), self.random.uniform(-170, 170)
+        return self.http.post(f"{self.base_url}/api/chat", timeout=120, json={
+            "message": "What is the weather and history here?",
+            "model": "gpt-4o",
+            "response_mode": "fast" if operation == "chat_fast" else "polished",
+            "coordinates": {"coordinates": {"coordinates": [lat, lon]}, "zoom": 12},
+        })
+
+    def run(self) -> None:
+        try:
+            self.http.post(f"{self.base_url}/api/session", timeout=60).raise_for_status()
+        except requests.RequestException as e:
+            with self.lock:
+                self.records.append(("session", "error", 0.0, None, time.monotonic()))
+            return
+        sequence = 0
+        while time.monotonic() < self.stop_at:
+            operation = self.random.choices(self.operations, self.weights)[0]
+            started = time.monotonic()
+            try:
+                response = self._request(operation, sequence)
+                latency = time.monotonic() - started
+                match = _SERVER_TIMING.search(response.headers.get("Server-Timing", ""))
+                app_time = float(match.group(1)) / 1000 if match else None
+                status = response.status_code
+            except requests.RequestException:
+                latency, app_time, status = time.monotonic() - started, None, "error"
+            with self.lock:
+                self.records.append((operation, status, latency, app_time, time.monotonic()))
+            sequence += 1
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2), "p99_ms": round(float(p99), 2)}
+
+def summarize(records: List[Tuple], duration: float) -> Dict[str, Any]:
+    """Aggregate (operation, status, latency, app_time, finished) records of one concurrency level."""
+    total = len(records)
+    ok = [r for r in records if isinstance(r[1], int) and r[1] < 400]
+    limited = sum(1 for r in records if r[1] == 429)
+    failed = total - len(ok) - limited
+    queueing = [max(0.0, r[2] - r[3]) for r in ok if r[3] is not None]
+    by_operation = {}
+    for operation in sorted({r[0] for r in records}):
+        rows = [r for r in records if r[0] == operation]
+        rows_ok = [r for r in rows if isinstance(r[1], int) and r[1] < 400]
+        by_operation[operation] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows_ok) / duration, 2),
+            "error_rate": round(1 - len(rows_ok) / len(rows), 4) if rows else 0.0,
+            **_percentiles([r[2] for r in rows_ok]),
+        }
+    return {
+        "requests": total,
+        "throughput_rps": round(len(ok) / duration, 2),
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "rate_limited_rate": round(limited / total, 4) if total else 0.0,
+        **_percentiles([r[2] for r in ok]),
+        "queueing_mean_ms": round(float(np.mean(queueing)) * 1000, 2) if queueing else None,
+        "queueing_p95_ms": round(float(np.percentile(queueing, 95)) * 1000, 2) if queueing else None,
+        "operations": by_operation,
+    }
+
+def run_level(base_url: str, mix: Dict[str, float], concurrency: int, duration: float, warmup: float,
+              unique_geocode_ratio: float) -> Dict[str, Any]:
+    records: List[Tuple] = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+    users = [VirtualUser(base_url, mix, stop_at, index, unique_geocode_ratio, records, lock) for index in range(concurrency)]
+    for user in users:
+        user.start()
+    for user in users:
+        user.join(timeout=duration + warmup + 180)
+    measured = [r for r in records if r[4] >= measure_from]
+    return {"concurrency": concurrency, **summarize(measured, duration)}
+
+def find_saturation(levels: List[Dict[str, Any]], min_gain: float) -> Dict[str, Any]:
+    """The first level whose throughput grows less than min_gain over the previous one."""
+    best = max(levels, key=lambda level: level["throughput_rps"])
+    knee = levels[-1]
+    for previous, level in zip(levels, levels[1:]):
+        if previous["throughput_rps"] and level["throughput_rps"] < previous["throughput_rps"] * (1 + min_gain):
+            knee = previous
+            break
+    return {"max_throughput_rps": best["throughput_rps"], "at_concurrency": best["concurrency"],
+            "knee_concurrency": knee["concurrency"], "knee_p95_ms": knee["p95_ms"]}
+
+def run_configuration(args, stub_url: str, workers: int, threads: int) -> Dict[str, Any]:
+    port = _free_port()
+    env = {**os.environ, **stub_env(stub_url)}
+    env.setdefault("SECRET_KEY", "loadtest")
+    env["SESSION_BACKEND"] = args.session_backend
+    if args.rate_limit != "app":
+        env["RATELIMIT_DEFAULTS"] = args.rate_limit
+        env["RATELIMIT_ROUTE_LIMITS"] = "false"
+    process = subprocess.Popen(server_command(args.server, workers, threads, port), cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(f"{base_url}/api/ping", process)
+        levels = []
+        for concurrency in args.concurrency:
+            print(f"  {args.server} workers={workers} threads={threads} concurrency={concurrency} ...", file=sys.stderr)
+            levels.append(run_level(base_url, args.mix, concurrency, args.duration, args.warmup, args.unique_geocode_ratio))
+    finally:
+        _stop(process)
+    return {"server": args.server, "workers": workers, "threads": threads, "levels": levels,
+            "saturation": find_saturation(levels, args.saturation_gain)}
+
+def _int_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(",") if value]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API across server worker configurations.")
+    parser.add_argument("--server", choices=("gunicorn", "werkzeug", "uvicorn"), default="gunicorn")
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="Comma-separated worker process counts.")
+    parser.add_argument("--threads", type=_int_list, default=[4], help="Comma-separated threads per worker (gunicorn).")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16, 64], help="Comma-separated virtual user counts.")
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per concurrency level.")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds at the start of each level.")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Operation weights (default {DEFAULT_MIX}).")
+    parser.add_argument("--unique-geocode-ratio", type=float, default=0.5, help="Share of geocode requests for never-seen names.")
+    parser.add_argument("--session-backend", choices=SESSION_BACKENDS, default="sqlite",
+                        help="SESSION_BACKEND for the server (default sqlite, the app's default).")
+    parser.add_argument("--rate-limit", default="1000000 per hour", help="RATELIMIT_DEFAULTS for the server, or 'app' for the app's own.")
+    parser.add_argument("--saturation-gain", type=float, default=0.10)
+    parser.add_argument("--output", help="Result file (default benchmarks/results/loadtest-<timestamp>.json).")
+    parser.add_argument("--verbose", action="store_true", help="Show the server's stderr.")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configurations = [(w, t) for w in args.workers for t in (args.threads if args.server == "gunicorn" else [1])]
+    if args.server == "werkzeug":
+        configurations = [(1, 1)]
+
+    stub_port = _free_port()
+    stub_args = []
+    for flag, values in (("--latency", args.latency), ("--jitter", args.jitter), ("--error-rate", args.error_rate)):
+        for value in values or []:
+            stub_args += [flag, value]
+    stubs = subprocess.Popen([sys.executable, "-m", "benchmarks.stubs", "--port", str(stub_port), *stub_args],
+                             cwd=BACKEND_DIR, stdout=subprocess.DEVNULL)
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    try:
+        _wait_ready(f"{stub_url}/", stubs)
+        runs = [run_configuration(args, stub_url, workers, threads) for workers, threads in configurations]
+    finally:
+        _stop(stubs)
+
+    report = {
+        "meta": {"timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"), "server": args.server,
+                 "mix": args.mix, "duration_s": args.duration, "rate_limit": args.rate_limit,
+                 "session_backend": args.session_backend, "stub_args": stub_args},
+        "runs": runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, "loadtest-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'config':<22} {'users':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'queue ms':>9} {'err %':>6} {'429 %':>6}")
+    for run in runs:
+        label = f"{run['server']} w={run['workers']} t={run['threads']}"
+        for level in run["levels"]:
+            cells = [level[key] for key in ("p50_ms", "p95_ms", "queueing_mean_ms")]
+            cells = [f"{value:>9.1f}" if value is not None else f"{'-':>9}" for value in cells]
+            print(f"{label:<22} {level['concurrency']:>5} {level['throughput_rps']:>8.1f} {' '.join(cells)} "
+                  f"{level['error_rate'] * 100:>6.1f} {level['rate_limited_rate'] * 100:>6.1f}")
+        saturation = run["saturation"]
+        print(f"{label:<22} saturates at ~{saturation['max_throughput_rps']} req/s "
+              f"(knee at {saturation['knee_concurrency']} users, p95 {saturation['knee_p95_ms']} ms)")
+    print(f"results written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
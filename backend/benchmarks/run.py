@@ -0,0 +1,297 @@
+"""
+Offline benchmark suite for the backend.
+
+Starts the upstream stubs (benchmarks/stubs.py), points the backend at them and drives the
+agents, generate_llm_response and the Flask routes, reporting per scenario p50/p95/p99
+latency, throughput, memory allocated per operation (tracemalloc) and upstream calls per
+operation. Run from the backend directory:
+
+    python -m benchmarks.run                                  # all scenarios
+    python -m benchmarks.run -s agent.climate_impact -n 200 -c 16 --latency open-meteo=40
+    python -m benchmarks.run --cache warm --output benchmarks/results/warm.json
+    python -m benchmarks.run --baseline benchmarks/results/baseline.json
+
+With --cache cold (the default) every operation uses a distinct point or place name, so
+caches miss and the upstream path is measured; --cache warm reuses a handful of inputs.
+Scenarios share the process-wide answer cache and use the same inputs, so cold chat scenarios
+bypass it; otherwise route.chat would replay the answers cached by llm.generate.fast.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks import compare as compare_results
+from benchmarks.stubs import StubServer, add_stub_arguments, config_from_args
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+WARM_POINTS = [(48.8566, 2.3522), (33.6844, 73.0479), (40.7128, -74.0060), (35.6762, 139.6503), (-33.8688, 151.2093)]
+
+@dataclass
+class Scenario:
+    name: str
+    run: Callable[["Context", int], Any]
+    description: str
+
+class Context:
+    """Per-run state shared by the scenarios: input generation and per-thread Flask clients."""
+
+    def __init__(self, cold: bool):
+        self.cold = cold
+        self._local = threading.local()
+
+    def point(self, i: int):
+        if not self.cold:
+            return WARM_POINTS[i % len(WARM_POINTS)]
+        # Distinct points ~0.5 degrees apart, so every operation lands in a new cache cell.
+        return (round(-60 + (i * 0.5) % 120, 4), round(-170 + (i * 0.5 // 120) * 0.5 % 340, 4))
+
+    def coordinates(self, i: int) -> str:
+        return "{},{}".format(*self.point(i))
+
+    def place(self, i: int) -> str:
+        return f"Benchmark Town {i}" if self.cold else f"Benchmark Town {i % len(WARM_POINTS)}"
+
+    def chat_payload(self, i: int, mode: str) -> Dict[str, Any]:
+        lat, lon = self.point(i)
+        return {"message": "What is the weather and history here?", "model": "gpt-4o", "response_mode": mode,
+                "coordinates": {"coordinates": {"coordinates": [lat, lon]}, "zoom": 12}, "bypass_cache": self.cold}
+
+    def client(self):
+        """A Flask test client with an initialized session, one per worker thread."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from app import app
+            client = app.test_client()
+            response = client.post("/api/session")
+            if response.status_code != 200:
+                raise RuntimeError(f"Session creation failed: {response.status_code}")
+            self._local.client = client
+        return client
+
+def _check(response, expected: int = 200):
+    if response.status_code != expected:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+def _chat(ctx: Context, i: int, mode: str) -> Dict[str, Any]:
+    from services.llmService import generate_llm_response
+    lat, lon = ctx.point(i)
+    response = generate_llm_response("What is the weather and history here?",
+                                     coordinates={"coordinates": {"coordinates": [lat, lon]}, "zoom": 12},
+                                     model="gpt-4o", response_mode=mode, use_cache=not ctx.cold)
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
+
+def _agent(method_name: str):
+    def run(ctx: Context, i: int):
+        from services import llmService
+        agent, method = method_name.split(".")
+        response = getattr(getattr(llmService, agent), method)("", ctx.coordinates(i))
+        if "error" in response.get("metadata", {}):
+            raise RuntimeError(response["metadata"]["error"])
+        return response
+    return run
+
+def _reverse_geocode(ctx: Context, i: int):
+    from utils.geoUtils import reverse_geocode
+    return reverse_geocode(*ctx.point(i))
+
+def _weather_grid(ctx: Context, i: int):
+    lat, lon = ctx.point(i)
+    viewport = {"south": lat - 1, "north": lat + 1, "west": lon - 1.5, "east": lon + 1.5, "zoom": 8}
+    return _check(ctx.client().get("/api/weather/grid", query_string=viewport))
+
+def _stream(ctx: Context, i: int):
+    body = _check(ctx.client().post("/api/chat/stream", json=ctx.chat_payload(i, "fast"))).get_data(as_text=True)
+    if "event: done" not in body:
+        raise RuntimeError("stream ended without a done event")
+
+SCENARIOS = [
+    Scenario("geo.reverse_geocode", _reverse_geocode, "utils.geoUtils.reverse_geocode"),
+    Scenario("agent.geo_explorer", _agent("geo_explorer.get_location_info"), "GeoExplorerAgent.get_location_info"),
+    Scenario("agent.climate_impact", _agent("climate_impact.get_weather_info"), "ClimateImpactAgent.get_weather_info"),
+    Scenario("agent.info_agent", _agent("info_agent.get_info"), "InfoAgent.get_info"),
+    Scenario("llm.generate.fast", lambda ctx, i: _chat(ctx, i, "fast"), "generate_llm_response, fast mode"),
+    Scenario("llm.generate.polished", lambda ctx, i: _chat(ctx, i, "polished"), "generate_llm_response, polished mode"),
+    Scenario("route.geocode", lambda ctx, i: _check(ctx.client().get("/api/geocode", query_string={"location": ctx.place(i)})),
+             "GET /api/geocode"),
+    Scenario("route.chat", lambda ctx, i: _check(ctx.client().post("/api/chat", json=ctx.chat_payload(i, "fast"))),
+             "POST /api/chat, fast mode"),
+    Scenario("route.chat_stream", _stream, "POST /api/chat/stream, fast mode"),
+    Scenario("route.weather_grid", _weather_grid, "GET /api/weather/grid, 2 x 3 degree viewport at zoom 8"),
+]
+
+def percentiles(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "mean_ms": round(float(values.mean()), 3)}
+
+def measure_allocations(scenario: Scenario, ctx: Context, iterations: int, offset: int) -> Dict[str, float]:
+    """Serial pass under tracemalloc: peak and retained memory per operation, in KiB."""
+    if iterations <= 0:
+        return {"alloc_peak_kib": None, "alloc_retained_kib": None}
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(offset, offset + iterations):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                scenario.run(ctx, i)
+            except Exception:
+                pass
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_kib": round(float(np.mean(peaks)) / 1024, 2),
+            "alloc_retained_kib": round(float(np.mean(retained)) / 1024, 2)}
+
+def run_scenario(scenario: Scenario, ctx: Context, stubs: StubServer, iterations: int, concurrency: int,
+                 warmup: int, alloc_iterations: int) -> Dict[str, Any]:
+    # Offsets keep the warmup, timed and allocation passes on distinct inputs in cold mode.
+    for i in range(warmup):
+        try:
+            scenario.run(ctx, 1_000_000 + i)
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(i: int) -> None:
+        started = time.perf_counter()
+        try:
+            scenario.run(ctx, i)
+        except Exception as e:
+            with lock:
+                key = type(e).__name__
+                errors[key] = errors.get(key, 0) + 1
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    stubs.reset_counts()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+        list(pool.map(one, range(iterations)))
+    wall = time.perf_counter() - started
+    upstream = stubs.counts()
+
+    result = {
+        "description": scenario.description,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else None,
+        "errors": sum(errors.values()),
+        "error_types": errors,
+        **percentiles(latencies),
+        "upstream_calls_per_op": {name: round(counters["requests"] / iterations, 3) for name, counters in upstream.items()},
+    }
+    result.update(measure_allocations(scenario, ctx, alloc_iterations, 2_000_000))
+    return result
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _prepare_backend(stubs: StubServer) -> None:
+    """Point the backend at the stubs and quiet its logging; must run before backend imports."""
+    os.environ.update(stubs.env())
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("REVERSE_GEOCODER", "nominatim")
+    os.environ.setdefault("HTTP_RETRIES", "0")
+    import app  # noqa: F401  (imports the agents and services with the stub configuration)
+    app.limiter.enabled = False  # route scenarios measure the handlers, not the rate limiter
+    logging.getLogger().setLevel(logging.WARNING)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the offline backend benchmarks against local upstream stubs.")
+    parser.add_argument("-s", "--scenario", action="append", help="Scenario name or prefix (repeatable); default all.")
+    parser.add_argument("-n", "--iterations", type=int, default=100)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--alloc-iterations", type=int, default=10, help="Serial iterations traced for allocations.")
+    parser.add_argument("--cache", choices=("cold", "warm"), default="cold")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--baseline", help="Result file to compare against; exits 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    parser.add_argument("--list", action="store_true", help="List scenarios and exit.")
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<24} {scenario.description}")
+        return 0
+    selected = [s for s in SCENARIOS if not args.scenario or any(s.name.startswith(p) for p in args.scenario)]
+    if not selected:
+        parser.error("no scenario matches " + ", ".join(args.scenario))
+
+    stub_config = config_from_args(args)
+    with StubServer(stub_config) as stubs:
+        _prepare_backend(stubs)
+        ctx = Context(cold=args.cache == "cold")
+        results = {}
+        for scenario in selected:
+            print(f"running {scenario.name} ...", file=sys.stderr)
+            results[scenario.name] = run_scenario(scenario, ctx, stubs, args.iterations, args.concurrency,
+                                                  args.warmup, args.alloc_iterations)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cache": args.cache,
+            "stubs": {name: vars(profile) for name, profile in stub_config.profiles.items()},
+        },
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'scenario':<24} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'errors':>7} {'KiB/op':>9}")
+    for name, result in results.items():
+        cells = [result[key] for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")]
+        cells = [f"{value:>9.2f}" if value is not None else f"{'-':>9}" for value in cells]
+        alloc = result["alloc_peak_kib"]
+        print(f"{name:<24} {' '.join(cells)} {result['errors']:>7} {alloc if alloc is not None else '-':>9}")
+    print(f"results written to {output}")
+
+    if args.baseline:
+        rows = compare_results.compare(compare_results.load(args.baseline), report, args.threshold)
+        print(compare_results.format_rows(rows))
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark the session backends (utils/sessionStore.py) against each other.
+
+For each backend a minimal Flask app with the same session setup as app.py creates N
+sessions (the /api/session path) and then validates them M times each (the
+initialized/session_id check of /api/chat), from several threads. Run from the backend
+directory:
+
+    python -m benchmarks.sessions                      # all backends
+    python -m benchmarks.sessions -b filesystem -b sqlite -n 2000 -c 8
+
+Reports p50/p95/p99 latency and throughput for both phases, plus the on-disk footprint.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from flask import Flask, jsonify, session
+
+from benchmarks.run import percentiles
+from config.config import Config
+from utils.sessionStore import SESSION_BACKENDS, init_session_backend
+
+def build_app(backend: str, workdir: str) -> Flask:
+    app = Flask(f"session-bench-{backend}")
+    app.config['SECRET_KEY'] = 'benchmark'
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    app.config['SESSION_FILE_DIR'] = os.path.join(workdir, 'flask_session')
+    init_session_backend(app, backend)
+
+    @app.route('/session', methods=['POST'])
+    def create():
+        session['session_id'] = os.urandom(16).hex()
+        session['initialized'] = True
+        return jsonify({'session_id': session['session_id']})
+
+    @app.route('/check', methods=['POST'])
+    def check():
+        if 'initialized' not in session:
+            return jsonify({'error': 'Invalid session'}), 401
+        return jsonify({'session_id': session['session_id']})
+
+    return app
+
+def _disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def bench_backend(backend: str, sessions: int, checks: int, concurrency: int) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix=f"session-bench-{backend}-")
+    Config.SESSION_SQLITE_PATH = os.path.join(workdir, 'sessions.sqlite3')
+    Config.SESSION_SWEEP_INTERVAL = 0
+    try:
+        app = build_app(backend, workdir)
+        local = threading.local()
+        cookies: List[str] = []
+        lock = threading.Lock()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = app.test_client(use_cookies=False)
+            return local.client
+
+        def create(_):
+            started = time.perf_counter()
+            response = client().post('/session')
+            elapsed = time.perf_counter() - started
+            cookie = response.headers.get('Set-Cookie', '').split(';', 1)[0]
+            with lock:
+                cookies.append(cookie)
+            return elapsed
+
+        def check(i):
+            cookie = cookies[i % len(cookies)]
+            started = time.perf_counter()
+            response = client().post('/check', headers={'Cookie': cookie})
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise RuntimeError(f"session check failed: {response.status_code}")
+            return elapsed
+
+        results = {}
+        for phase, fn, count in (("create", create, sessions), ("check", check, sessions * checks)):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = list(pool.map(fn, range(count)))
+            wall = time.perf_counter() - started
+            results[phase] = {"operations": count, "throughput_rps": round(count / wall, 1), **percentiles(latencies)}
+        results["disk_bytes"] = _disk_usage(workdir)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the session backends.")
+    parser.add_argument("-b", "--backend", action="append", choices=SESSION_BACKENDS)
+    parser.add_argument("-n", "--sessions", type=int, default=1000, help="Sessions created per backend.")
+    parser.add_argument("-m", "--checks", type=int, default=5, help="Session checks per created session.")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for backend in args.backend or SESSION_BACKENDS:
+        print(f"running {backend} ...", file=sys.stderr)
+        results[backend] = bench_backend(backend, args.sessions, args.checks, args.concurrency)
+
+    print(f"{'backend':<12} {'phase':<7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ops/s':>9} {'disk KiB':>9}")
+    for backend, result in results.items():
+        for phase in ("create", "check"):
+            row = result[phase]
+            print(f"{backend:<12} {phase:<7} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} "
+                  f"{row['throughput_rps']:>9.1f} {result['disk_bytes'] / 1024:>9.1f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"sessions": args.sessions, "checks": args.checks, "concurrency": args.concurrency,
+                       "backends": results}, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Local stand-ins for the upstream services used by the backend.
+
+One threaded HTTP server answers, under a path prefix per upstream:
+
+    /nominatim/search, /nominatim/reverse        Nominatim
+    /open-meteo/v1/forecast                      Open-Meteo
+    /open-meteo/v1/archive                       Open-Meteo historical archive
+    /restcountries/v3.1/name/<country>           REST Countries
+    /wikipedia/w/api.php                         MediaWiki extracts query
+    /openai/v1/chat/completions                  OpenAI chat completions (incl. tool calls and streaming)
+
+Each upstream has its own latency (mean and jitter, in ms) and error rate; errors are
+answered with 503. Point the backend at the stubs with the variables from `env()`, which
+must be set before the backend modules are imported (Config reads them at import time).
+
+Run standalone (e.g. for the load test against a separately started server) with:
+
+    python -m benchmarks.stubs --port 8900 --latency openai=400 --error-rate nominatim=0.05
+"""
+import argparse
+import datetime
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+UPSTREAMS = ("nominatim", "open-meteo", "restcountries", "wikipedia", "openai")
+
+DEFAULT_LATENCY_MS = {"nominatim": 120, "open-meteo": 80, "restcountries": 60, "wikipedia": 150, "openai": 600}
+
+@dataclass
+class UpstreamProfile:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+
+    def delay(self) -> float:
+        return max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) / 1000.0
+
+@dataclass
+class StubConfig:
+    profiles: Dict[str, UpstreamProfile] = field(default_factory=lambda: {
+        name: UpstreamProfile(latency_ms, latency_ms * 0.2) for name, latency_ms in DEFAULT_LATENCY_MS.items()})
+    tools: tuple = ("geo_explorer", "climate_impact", "info_agent")  # tool calls returned by the first completion
+
+    def profile(self, upstream: str) -> UpstreamProfile:
+        return self.profiles.setdefault(upstream, UpstreamProfile())
+
+def _fake_place(lat: float, lon: float) -> str:
+    return f"Place {lat:.2f},{lon:.2f}, Stub Region, France"
+
+def nominatim(path: str, query: Dict[str, str]) -> Any:
+    if path.endswith("/reverse"):
+        return {"display_name": _fake_place(float(query.get("lat", 0)), float(query.get("lon", 0)))}
+    text = query.get("q", "")
+    seed = sum(map(ord, text))
+    lat, lon = (seed % 1600) / 10.0 - 80, (seed * 7 % 3400) / 10.0 - 170
+    return [{"lat": str(lat), "lon": str(lon), "display_name": f"{text}, Stub Region, France"}]
+
+def open_meteo(query: Dict[str, str]) -> Any:
+    latitudes = query.get("latitude", "0").split(",")
+    longitudes = query.get("longitude", "0").split(",")
+    if len(latitudes) > 1:  # multi-location request: one forecast per location, in order
+        return [open_meteo({"latitude": lat, "longitude": lon}) for lat, lon in zip(latitudes, longitudes)]
+    return {
+        "latitude": float(latitudes[0]), "longitude": float(longitudes[0]),
+        "current": {"time": time.strftime("%Y-%m-%dT%H:00"), "temperature_2m": 21.3, "relative_humidity_2m": 54,
+                    "weather_code": 2, "wind_speed_10m": 11.2},
+        "daily": {"time": [time.strftime("%Y-%m-%d")], "temperature_2m_max": [24.1], "temperature_2m_min": [14.8],
+                  "weather_code": [2]},
+    }
+
+def open_meteo_archive(query: Dict[str, str]) -> Any:
+    """Daily series with a seasonal cycle between start_date and end_date."""
+    start = datetime.date.fromisoformat(query.get("start_date", "2020-01-01"))
+    end = datetime.date.fromisoformat(query.get("end_date", "2020-12-31"))
+    days = [start + datetime.timedelta(days=offset) for offset in range((end - start).days + 1)]
+    mean = [round(12 - 9 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 15) / 365.25), 1) for day in days]
+    return {
+        "latitude": float(query.get("latitude", 0)), "longitude": float(query.get("longitude", 0)),
+        "daily": {"time": [day.isoformat() for day in days], "temperature_2m_mean": mean,
+                  "temperature_2m_max": [round(t + 5, 1) for t in mean], "temperature_2m_min": [round(t - 5, 1) for t in mean],
+                  "precipitation_sum": [round(2.0 * (day.toordinal() % 3 == 0), 1) for day in days]},
+    }
+
+def restcountries(name: str) -> Any:
+    return [{"name": {"common": name.title(), "official": f"Republic of {name.title()}"}, "population": 67000000,
+             "capital": ["Stub City"], "languages": {"fra": "French"}, "currencies": {"EUR": {"name": "Euro", "symbol": "€"}},
+             "timezones": ["UTC+01:00"], "flags": {"png": "https://example.invalid/flag.png"}}]
+
+def wikipedia(query: Dict[str, str]) -> Any:
+    titles = [title for title in query.get("titles", "").split("|") if title]
+    extract = "Stub extract. " * 40
+    return {"batchcomplete": True, "query": {"pages": [
+        {"pageid": index + 1, "ns": 0, "title": title, "extract": f"{title}: {extract}"} for index, title in enumerate(titles)]}}
+
+_COORDINATES = re.compile(r"at coordinates \[?\s*([-\d.]+)\s*,\s*([-\d.]+)")
+
+def openai_completion(body: Dict[str, Any], tools: tuple) -> Dict[str, Any]:
+    """A completion that calls `tools` on the first turn and answers in text afterwards."""
+    messages = body.get("messages", [])
+    usage = {"prompt_tokens": sum(len(str(m.get("content") or "")) for m in messages) // 4,
+             "completion_tokens": 60}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    message: Dict[str, Any] = {"role": "assistant", "content": "Here is what I found about this place. " * 5}
+    finish_reason = "stop"
+    if body.get("tools") and tools and not any(m.get("role") == "tool" for m in messages):
+        match = _COORDINATES.search(str(messages[0].get("content", ""))) if messages else None
+        coordinates = f"{match.group(1)},{match.group(2)}" if match else "48.8566,2.3522"
+        message = {"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"call_{index}", "type": "function",
+             "function": {"name": name, "arguments": json.dumps({"location": None, "coordinates": coordinates})}}
+            for index, name in enumerate(tools)]}
+        finish_reason = "tool_calls"
+    return {"id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "gpt-4o"), "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": usage}
+
+def openai_stream(completion: Dict[str, Any]):
+    """Yield the SSE lines of a streamed completion equivalent to `completion`."""
+    base = {key: completion[key] for key in ("id", "created", "model")}
+    base["object"] = "chat.completion.chunk"
+    text = completion["choices"][0]["message"].get("content") or ""
+    for word in re.findall(r"\S+\s*", text):
+        yield {**base, "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+    yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    yield {**base, "choices": [], "usage": completion["usage"]}
+
+def stub_env(base_url: str) -> Dict[str, str]:
+    """Environment variables that point the backend at a stub server listening on base_url."""
+    return {
+        "NOMINATIM_URL": f"{base_url}/nominatim",
+        "NOMINATIM_RATE_LIMIT": "100000",  # the stub has no usage policy
+        "OPEN_METEO_URL": f"{base_url}/open-meteo",
+        "OPEN_METEO_ARCHIVE_URL": f"{base_url}/open-meteo",
+        "REST_COUNTRIES_URL": f"{base_url}/restcountries",
+        "WIKIPEDIA_API_URL": f"{base_url}/wikipedia/w/api.php",
+        "OPENAI_BASE_URL": f"{base_url}/openai/v1",
+        "OPENAI_API_KEY": "stub",
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are written separately
+    server: "StubServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _upstream(self) -> Optional[str]:
+        first = self.path.lstrip("/").split("/", 1)[0]
+        return first if first in UPSTREAMS else None
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, body: Optional[Dict[str, Any]] = None) -> None:
+        upstream = self._upstream()
+        if upstream is None:
+            self._send_json(404, {"error": "unknown upstream"})
+            return
+        self.server.count(upstream)
+        profile = self.server.config.profile(upstream)
+        time.sleep(profile.delay())
+        if profile.error_rate and random.random() < profile.error_rate:
+            self.server.count(upstream, "errors")
+            self._send_json(503, {"error": "injected failure"})
+            return
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if upstream == "nominatim":
+            self._send_json(200, nominatim(url.path, query))
+        elif upstream == "open-meteo":
+            self._send_json(200, open_meteo_archive(query) if url.path.endswith("/archive") else open_meteo(query))
+        elif upstream == "restcountries":
+            self._send_json(200, restcountries(unquote(url.path.rsplit("/", 1)[-1])))
+        elif upstream == "wikipedia":
+            self._send_json(200, wikipedia(query))
+        else:
+            completion = openai_completion(body or {}, self.server.config.tools)
+            if (body or {}).get("stream"):
+                self._send_stream(completion)
+            else:
+                self._send_json(200, completion)
+
+    def _send_stream(self, completion: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        chunks = [f"data: {json.dumps(chunk)}\n\n" for chunk in openai_stream(completion)] + ["data: [DONE]\n\n"]
+        for chunk in chunks:
+            data = chunk.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+        self._handle(body)
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server; use as a context manager to run it in a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.config = config or StubConfig()
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._counts_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that point the backend at this server."""
+        return stub_env(self.base_url)
+
+    def count(self, upstream: str, kind: str = "requests") -> None:
+        with self._counts_lock:
+            counters = self._counts.setdefault(upstream, {"requests": 0, "errors": 0})
+            counters[kind] += 1
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        with self._counts_lock:
+            return {name: dict(counters) for name, counters in self._counts.items()}
+
+    def reset_counts(self) -> None:
+        with self._counts_lock:
+            self._counts.clear()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="upstream-stubs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+def parse_assignments(values, cast=float) -> Dict[str, Any]:
+    """Parse ["openai=400", "nominatim=80"] (or "all=50") into a dict."""
+    parsed = {}
+    for value in values or []:
+        name, _, number = value.partition("=")
+        for upstream in (UPSTREAMS if name == "all" else [name]):
+            if upstream not in UPSTREAMS:
+                raise argparse.ArgumentTypeError(f"unknown upstream {upstream!r}; expected one of {', '.join(UPSTREAMS)}")
+            parsed[upstream] = cast(number)
+    return parsed
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=MS",
+                        help="Mean upstream latency in ms (repeatable; 'all=MS' sets every upstream).")
+    parser.add_argument("--jitter", action="append", metavar="UPSTREAM=MS", help="Latency standard deviation in ms.")
+    parser.add_argument("--error-rate", action="append", metavar="UPSTREAM=P", help="Fraction of requests answered with 503.")
+
+def config_from_args(args: argparse.Namespace) -> StubConfig:
+    config = StubConfig()
+    for upstream, latency in parse_assignments(args.latency).items():
+        profile = config.profile(upstream)
+        profile.latency_ms, profile.jitter_ms = latency, latency * 0.2
+    for upstream, jitter in parse_assignments(args.jitter).items():
+        config.profile(upstream).jitter_ms = jitter
+    for upstream, rate in parse_assignments(args.error_rate).items():
+        config.profile(upstream).error_rate = rate
+    return config
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serve local stand-ins for the backend's upstream APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_stub_arguments(parser)
+    args = parser.parse_args(argv)
+    server = StubServer(config_from_args(args), args.host, args.port)
+    print("Upstream stubs listening; point the backend at them with:")
+    for name, value in server.env().items():
+        print(f"  export {name}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
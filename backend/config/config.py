@@ -1,6 +1,144 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     SESSION_TYPE = 'filesystem'
-    SESSION_COOKIE_SAMESITE = 'Lax'
\ No newline at end of file
+    SESSION_COOKIE_SAMESITE = 'Lax'
+
+    # Session storage (utils/sessionStore.py): 'sqlite', 'memory', 'signed' or 'filesystem'
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'sqlite')
+    SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'sessions.sqlite3'))
+    SESSION_LIFETIME = float(os.getenv('SESSION_LIFETIME', '3600'))  # seconds, matches the session_id cookie
+    SESSION_SWEEP_INTERVAL = float(os.getenv('SESSION_SWEEP_INTERVAL', '300'))  # seconds between expiry sweeps; 0 disables
+
+    # Rate limiting (Flask-Limiter). Use a shared storage such as redis:// when running several
+    # worker processes; the default in-memory storage keeps separate limits per process.
+    RATELIMIT_DEFAULTS = [l.strip() for l in os.getenv('RATELIMIT_DEFAULTS', '200 per day;50 per hour').split(';') if l.strip()]
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'memory://')
+    RATELIMIT_ROUTE_LIMITS = os.getenv('RATELIMIT_ROUTE_LIMITS', 'true').lower() in ('1', 'true', 'yes')  # per-route limits of the map endpoints
+
+    # Tool execution
+    TOOL_EXECUTION_MODE = os.getenv('TOOL_EXECUTION_MODE', 'concurrent')  # 'concurrent' or 'serial'
+    TOOL_MAX_WORKERS = int(os.getenv('TOOL_MAX_WORKERS', '8'))
+    TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT', '15'))  # seconds, per tool call
+    TOOL_CALLS_TIMEOUT = float(os.getenv('TOOL_CALLS_TIMEOUT', '30'))  # seconds, for all tool calls of a turn
+    # Tools started speculatively for the clicked point while the first completion runs (services/prefetch.py)
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PREFETCH_TOOLS = [tool.strip() for tool in os.getenv('PREFETCH_TOOLS', 'climate_impact,geo_explorer').split(',') if tool.strip()]
+    PREFETCH_MAX_WORKERS = int(os.getenv('PREFETCH_MAX_WORKERS', '2'))  # own pool; prefetches are skipped while it is busy
+
+    # Shared HTTP transport (utils/httpClient.py)
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '20'))  # number of per-host pools kept
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))  # keep-alive connections per host
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+    HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', '2'))
+    HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.3'))
+    HTTP_BACKOFF_JITTER = float(os.getenv('HTTP_BACKOFF_JITTER', '0.2'))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '5'))  # longest wait between attempts, also caps Retry-After
+    HTTP_USER_AGENT = os.getenv('HTTP_USER_AGENT', 'Geospatial-AI-App')
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '200'))  # async transport, per event loop across hosts
+
+    # Upstream base URLs (override for self-hosted services or the benchmark stubs in benchmarks/)
+    NOMINATIM_URL = os.getenv('NOMINATIM_URL', 'https://nominatim.openstreetmap.org').rstrip('/')
+    OPEN_METEO_URL = os.getenv('OPEN_METEO_URL', 'https://api.open-meteo.com').rstrip('/')
+    OPEN_METEO_ARCHIVE_URL = os.getenv('OPEN_METEO_ARCHIVE_URL', 'https://archive-api.open-meteo.com').rstrip('/')
+    REST_COUNTRIES_URL = os.getenv('REST_COUNTRIES_URL', 'https://restcountries.com').rstrip('/')
+    WIKIPEDIA_API_URL = os.getenv('WIKIPEDIA_API_URL', 'https://en.wikipedia.org/w/api.php')
+
+    # Geocode / reverse-geocode cache (utils/geoUtils.py)
+    GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', '10000'))
+    GEOCODE_CACHE_TTL = float(os.getenv('GEOCODE_CACHE_TTL', str(7 * 24 * 3600)))
+    GEOCODE_CACHE_PRECISION = int(os.getenv('GEOCODE_CACHE_PRECISION', '7'))  # geohash chars, 7 ~ 150 m cells
+    GEOCODE_CACHE_DB = os.getenv('GEOCODE_CACHE_DB', '')  # SQLite path; empty keeps the cache in memory only
+
+    # Nominatim rate limit (utils/geoUtils.py) and batch geocoding (services/geocodingService.py)
+    NOMINATIM_RATE_LIMIT = float(os.getenv('NOMINATIM_RATE_LIMIT', '1'))  # requests per second, per the Nominatim usage policy
+    NOMINATIM_MAX_WAIT = float(os.getenv('NOMINATIM_MAX_WAIT', '5'))  # seconds a lookup waits for its turn before failing
+    GEOCODE_BATCH_MAX_ITEMS = int(os.getenv('GEOCODE_BATCH_MAX_ITEMS', '5000'))
+    GEOCODE_BATCH_MAX_LOOKUPS = int(os.getenv('GEOCODE_BATCH_MAX_LOOKUPS', '20'))  # Nominatim lookups per request (~1 s each)
+
+    # Reverse geocoding backend (utils/offlineGeocoder.py)
+    REVERSE_GEOCODER = os.getenv('REVERSE_GEOCODER', 'nominatim')  # 'nominatim' or 'offline'
+    GAZETTEER_PATH = os.getenv('GAZETTEER_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'gazetteer.npz'))
+    OFFLINE_GEOCODER_MAX_DISTANCE_KM = float(os.getenv('OFFLINE_GEOCODER_MAX_DISTANCE_KM', '25'))
+
+    # Local country metadata (utils/countryIndex.py)
+    COUNTRY_INDEX_PATH = os.getenv('COUNTRY_INDEX_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'countries.json'))
+
+    # Nearby places (utils/poiIndex.py, agents/nearbyAgent.py)
+    POI_INDEX_PATH = os.getenv('POI_INDEX_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'pois.npz'))
+    POI_GRID_CELL_DEGREES = float(os.getenv('POI_GRID_CELL_DEGREES', '0.02'))  # used when building an index
+    NEARBY_DEFAULT_RADIUS_KM = float(os.getenv('NEARBY_DEFAULT_RADIUS_KM', '1'))
+    NEARBY_MAX_RADIUS_KM = float(os.getenv('NEARBY_MAX_RADIUS_KM', '50'))
+    NEARBY_DEFAULT_LIMIT = int(os.getenv('NEARBY_DEFAULT_LIMIT', '10'))
+    NEARBY_MAX_RESULTS = int(os.getenv('NEARBY_MAX_RESULTS', '100'))
+
+    # InfoAgent (agents/infoAgent.py)
+    INFO_AGENT_ASPECTS = [a.strip() for a in os.getenv('INFO_AGENT_ASPECTS', 'History,Culture,Cuisine').split(',') if a.strip()]
+    WIKI_INDEX_PATH = os.getenv('WIKI_INDEX_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'wiki.sqlite3'))
+    WIKI_INDEX_MIN_SCORE = float(os.getenv('WIKI_INDEX_MIN_SCORE', '0.75'))  # title similarity needed for a fuzzy match
+    WIKI_LIVE_FALLBACK = os.getenv('WIKI_LIVE_FALLBACK', 'true').lower() in ('1', 'true', 'yes')  # query Wikipedia for aspects the index misses
+
+    # Weather cache (agents/climateImpactAgent.py)
+    WEATHER_CACHE_RESOLUTION = float(os.getenv('WEATHER_CACHE_RESOLUTION', '0.05'))  # grid cell size in degrees
+    WEATHER_CACHE_SIZE = int(os.getenv('WEATHER_CACHE_SIZE', '5000'))
+    WEATHER_CACHE_MAX_STALE = float(os.getenv('WEATHER_CACHE_MAX_STALE', str(3 * 3600)))  # seconds a stale forecast may be served
+
+    # Viewport weather grids (services/weatherGrid.py)
+    WEATHER_GRID_ROWS = int(os.getenv('WEATHER_GRID_ROWS', '8'))
+    WEATHER_GRID_COLS = int(os.getenv('WEATHER_GRID_COLS', '12'))
+    WEATHER_GRID_MAX_POINTS = int(os.getenv('WEATHER_GRID_MAX_POINTS', '400'))  # per request; also bounds the Open-Meteo URL
+    WEATHER_GRID_POINTS_PER_TILE = float(os.getenv('WEATHER_GRID_POINTS_PER_TILE', '4'))  # finest sampling per map tile width
+
+    # Tile-keyed location/weather cache with neighbour prefetch (utils/tileCache.py). Tiles are only
+    # loaded with REVERSE_GEOCODER=offline; with Nominatim each tile would cost a rate-limited lookup.
+    TILE_CACHE_ENABLED = os.getenv('TILE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    TILE_CACHE_MIN_ZOOM = int(os.getenv('TILE_CACHE_MIN_ZOOM', '13'))  # ~5 km tiles; lower map zooms use this level
+    TILE_CACHE_MAX_ZOOM = int(os.getenv('TILE_CACHE_MAX_ZOOM', '16'))  # ~600 m tiles
+    TILE_CACHE_SIZE = int(os.getenv('TILE_CACHE_SIZE', '20000'))
+    TILE_CACHE_MAX_BYTES = int(os.getenv('TILE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+    TILE_CACHE_TTL = float(os.getenv('TILE_CACHE_TTL', str(6 * 3600)))  # weather in an entry is only used within its forecast hour
+    TILE_PREFETCH_DEPTH = int(os.getenv('TILE_PREFETCH_DEPTH', '1'))  # rings of neighbours; 1 = 8 tiles, 2 = 24
+    TILE_PREFETCH_WORKERS = int(os.getenv('TILE_PREFETCH_WORKERS', '2'))
+    TILE_PREFETCH_MAX_PENDING = int(os.getenv('TILE_PREFETCH_MAX_PENDING', '64'))  # queued tiles; further prefetches are dropped
+
+    # Historical climate store (utils/climateStore.py)
+    CLIMATE_STORE_PATH = os.getenv('CLIMATE_STORE_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'climate'))
+    CLIMATE_CELL_DEGREES = float(os.getenv('CLIMATE_CELL_DEGREES', '0.25'))
+    CLIMATE_NORMALS_PERIOD = tuple(int(year) for year in os.getenv('CLIMATE_NORMALS_PERIOD', '1991-2020').split('-'))
+    CLIMATE_MIN_COVERAGE = float(os.getenv('CLIMATE_MIN_COVERAGE', '0.8'))  # share of days a month or year needs to be aggregated
+    CLIMATE_INGEST_ON_MISS = os.getenv('CLIMATE_INGEST_ON_MISS', 'true').lower() in ('1', 'true', 'yes')  # one archive pull per new cell
+    CLIMATE_INGEST_START = os.getenv('CLIMATE_INGEST_START', '1991-01-01')
+
+    # Chat responses (services/llmService.py)
+    DEFAULT_RESPONSE_MODE = os.getenv('DEFAULT_RESPONSE_MODE', 'polished')  # 'polished' or 'fast'
+
+    # Local intent router (services/intentRouter.py)
+    INTENT_ROUTER_ENABLED = os.getenv('INTENT_ROUTER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    INTENT_ROUTER_MIN_CONFIDENCE = float(os.getenv('INTENT_ROUTER_MIN_CONFIDENCE', '0.75'))
+    INTENT_ROUTER_LOG_EVERY = int(os.getenv('INTENT_ROUTER_LOG_EVERY', '100'))  # log the hit rate every N requests; 0 disables
+
+    # Answer cache (services/answerCache.py)
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '10000'))
+    ANSWER_CACHE_MAX_BYTES = int(os.getenv('ANSWER_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+    ANSWER_CACHE_PRECISION = int(os.getenv('ANSWER_CACHE_PRECISION', '6'))  # geohash chars, 6 ~ 1.2 km cells
+    ANSWER_CACHE_ZOOM_BUCKET = int(os.getenv('ANSWER_CACHE_ZOOM_BUCKET', '3'))  # zoom levels per bucket
+    ANSWER_CACHE_TTL_WEATHER = float(os.getenv('ANSWER_CACHE_TTL_WEATHER', '900'))  # answers that used climate_impact
+    ANSWER_CACHE_TTL_GEO = float(os.getenv('ANSWER_CACHE_TTL_GEO', str(7 * 24 * 3600)))  # answers that used geo_explorer
+    ANSWER_CACHE_TTL_INFO = float(os.getenv('ANSWER_CACHE_TTL_INFO', str(7 * 24 * 3600)))  # answers that used info_agent
+    ANSWER_CACHE_TTL_DEFAULT = float(os.getenv('ANSWER_CACHE_TTL_DEFAULT', str(24 * 3600)))  # answers without tool calls
+
+    # Prompt token budget for tool results (services/tokenBudget.py), in tokens per tool message
+    TOKEN_BUDGET_ENABLED = os.getenv('TOKEN_BUDGET_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    TOKEN_BUDGET_GEO = int(os.getenv('TOKEN_BUDGET_GEO', '200'))
+    TOKEN_BUDGET_WEATHER = int(os.getenv('TOKEN_BUDGET_WEATHER', '150'))
+    TOKEN_BUDGET_INFO = int(os.getenv('TOKEN_BUDGET_INFO', '600'))
+    TOKEN_BUDGET_DEFAULT = int(os.getenv('TOKEN_BUDGET_DEFAULT', '400'))  # tools without their own budget
+
+    # Async serving path (asgi.py)
+    ASYNC_MAX_INFLIGHT_CHATS = int(os.getenv('ASYNC_MAX_INFLIGHT_CHATS', '500'))
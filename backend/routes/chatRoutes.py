@@ -1,6 +1,10 @@
-from flask import Blueprint, jsonify, request, session, make_response
-from services.llmService import generate_llm_response
+from flask import Blueprint, jsonify, request, session, make_response, Response, stream_with_context
+from services.llmService import generate_llm_response, RESPONSE_MODES
+from utils.responseUtils import format_sse, sse_comment
+import contextvars
 import logging
+import queue
+import threading
 import uuid
 import os
 
@@ -8,6 +12,22 @@ logger = logging.getLogger(__name__)
 
 chat_bp = Blueprint('chat', __name__)
 
+SSE_HEARTBEAT_INTERVAL = 15  # seconds between keep-alive comments while the pipeline is busy
+
+def parse_bypass_cache(data) -> bool:
+    """
+    The request's bypass_cache flag: a JSON boolean, 0/1, or "true"/"false" ("1"/"0", "yes"/"no").
+    Raises ValueError for anything else, so a string like "false" is never taken as truthy.
+    """
+    value = data.get('bypass_cache', False)
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('true', '1', 'yes', 'false', '0', 'no', ''):
+        return value.strip().lower() in ('true', '1', 'yes')
+    raise ValueError('bypass_cache must be a boolean')
+
 @chat_bp.route('/chat', methods=['POST'])
 def handle_chat():
     # Session validation
@@ -21,6 +41,13 @@ def handle_chat():
     if not data or 'message' not in data:
         logger.warning("Invalid request format")
         return jsonify({'error': 'Message is required'}), 400
+    response_mode = data.get('response_mode')
+    if response_mode is not None and response_mode not in RESPONSE_MODES:
+        return jsonify({'error': f"response_mode must be one of: {', '.join(RESPONSE_MODES)}"}), 400
+    try:
+        bypass_cache = parse_bypass_cache(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     try:
         logger.info(f"Chat request - Session: {session['session_id']}, Model: {data.get('model')}")
@@ -35,7 +62,9 @@ def handle_chat():
         response = generate_llm_response(
             message=message,
             model=model,
-            coordinates=coordinates
+            coordinates=coordinates,
+            response_mode=response_mode,
+            use_cache=not bypass_cache
         )
         
         # Handle tool responses
@@ -49,6 +78,75 @@ def handle_chat():
         logger.error(f"Chat processing failed: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
+@chat_bp.route('/chat/stream', methods=['POST'])
+def handle_chat_stream():
+    """
+    Streaming variant of /chat over Server-Sent Events.
+
+    Emits "location_resolved", "tool_started" and "tool_finished" progress events, then the
+    answer as "token" events while the model produces it, and finally a "done" event carrying
+    the full text, tool_usage, analysis and tool_timings (or an "error" event).
+    """
+    if 'initialized' not in session:
+        logger.warning("Unauthorized chat attempt")
+        return jsonify({'error': 'Invalid session'}), 401
+
+    data = request.get_json()
+    if not data or 'message' not in data:
+        logger.warning("Invalid request format")
+        return jsonify({'error': 'Message is required'}), 400
+    response_mode = data.get('response_mode')
+    if response_mode is not None and response_mode not in RESPONSE_MODES:
+        return jsonify({'error': f"response_mode must be one of: {', '.join(RESPONSE_MODES)}"}), 400
+    try:
+        bypass_cache = parse_bypass_cache(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    logger.info(f"Streaming chat request - Session: {session['session_id']}, Model: {data.get('model')}")
+    model = data.get('model', 'gpt-4')
+    coordinates = data.get('coordinates', {})
+    message = data['message']
+    events = queue.Queue()
+
+    def run_pipeline():
+        try:
+            response = generate_llm_response(
+                message=message,
+                model=model,
+                coordinates=coordinates,
+                response_mode=response_mode,
+                use_cache=not bypass_cache,
+                on_event=lambda event, payload: events.put((event, payload))
+            )
+            if isinstance(response, dict) and 'error' in response:
+                logger.error(f"LLM Error: {response['error']}")
+                events.put(('error', response))
+            else:
+                events.put(('done', response))
+        except Exception as e:
+            logger.error(f"Chat processing failed: {str(e)}", exc_info=True)
+            events.put(('error', {'error': 'Internal server error'}))
+        finally:
+            events.put(None)
+
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(run_pipeline,), name="chat-stream", daemon=True).start()
+
+    def stream():
+        while True:
+            try:
+                item = events.get(timeout=SSE_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield sse_comment()
+                continue
+            if item is None:
+                break
+            yield format_sse(*item)
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @chat_bp.route('/session', methods=['POST'])
 def create_session():
     try:
@@ -1,7 +1,13 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, Response
+from utils.metrics import REGISTRY
 
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/ping', methods=['GET'])
 def ping():
-    return jsonify({'status': 'ok'})
\ No newline at end of file
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Aggregated counters and histograms in the Prometheus text exposition format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
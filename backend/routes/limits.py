@@ -0,0 +1,16 @@
+"""
+The Flask-Limiter instance shared by the app and the route blueprints. app.py binds it with
+init_app(), so the per-route limits declared with route_limit() and the default limits
+(Config.RATELIMIT_DEFAULTS) are counted in the same storage.
+"""
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+from config.config import Config
+
+limiter = Limiter(key_func=get_remote_address, default_limits=Config.RATELIMIT_DEFAULTS,
+                  storage_uri=Config.RATELIMIT_STORAGE_URI)
+
+def route_limit(value: str):
+    """A per-route limit, replacing the defaults on that route; skipped when Config.RATELIMIT_ROUTE_LIMITS is off."""
+    return limiter.limit(value, exempt_when=lambda: not Config.RATELIMIT_ROUTE_LIMITS)
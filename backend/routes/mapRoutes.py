@@ -1,13 +1,17 @@
-from flask import Blueprint, jsonify, request
-from services.geocodingService import geocode_location
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+from services.geocodingService import geocode_location, geocode_batch
+from services.llmService import climate_impact
+from services.weatherGrid import weather_grid
+from utils.poiIndex import get_poi_index
+from config.config import Config
+import json
+import time
+from routes.limits import route_limit
 
 map_bp = Blueprint('map', __name__)
-limiter = Limiter(app=None, key_func=get_remote_address)
 
 @map_bp.route('/geocode', methods=['GET'])
-@limiter.limit('10 per minute')
+@route_limit('10 per minute')
 def geocode():
     location = request.args.get('location')
     if not location:
@@ -19,4 +23,111 @@ def geocode():
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Geocoding failed: {str(e)}'}), 500
\ No newline at end of file
+        return jsonify({'error': f'Geocoding failed: {str(e)}'}), 500
+
+@map_bp.route('/geocode/batch', methods=['POST'])
+@route_limit('5 per minute')
+def geocode_batch_route():
+    """
+    Geocode a list of locations, streaming one JSON object per line (NDJSON) as results
+    become available. Body: {"locations": ["Paris", "48.85,2.35", ...]}.
+    """
+    data = request.get_json(silent=True)
+    locations = data.get('locations') if isinstance(data, dict) else None
+    if not isinstance(locations, list) or not all(isinstance(location, str) for location in locations):
+        return jsonify({'error': 'locations must be a list of strings'}), 400
+    if len(locations) > Config.GEOCODE_BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {Config.GEOCODE_BATCH_MAX_ITEMS} locations per batch'}), 400
+
+    def stream():
+        for item in geocode_batch(locations):
+            yield json.dumps(item) + '\n'
+
+    return Response(stream_with_context(stream()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@map_bp.route('/nearby', methods=['GET'])
+@route_limit('60 per minute')
+def nearby():
+    """
+    Points of interest near a point from the local POI index, nearest first.
+    Query: lat, lon, and optionally radius_km, k (result limit) and category (comma-separated).
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        radius_km = request.args.get('radius_km', type=float)
+        k = request.args.get('k', type=int)
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lon are required numbers'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'lat or lon out of range'}), 400
+    if (radius_km is not None and radius_km <= 0) or (k is not None and k <= 0):
+        return jsonify({'error': 'radius_km and k must be positive'}), 400
+    if radius_km is None and k is None:
+        radius_km = Config.NEARBY_DEFAULT_RADIUS_KM
+    categories = [c.strip() for c in request.args.get('category', '').split(',') if c.strip()]
+
+    index = get_poi_index()
+    if index is None:
+        return jsonify({'error': 'Nearby search is not available: no places index is loaded'}), 503
+    started = time.perf_counter()
+    places = index.query(lat, lon, radius_km=radius_km, k=k, categories=categories or None)
+    return jsonify({
+        'places': places,
+        'count': len(places),
+        'took_ms': round((time.perf_counter() - started) * 1000, 3)
+    })
+
+@map_bp.route('/weather/grid', methods=['GET'])
+@route_limit('30 per minute')
+def weather_grid_route():
+    """
+    Current weather sampled on a grid over a map viewport, as columnar arrays for overlays.
+    Query: south, west, north, east, zoom, and optionally rows and cols (maximum grid size).
+    """
+    try:
+        south, west, north, east = (float(request.args[k]) for k in ('south', 'west', 'north', 'east'))
+        zoom = float(request.args.get('zoom', 0))
+        rows = int(request.args.get('rows', Config.WEATHER_GRID_ROWS))
+        cols = int(request.args.get('cols', Config.WEATHER_GRID_COLS))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'south, west, north and east are required numbers'}), 400
+    if not (-90 <= south <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        return jsonify({'error': 'Invalid bounding box'}), 400
+    if rows <= 0 or cols <= 0 or rows * cols > Config.WEATHER_GRID_MAX_POINTS:
+        return jsonify({'error': f'rows x cols must be between 1 and {Config.WEATHER_GRID_MAX_POINTS}'}), 400
+
+    try:
+        return jsonify(weather_grid(climate_impact, south, west, north, east, zoom, rows, cols))
+    except Exception as e:
+        return jsonify({'error': f'Weather grid failed: {str(e)}'}), 502
+
+@map_bp.route('/climate/history', methods=['GET'])
+@route_limit('30 per minute')
+def climate_history():
+    """
+    Historical climate of the grid cell containing a point, as columnar arrays: normals, annual
+    values and anomalies, and the monthly values and daily summary of a period. Answers 202 while
+    a new cell is being ingested from the archive.
+    Query: lat, lon, and optionally start and end (ISO dates; the last stored year by default).
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lon are required numbers'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'lat or lon out of range'}), 400
+
+    try:
+        cell, source = climate_impact.climate_cell(lat, lon)
+        if source == "ingesting":
+            return jsonify({'status': 'ingesting', 'message': 'Historical climate data for this location is being loaded; retry shortly'}), 202
+        if cell is None:
+            return jsonify({'error': 'No historical climate data is stored for this location'}), 404
+        return jsonify({**cell.history(request.args.get('start'), request.args.get('end')), 'source': source})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Climate history failed: {str(e)}'}), 502
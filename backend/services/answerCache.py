@@ -0,0 +1,74 @@
+"""
+Cache of complete chat answers, in front of generate_llm_response.
+
+Answers are keyed by the normalized message, the geohash cell of the map position, a zoom
+bucket, the model and the response mode. Each answer lives as long as the shortest TTL of
+the tools it used (weather answers expire quickly, history and geography slowly), and the
+cache is bounded both by entry count and by Config.ANSWER_CACHE_MAX_BYTES, evicting the
+least recently used answers first.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config.config import Config
+from utils import metrics
+from utils.cache import TTLCache
+from utils.geoUtils import geohash_encode, normalize_query
+
+logger = logging.getLogger(__name__)
+
+TOOL_TTLS = {
+    "climate_impact": Config.ANSWER_CACHE_TTL_WEATHER,
+    "climate_history": Config.ANSWER_CACHE_TTL_DEFAULT,
+    "geo_explorer": Config.ANSWER_CACHE_TTL_GEO,
+    "info_agent": Config.ANSWER_CACHE_TTL_INFO,
+    "nearby_places": Config.ANSWER_CACHE_TTL_GEO,
+}
+
+answer_cache = TTLCache(maxsize=Config.ANSWER_CACHE_SIZE, ttl=Config.ANSWER_CACHE_TTL_DEFAULT,
+                        namespace='answers', max_bytes=Config.ANSWER_CACHE_MAX_BYTES)
+
+def _cell(point: Optional[Tuple[float, float]]) -> str:
+    return geohash_encode(point[0], point[1], Config.ANSWER_CACHE_PRECISION) if point else "-"
+
+def _zoom_bucket(coordinates: Optional[Dict[str, Any]]) -> str:
+    try:
+        return str(int(float(coordinates["zoom"])) // Config.ANSWER_CACHE_ZOOM_BUCKET)
+    except (TypeError, KeyError, ValueError):
+        return "-"
+
+def answer_key(message: str, point: Optional[Tuple[float, float]], coordinates: Optional[Dict[str, Any]],
+               model: str, response_mode: str) -> Tuple[str, ...]:
+    """Cache key of a chat request; point is the parsed (lat, lon) of its coordinates, if any."""
+    return (normalize_query(message), _cell(point), _zoom_bucket(coordinates), model, response_mode)
+
+def answer_ttl(tool_usage) -> float:
+    """The shortest TTL of the tools an answer used, or the default for answers without tools."""
+    ttls = [TOOL_TTLS[tool] for tool in tool_usage if tool in TOOL_TTLS]
+    return min(ttls) if ttls else Config.ANSWER_CACHE_TTL_DEFAULT
+
+def lookup(key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """A cached answer marked with "cached": true and its age, or None."""
+    entry = answer_cache.get(key)
+    if entry is None:
+        return None
+    response = dict(entry["response"])
+    response["cached"] = True
+    response["cache_age"] = round(time.time() - entry["stored_at"], 1)
+    return response
+
+def store(key: Tuple[str, ...], response: Dict[str, Any]) -> None:
+    """Cache a successful answer; errors and answers built on a failed or timed-out tool are not cached."""
+    if "error" in response or any(timing.get("status") != "ok" for timing in response.get("tool_timings", [])):
+        return
+    answer_cache.set(key, {"response": response, "stored_at": time.time()}, ttl=answer_ttl(response.get("tool_usage", [])))
+
+def _collect_answer_cache_metrics():
+    stats = answer_cache.stats()
+    for field in ("hits", "misses", "evictions"):
+        yield (f"geoai_answer_cache_{field}_total", "counter", f"Answer cache {field}.", [({}, stats[field])])
+    yield ("geoai_answer_cache_size", "gauge", "Answers held in the answer cache.", [({}, stats["size"])])
+    yield ("geoai_answer_cache_bytes", "gauge", "Approximate memory held by cached answers.", [({}, stats["bytes"])])
+
+metrics.REGISTRY.register_collector(_collect_answer_cache_metrics)
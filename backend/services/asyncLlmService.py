@@ -0,0 +1,309 @@
+"""
+Async versions of the chat pipeline for the ASGI serving path (see asgi.py).
+
+These mirror generate_llm_response / execute_tool_calls / refine_response in
+services/llmService.py, but await the OpenAI API and all upstream HTTP calls, so one
+process can hold hundreds of in-flight chats without a thread per request.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+from config.config import Config
+from utils import metrics
+from utils.geoUtils import async_reverse_geocode
+from utils.tileCache import TILES
+from services import answerCache, intentRouter
+from services.prefetch import ToolPrefetch
+from services.tokenBudget import apply_token_budget
+from services.llmService import (
+    TOOLS, RESPONSE_MODES, EventCallback, geo_explorer, climate_impact, info_agent, nearby,
+    _emit, _tool_notifier, _prepare_tool_call, _result_status, _add_usage, parse_request_coordinates, request_zoom,
+    build_system_message, assistant_message, finish_response, new_usage, answer_cache_key, serve_cached_answer
+)
+
+logger = logging.getLogger(__name__)
+
+# Async function mapping for execution.
+ASYNC_TOOL_FUNCTIONS = {
+    "geo_explorer": geo_explorer.aget_location_info,
+    "climate_impact": climate_impact.aget_weather_info,
+    "climate_history": climate_impact.aget_climate_history,
+    "info_agent": info_agent.aget_info,
+    "nearby_places": nearby.afind_places
+}
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return the running event loop's AsyncOpenAI client, so its connection pool is reused across requests."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        _clients[loop] = client
+    return client
+
+async def aclose() -> None:
+    """Close the running loop's OpenAI client (call on application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+async def _arun_tool(function_name: str, function_args: Dict[str, Any], notify: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Await a single tool and return its result, its status and the wall time it took."""
+    started = time.monotonic()
+    _emit(notify, "tool_started", {})
+    try:
+        with metrics.span(f"tool.{function_name}"):
+            if function_name not in ASYNC_TOOL_FUNCTIONS:
+                result = {"error": f"Unknown function: {function_name}"}
+            else:
+                result = await ASYNC_TOOL_FUNCTIONS[function_name](**function_args)
+    except Exception:
+        _emit(notify, "tool_finished", {"wall_time": round(time.monotonic() - started, 4), "status": "error"})
+        raise
+    wall_time = time.monotonic() - started
+    status = _result_status(result)
+    _emit(notify, "tool_finished", {"wall_time": round(wall_time, 4), "status": status})
+    return {"result": result, "status": status, "wall_time": wall_time}
+
+def _astart_prefetch(function_name: str, function_args: Dict[str, Any]) -> asyncio.Task:
+    """Start a speculative tool call as a task on the running loop."""
+    return asyncio.ensure_future(_arun_tool(function_name, function_args))
+
+async def aexecute_tool_calls(tool_calls: List[Dict], messages: List[Dict], default_location: Optional[str] = None,
+                              tool_timings: Optional[List[Dict]] = None,
+                              on_event: Optional[EventCallback] = None, prefetch: Optional[ToolPrefetch] = None) -> List[Dict]:
+    """
+    Async variant of execute_tool_calls. All calls run concurrently as tasks, each limited by
+    Config.TOOL_TIMEOUT and all of them together by Config.TOOL_CALLS_TIMEOUT; the "tool"
+    messages are appended in the order of tool_calls. Calls matching a speculative prefetch
+    await its task instead of running again.
+    """
+    if not tool_calls:
+        return messages
+
+    started = time.monotonic()
+    notifiers = [_tool_notifier(on_event, tool_call) for tool_call in tool_calls]
+    tasks = []
+    prefetched = set()
+    for tool_call, notify in zip(tool_calls, notifiers):
+        try:
+            function_args = _prepare_tool_call(tool_call, default_location)
+            awaitable = prefetch.take(tool_call.function.name, function_args) if prefetch is not None else None
+            if awaitable is not None:
+                prefetched.add(len(tasks))
+                _emit(notify, "tool_started", {"prefetched": True})
+            else:
+                awaitable = _arun_tool(tool_call.function.name, function_args, notify)
+            tasks.append(asyncio.ensure_future(asyncio.wait_for(awaitable, timeout=Config.TOOL_TIMEOUT)))
+        except Exception as e:
+            tasks.append(e)
+
+    pending = [task for task in tasks if isinstance(task, asyncio.Future)]
+    if pending:
+        _, not_done = await asyncio.wait(pending, timeout=Config.TOOL_CALLS_TIMEOUT)
+        for task in not_done:
+            task.cancel()
+        # A cancelled task is only done once it has unwound; reading it before then raises InvalidStateError.
+        await asyncio.gather(*not_done, return_exceptions=True)
+
+    for index, (tool_call, task, notify) in enumerate(zip(tool_calls, tasks, notifiers)):
+        function_name = tool_call.function.name
+        status = "ok"
+        wall_time = time.monotonic() - started
+        if isinstance(task, Exception):
+            status, content, wall_time = "error", {"error": str(task)}, 0.0
+        elif task.cancelled() or isinstance(task.exception(), asyncio.TimeoutError):
+            status, content = "timeout", {"error": f"{function_name} timed out"}
+        elif task.exception() is not None:
+            status, content = "error", {"error": str(task.exception())}
+        else:
+            run = task.result()
+            status, content, wall_time = run["status"], run["result"], run["wall_time"]
+        if status != "ok" and "error" in content:
+            logger.error(f"Error executing function {function_name}: {content['error']}")
+        _emit(notify, "tool_finished", {"wall_time": round(wall_time, 4), "status": status})
+
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": json.dumps(content)
+        })
+        if tool_timings is not None:
+            tool_timings.append({
+                "tool": function_name,
+                "tool_call_id": tool_call.id,
+                "wall_time": round(wall_time, 4),
+                "status": status,
+                "prefetched": index in prefetched
+            })
+
+    return messages
+
+async def _acollect_stream(response, on_token: Callable[[str], None], usage: Optional[Dict[str, int]] = None) -> str:
+    """Forward the text deltas of a streamed completion to on_token and return the full text."""
+    parts = []
+    stream_usage = None
+    async for chunk in response:
+        if getattr(chunk, "usage", None) is not None:
+            stream_usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            on_token(delta)
+    if usage is not None:
+        _add_usage(usage, stream_usage)
+    return "".join(parts)
+
+async def arefine_response(client: AsyncOpenAI, technical_response: str, on_token: Optional[Callable[[str], None]] = None,
+                           usage: Optional[Dict[str, int]] = None) -> str:
+    """Async variant of refine_response."""
+    refine_prompt = f"""Please convert the following technical response into a friendly, concise, and conversational answer.
+Include helpful suggestions and relevant links for further exploration, but avoid unnecessary technical details.
+
+Response:
+{technical_response}"""
+
+    stream_kwargs = {"stream": True, "stream_options": {"include_usage": True}} if on_token is not None else {}
+    with metrics.span("llm.refine"):
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a friendly assistant that reformats technical content into engaging, easy-to-understand language with suggestions and links."},
+                {"role": "user", "content": refine_prompt}
+            ],
+            temperature=0.7,
+            **stream_kwargs
+        )
+        if on_token is not None:
+            return await _acollect_stream(response, on_token, usage)
+    if usage is not None:
+        _add_usage(usage, getattr(response, "usage", None))
+    return response.choices[0].message.content
+
+async def agenerate_llm_response(message: str, coordinates: Optional[Dict[str, Any]] = None, model: str = "gpt-4o",
+                                 on_event: Optional[EventCallback] = None, response_mode: Optional[str] = None,
+                                 use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Async variant of generate_llm_response with the same arguments and response payload.
+    """
+    prefetch = None
+    try:
+        started = time.monotonic()
+        response_mode = response_mode or Config.DEFAULT_RESPONSE_MODE
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Unknown response mode: {response_mode}")
+        cache_key = None
+        if use_cache and Config.ANSWER_CACHE_ENABLED:
+            cache_key = answer_cache_key(message, coordinates, model, response_mode)
+            cached = answerCache.lookup(cache_key)
+            if cached is not None:
+                return serve_cached_answer(cached, coordinates, on_event, started)
+        usage = new_usage()
+        client = get_async_openai_client()
+
+        # Resolve the location name from the coordinates.
+        location_name = "Unknown location"
+        point = None
+        try:
+            point = parse_request_coordinates(coordinates)
+            if point is not None:
+                # Warms the point's tile and its neighbours for the agents. The prompt names the user's own
+                # point, not the tile center, so it is always geocoded (a cached lookup after the first).
+                TILES.get(*point, request_zoom(coordinates))
+                with metrics.span("llm.reverse_geocode"):
+                    location_name = await async_reverse_geocode(*point)
+                logger.info(f"Reverse geocoded location: {location_name}")
+        except Exception as e:
+            logger.warning(f"Failed to reverse geocode coordinates: {e}")
+        _emit(on_event, "location_resolved", {"location": location_name})
+
+        messages = [
+            {"role": "system", "content": build_system_message(location_name, coordinates, response_mode)},
+            {"role": "user", "content": message}
+        ]
+
+        # Obvious single-tool questions are routed locally; otherwise the first API call
+        # gets the initial response with potential tool calls, while the tools the model is
+        # likely to ask for are prefetched for the clicked point.
+        response_message = intentRouter.route_intent(message, location_name, point)
+        if response_message is None:
+            if point is not None and Config.PREFETCH_ENABLED:
+                prefetch = ToolPrefetch(location_name, point, _astart_prefetch)
+            with metrics.span("llm.first_completion"):
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=TOOLS,
+                    tool_choice="auto",
+                    temperature=0.7
+                )
+            _add_usage(usage, getattr(response, "usage", None))
+            response_message = response.choices[0].message
+        messages.append(assistant_message(response_message))
+
+        on_token = (lambda text: _emit(on_event, "token", {"text": text})) if on_event else None
+        streamed = False
+
+        # If tool calls are present, execute them.
+        tool_timings = []
+        if hasattr(response_message, "tool_calls") and response_message.tool_calls:
+            messages = await aexecute_tool_calls(response_message.tool_calls, messages, default_location=location_name,
+                                                 tool_timings=tool_timings, on_event=on_event, prefetch=prefetch)
+            apply_token_budget(messages, model, usage)
+
+            # Make a second API call with the updated conversation history.
+            if response_mode == "fast" and on_token is not None:
+                with metrics.span("llm.second_completion"):
+                    final_response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.7,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    final_text = await _acollect_stream(final_response, on_token, usage)
+                streamed = True
+            else:
+                with metrics.span("llm.second_completion"):
+                    final_response = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.7
+                    )
+                _add_usage(usage, getattr(final_response, "usage", None))
+                final_text = final_response.choices[0].message.content
+        else:
+            final_text = response_message.content
+
+        if response_mode == "polished":
+            text = await arefine_response(client, final_text, on_token=on_token, usage=usage)
+        else:
+            text = final_text or ""
+            if on_token is not None and not streamed and text:
+                on_token(text)
+
+        result = finish_response(text, response_message, coordinates, tool_timings, response_mode, model, started, usage)
+        if cache_key is not None:
+            answerCache.store(cache_key, result)
+        return result
+
+    except Exception as e:
+        logger.error(f"End-to-end processing failed: {str(e)}")
+        return {
+            "text": "I'm having trouble with that request. Please try rephrasing or ask about something else.",
+            "error": str(e)
+        }
+    finally:
+        if prefetch is not None:
+            prefetch.finish()
@@ -1,28 +1,99 @@
-import requests
+import logging
 import re
-from utils.geoUtils import validate_coordinates
+import numpy as np
+from config.config import Config
+from utils.geoUtils import geocode_location as _geocode_location, geocode_cache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+_COORDINATE_LITERAL = re.compile(r'^\s*([-+]?\d+\.?\d*)[,\s]+([-+]?\d+\.?\d*)\s*$')
 
 def geocode_location(location):
-    # Check if input is coordinates
-    coord_match = re.match(r'^([-+]?\d+\.?\d*)[,\s]+([-+]?\d+\.?\d*)$', location)
-    if coord_match:
-        lat, lon = coord_match.groups()
-        if validate_coordinates(lat, lon):
-            return {'lat': float(lat), 'lon': float(lon)}
-        raise ValueError('Invalid coordinates range')
-
-    # Geocode via Nominatim
-    try:
-        response = requests.get(
-            'https://nominatim.openstreetmap.org/search',
-            params={'q': location, 'format': 'json', 'limit': 1, 'accept-language': 'en'},
-            headers={'User-Agent': 'Geospatial-AI-App'},
-            timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
-        if not data:
-            raise ValueError('Location not found')
-        return {'lat': float(data[0]['lat']), 'lon': float(data[0]['lon'])}
-    except requests.RequestException as e:
-        raise Exception(f'Geocoding service error: {str(e)}')
\ No newline at end of file
+    # Coordinate parsing, caching and the Nominatim lookup live in utils.geoUtils so the
+    # /api/geocode route and the agents share one geocode cache.
+    return _geocode_location(location)
+
+def parse_coordinate_literals(locations):
+    """
+    Parse "lat,lon" literals in a list of strings in one pass.
+
+    Returns:
+        tuple: (is_literal, lat, lon, in_range) NumPy arrays aligned with `locations`; lat/lon
+        are NaN where the entry is not a literal.
+    """
+    matches = [_COORDINATE_LITERAL.match(location) for location in locations]
+    is_literal = np.fromiter((m is not None for m in matches), dtype=bool, count=len(matches))
+    pairs = np.full((len(matches), 2), np.nan)
+    if is_literal.any():
+        pairs[is_literal] = np.array([m.groups() for m in matches if m is not None], dtype=float)
+    lat, lon = pairs[:, 0], pairs[:, 1]
+    with np.errstate(invalid='ignore'):
+        in_range = is_literal & (np.abs(lat) <= 90) & (np.abs(lon) <= 180)
+    return is_literal, lat, lon, in_range
+
+def geocode_batch(locations):
+    """
+    Geocode many locations, yielding one result dict per input as it becomes available.
+
+    Coordinate literals are answered locally, duplicate names (after normalization) are looked
+    up once, cached names are answered before any upstream call, and the remaining names are
+    sent to Nominatim one at a time through the shared `utils.geoUtils.nominatim_bucket`. At most
+    Config.GEOCODE_BATCH_MAX_LOOKUPS names are looked up per call, which keeps a request within
+    a worker timeout at one lookup per second; the rest are answered with `deferred: true` and
+    resolve from the cache once the batch is resubmitted. Each result carries the input
+    `index` and `query` plus either `lat`/`lon` and a `source` ("literal", "cache" or
+    "nominatim") or an `error`. A final {"done": true, ...} summary is yielded last.
+    """
+    summary = {'done': True, 'total': len(locations), 'unique': 0, 'literal': 0, 'cache': 0,
+               'nominatim': 0, 'deferred': 0, 'errors': 0}
+
+    def result(index, **fields):
+        if fields.get('deferred'):
+            summary['deferred'] += 1
+        elif 'error' in fields:
+            summary['errors'] += 1
+        else:
+            summary[fields['source']] += 1
+        return {'index': index, 'query': locations[index], **fields}
+
+    is_literal, lat, lon, in_range = parse_coordinate_literals(locations)
+    for index in np.flatnonzero(is_literal):
+        index = int(index)
+        if in_range[index]:
+            yield result(index, lat=float(lat[index]), lon=float(lon[index]), source='literal')
+        else:
+            yield result(index, error='Invalid coordinates range')
+
+    # Group the remaining inputs by cache key.
+    pending = {}
+    for index in np.flatnonzero(~is_literal):
+        index = int(index)
+        key = normalize_query(locations[index])
+        if not key:
+            yield result(index, error='Empty location')
+            continue
+        pending.setdefault(key, []).append(index)
+    summary['unique'] = len(pending)
+
+    for key in list(pending):
+        cached = geocode_cache.get(key)
+        if cached is not None:
+            for index in pending.pop(key):
+                yield result(index, lat=cached['lat'], lon=cached['lon'], source='cache')
+
+    for lookups, (key, indices) in enumerate(pending.items()):
+        if lookups >= Config.GEOCODE_BATCH_MAX_LOOKUPS:
+            for index in indices:
+                yield result(index, error='Lookup limit reached; resubmit the batch to continue', deferred=True)
+            continue
+        try:
+            # Takes a nominatim_bucket token before going upstream.
+            point = _geocode_location(locations[indices[0]])
+            fields = {'lat': point['lat'], 'lon': point['lon'], 'source': 'nominatim'}
+        except Exception as e:
+            logger.warning(f"Batch geocoding failed for {key!r}: {e}")
+            fields = {'error': str(e)}
+        for index in indices:
+            yield result(index, **fields)
+
+    yield summary
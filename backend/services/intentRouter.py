@@ -0,0 +1,173 @@
+"""
+Local intent router for obvious single-tool questions.
+
+Questions like "weather here", "where am I" or "history of this place" need exactly one tool,
+called with the user's own position, so the first completion that only picks that tool is a
+wasted LLM round trip. route_intent() scores the message against keyword rules per tool and,
+when one tool wins clearly and the question is about the user's current position, returns the
+tool call to run directly. Everything else (other places, mixed or long questions, messages
+without a known position) returns None and goes through model-driven tool choice as before.
+
+Decisions are counted per result and tool, exported as geoai_intent_router_total, and the
+running hit rate is logged every Config.INTENT_ROUTER_LOG_EVERY decisions.
+"""
+import json
+import logging
+import re
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+from openai.types.chat import ChatCompletionMessage
+
+from config.config import Config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# (pattern, weight) rules per tool. A weight of 1.0 is a keyword that settles the intent on
+# its own; lower weights are hints that only count together with others.
+INTENT_RULES: Dict[str, List[Tuple[Pattern, float]]] = {
+    "climate_impact": [
+        (re.compile(r"\b(weather|forecast|temperature)\b"), 1.0),
+        (re.compile(r"\b(rain(ing|y)?|snow(ing|y)?|humid(ity)?|wind(y)?|sunny|cloudy|storm(s|y)?|degrees|umbrella)\b"), 0.75),
+        (re.compile(r"\b(hot|cold|warm|chilly)\b"), 0.5),
+    ],
+    # "Climate" alone may mean today's conditions or the long-term record, so it is only a hint here.
+    "climate_history": [
+        (re.compile(r"\b(normals?|anomal(y|ies)|climatolog\w*|climate history|historical (weather|climate|temperatures?|rainfall))\b"), 1.0),
+        (re.compile(r"\b(last|past|previous) (years?|decades?|months?|winter|spring|summer|autumn|fall)\b|\b(on )?average\b|\bused to be\b"), 0.75),
+        (re.compile(r"\bclimate\b"), 0.5),
+    ],
+    "geo_explorer": [
+        (re.compile(r"\bwhere am i\b|\bwhere is (this|here)\b|\bmy (current )?location\b"), 1.0),
+        (re.compile(r"\bwhat (place|city|town|village|country|region|area) is (this|here)\b"), 1.0),
+        (re.compile(r"\b(population|elevation|altitude|landmarks?|coordinates|geography|geographic(al)?)\b"), 0.75),
+    ],
+    "info_agent": [
+        (re.compile(r"\b(history|historical|culture|cultural|cuisine|heritage)\b"), 1.0),
+        (re.compile(r"\b(food|foods|dish(es)?|traditions?|customs|festivals?)\b"), 0.75),
+        (re.compile(r"\b(eat|famous for|known for)\b"), 0.5),
+    ],
+    "nearby_places": [
+        (re.compile(r"\b(nearby|near me|close by|around here|nearest|closest|within walking distance)\b"), 1.0),
+        (re.compile(r"\b(restaurants?|caf(e|é)s?|coffee shops?|bars?|pubs?|museums?|parks?|hotels?|shops?|"
+                    r"supermarkets?|pharmac(y|ies)|atms?|places to (eat|go|stay|visit))\b"), 0.75),
+    ],
+}
+
+# Words after a preposition that still point at the user's own position or at a time, not at another place.
+DEICTIC_WORDS = (
+    "here", "there", "this", "that", "these", "those", "it", "my", "me", "us", "our", "you", "your",
+    "the", "a", "an", "some", "today", "tonight", "tomorrow", "now", "morning", "afternoon", "evening",
+    "night", "week", "weekend", "past", "last", "next", "area", "place", "city", "town", "region", "country",
+    "location", "neighborhood", "neighbourhood",
+)
+
+# A named place ("in Paris", "of new york", "in the UK") means the tool needs a location the router
+# cannot resolve. Users often skip capitals, so any other word after a preposition counts as a place.
+OTHER_PLACE_PATTERN = re.compile(
+    r"\b(?:in|at|of|for|near|around|to|from)\s+(?:the\s+)?(?!(?:" + "|".join(DEICTIC_WORDS) + r")\b)[^\W\d_]",
+    re.IGNORECASE)
+
+# Requests that need reasoning over several answers go to the model.
+COMPLEX_PATTERN = re.compile(r"\b(compare|comparison|versus|vs\.?|difference|between|plan|itinerary|recommend|should i)\b")
+
+# Each word beyond this many lowers the confidence: long messages usually ask for more than one thing.
+SHORT_MESSAGE_WORDS = 8
+
+DECISIONS = metrics.REGISTRY.counter(
+    "geoai_intent_router_total", "Intent router decisions by result (hit/miss) and routed tool or miss reason.",
+    ("result", "reason"))
+
+_stats = {"hit": 0, "miss": 0}
+_stats_lock = threading.Lock()
+
+def score_intents(message: str) -> Dict[str, float]:
+    """Sum of the matching rule weights per tool."""
+    text = message.lower()
+    return {tool: sum(weight for pattern, weight in rules if pattern.search(text))
+            for tool, rules in INTENT_RULES.items()}
+
+def classify(message: str) -> Tuple[Optional[str], float, str]:
+    """
+    Pick the tool a message asks for.
+
+    Returns:
+        (tool, confidence, reason): the best scoring tool (None if nothing matched), a confidence
+        in [0, 1] and the reason for a low confidence ("no_intent", "other_place", "complex" or
+        "ambiguous"), or "matched".
+    """
+    text = message.strip()
+    lowered = text.lower()
+    scores = score_intents(text)
+    tool, best = max(scores.items(), key=lambda item: item[1])
+    if best <= 0:
+        return None, 0.0, "no_intent"
+    if OTHER_PLACE_PATTERN.search(text):
+        return tool, 0.0, "other_place"
+    if COMPLEX_PATTERN.search(lowered):
+        return tool, 0.0, "complex"
+    others = sum(scores.values()) - best
+    length_penalty = max(0, len(text.split()) - SHORT_MESSAGE_WORDS) * 0.1
+    # A lone hint is not enough, and a competing intent or a long message dilutes the best match.
+    strength = min(best, 1.0)
+    confidence = strength * strength / (strength + others + length_penalty)
+    return tool, round(confidence, 3), "matched" if others == 0 else "ambiguous"
+
+def route_intent(message: str, location_name: str, point: Optional[Tuple[float, float]]) -> Optional[ChatCompletionMessage]:
+    """
+    Resolve an obvious question to its tool call locally.
+
+    Args:
+        message: User's query text.
+        location_name: Reverse-geocoded name of the user's position.
+        point: The user's (lat, lon), or None when the request carried no coordinates.
+
+    Returns:
+        An assistant message with the tool call, in the shape of a completion's message, or None
+        when the model should choose the tools.
+    """
+    if not Config.INTENT_ROUTER_ENABLED:
+        return None
+    if point is None:
+        _record("miss", "no_position")
+        return None
+    tool, confidence, reason = classify(message)
+    if tool is None or confidence < Config.INTENT_ROUTER_MIN_CONFIDENCE:
+        _record("miss", reason if reason != "matched" else "low_confidence")
+        return None
+
+    _record("hit", tool)
+    logger.info(f"Intent router: {tool} (confidence {confidence})")
+    arguments = {"location": location_name, "coordinates": f"{point[0]},{point[1]}"}
+    return ChatCompletionMessage.model_validate({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{
+            "id": f"call_router_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": tool, "arguments": json.dumps(arguments)}
+        }]
+    })
+
+def _record(result: str, reason: str) -> None:
+    DECISIONS.inc(result=result, reason=reason)
+    with _stats_lock:
+        _stats[result] += 1
+        decisions = _stats["hit"] + _stats["miss"]
+        hits = _stats["hit"]
+    if Config.INTENT_ROUTER_LOG_EVERY and decisions % Config.INTENT_ROUTER_LOG_EVERY == 0:
+        logger.info(f"Intent router hit rate: {hits / decisions:.1%} of {decisions} requests")
+
+def router_stats() -> Dict[str, Any]:
+    """Routed and model-routed request counts and the hit rate."""
+    with _stats_lock:
+        decisions = _stats["hit"] + _stats["miss"]
+        return {**_stats, "hit_rate": round(_stats["hit"] / decisions, 4) if decisions else 0.0}
+
+def _collect_router_metrics():
+    yield ("geoai_intent_router_hit_rate", "gauge", "Share of chat requests routed without the tool-planning LLM call.",
+           [({}, router_stats()["hit_rate"])])
+
+metrics.REGISTRY.register_collector(_collect_router_metrics)
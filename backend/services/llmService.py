@@ -2,9 +2,13 @@ import os
 import json
 import re
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
 from openai import OpenAI
-from typing import Dict, Any, List, Optional
+import threading
+import contextvars
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,12 +18,20 @@ load_dotenv()
 from agents.geoExplorerAgent import GeoExplorerAgent
 from agents.climateImpactAgent import ClimateImpactAgent
 from agents.infoAgent import InfoAgent
+from agents.nearbyAgent import NearbyAgent
 from utils.geoUtils import geocode_location, reverse_geocode
+from config.config import Config
+from utils import metrics
+from utils.tileCache import TILES
+from services import answerCache, intentRouter
+from services.prefetch import ToolPrefetch
+from services.tokenBudget import apply_token_budget
 
 # Instantiate the agents
 geo_explorer = GeoExplorerAgent()
 climate_impact = ClimateImpactAgent()
 info_agent = InfoAgent()
+nearby = NearbyAgent()
 
 # Define tools for OpenAI tool calling format with strict mode.
 # Note: reverse_geocode is used internally and not exposed as a tool.
@@ -74,6 +86,41 @@ TOOLS = [
             "strict": True
         }
     },
+    {
+        "type": "function",
+        "function": {
+            "name": "climate_history",
+            "description": "Provides historical climate for a location from stored daily records: monthly normals, yearly anomalies, and a summary (mean, extremes, precipitation) of a past period.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "The name of the location (e.g., 'New York, USA')."
+                    },
+                    "coordinates": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "Coordinates in 'latitude,longitude' format (e.g., '40.7128,-74.0060')."
+                    },
+                    "start_date": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "First day of the period to summarize, 'YYYY-MM-DD', or null for the last year."
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "Last day of the period to summarize, 'YYYY-MM-DD', or null for the latest stored day."
+                    }
+                },
+                "required": ["location", "coordinates", "start_date", "end_date"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
+    },
     {
         "type": "function",
         "function": {
@@ -98,6 +145,41 @@ TOOLS = [
             },
             "strict": True
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "nearby_places",
+            "description": "Finds points of interest (restaurants, cafes, museums, parks, hotels, etc.) near a location, nearest first.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "location": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "The name of the location (e.g., 'Paris, France')."
+                    },
+                    "coordinates": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "Coordinates in 'latitude,longitude' format."
+                    },
+                    "category": {
+                        "type": "string",
+                        "nullable": True,
+                        "description": "Comma-separated place categories (e.g., 'cafe,restaurant'), or null for any."
+                    },
+                    "radius_km": {
+                        "type": "number",
+                        "nullable": True,
+                        "description": "Search radius in kilometers, or null for the default."
+                    }
+                },
+                "required": ["location", "coordinates", "category", "radius_km"],
+                "additionalProperties": False
+            },
+            "strict": True
+        }
     }
 ]
 
@@ -105,9 +187,32 @@ TOOLS = [
 TOOL_FUNCTIONS = {
     "geo_explorer": geo_explorer.get_location_info,
     "climate_impact": climate_impact.get_weather_info,
-    "info_agent": info_agent.get_info
+    "climate_history": climate_impact.get_climate_history,
+    "info_agent": info_agent.get_info,
+    "nearby_places": nearby.find_places
 }
 
+# Progress listener signature: on_event(event_name, data).
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+# "polished" restyles every answer with a refine_response call; "fast" skips it.
+RESPONSE_MODES = ("fast", "polished")
+
+# Style guidance that replaces the refine_response pass in "fast" mode.
+FAST_MODE_STYLE_INSTRUCTIONS = """Write your final answer as a friendly, concise, and conversational reply for a non-technical reader.
+Include helpful suggestions and relevant links for further exploration, but avoid unnecessary technical details."""
+
+_mode_stats: Dict[str, Dict[str, Any]] = {}
+_mode_stats_lock = threading.Lock()
+
+# Bounded pool shared by all requests for running tool calls concurrently.
+_tool_executor = ThreadPoolExecutor(max_workers=Config.TOOL_MAX_WORKERS, thread_name_prefix="tool")
+
+# Speculative prefetches get their own small pool, so unused ones never hold the workers that real
+# tool calls wait for. A prefetch is skipped rather than queued when every prefetch worker is busy.
+_prefetch_executor = ThreadPoolExecutor(max_workers=Config.PREFETCH_MAX_WORKERS, thread_name_prefix="prefetch")
+_prefetch_slots = threading.BoundedSemaphore(Config.PREFETCH_MAX_WORKERS)
+
 def get_openai_client() -> OpenAI:
     """Initialize and validate OpenAI client with proper error handling."""
     try:
@@ -120,49 +225,266 @@ def get_openai_client() -> OpenAI:
         logger.error(f"Client initialization failed: {str(e)}")
         raise
 
-def execute_tool_calls(tool_calls: List[Dict], messages: List[Dict], default_location: Optional[str] = None) -> List[Dict]:
+def _prepare_tool_call(tool_call, default_location: Optional[str]) -> Dict[str, Any]:
+    """Parse a tool call's arguments, filling in a missing location with default_location."""
+    function_args = json.loads(tool_call.function.arguments)
+    if tool_call.function.name in ["geo_explorer", "climate_impact", "climate_history", "info_agent", "nearby_places"]:
+        if "location" not in function_args or not function_args["location"]:
+            function_args["location"] = default_location if default_location is not None else ""
+    return function_args
+
+def _emit(on_event: Optional[EventCallback], event: str, data: Dict[str, Any]) -> None:
+    """Deliver a progress event to on_event, never letting a listener break the pipeline."""
+    if on_event is None:
+        return
+    try:
+        on_event(event, data)
+    except Exception as e:
+        logger.warning(f"Event listener failed for {event}: {e}")
+
+def _tool_notifier(on_event: Optional[EventCallback], tool_call) -> Optional[EventCallback]:
+    """Emit tool_started/tool_finished events for one tool call, reporting tool_finished at most once."""
+    if on_event is None:
+        return None
+    lock = threading.Lock()
+    finished = []
+
+    def notify(event: str, data: Dict[str, Any]) -> None:
+        with lock:
+            if event == "tool_finished":
+                if finished:
+                    return
+                finished.append(True)
+        _emit(on_event, event, {"tool": tool_call.function.name, "tool_call_id": tool_call.id, **data})
+
+    return notify
+
+def _result_status(result: Any) -> str:
+    """
+    "error" for a tool result that reports a failure, either directly or as an agent response
+    whose metadata carries the upstream error, otherwise "ok".
+    """
+    if isinstance(result, dict) and (result.get("error") or (result.get("metadata") or {}).get("error")):
+        return "error"
+    return "ok"
+
+def _run_tool(function_name: str, function_args: Dict[str, Any], notify: Optional[EventCallback] = None) -> Dict[str, Any]:
+    """Run a single tool and return its result, its status and the wall time it took."""
+    started = time.monotonic()
+    _emit(notify, "tool_started", {})
+    try:
+        with metrics.span(f"tool.{function_name}"):
+            if function_name not in TOOL_FUNCTIONS:
+                result = {"error": f"Unknown function: {function_name}"}
+            else:
+                result = TOOL_FUNCTIONS[function_name](**function_args)
+    except Exception:
+        _emit(notify, "tool_finished", {"wall_time": round(time.monotonic() - started, 4), "status": "error"})
+        raise
+    wall_time = time.monotonic() - started
+    status = _result_status(result)
+    _emit(notify, "tool_finished", {"wall_time": round(wall_time, 4), "status": status})
+    return {"result": result, "status": status, "wall_time": wall_time}
+
+def execute_tool_calls(tool_calls: List[Dict], messages: List[Dict], default_location: Optional[str] = None,
+                       mode: Optional[str] = None, tool_timings: Optional[List[Dict]] = None,
+                       on_event: Optional[EventCallback] = None, prefetch: Optional[ToolPrefetch] = None) -> List[Dict]:
     """
     Execute tool calls and append the results to the conversation history.
     If a tool call for geo_explorer, climate_impact, or info_agent is missing the "location" parameter,
     it is filled in with default_location.
+
+    In "concurrent" mode (the default, see Config.TOOL_EXECUTION_MODE) the calls run in parallel on a
+    bounded thread pool; in "serial" mode (and for a single call) they run on the same pool one after
+    the other. Either way each call is limited by Config.TOOL_TIMEOUT, counted from when it starts
+    running, and all of them together by Config.TOOL_CALLS_TIMEOUT. The "tool" messages are always appended in the order of tool_calls.
+    If tool_timings is given, one {"tool", "tool_call_id", "wall_time", "status"} entry is appended
+    to it per call. If on_event is given, it receives "tool_started" and "tool_finished" events as
+    each call starts and completes. Calls matching a speculative prefetch (services/prefetch.py)
+    use its result instead of running again, and are marked "prefetched" in tool_timings.
     """
     if not tool_calls:
         return messages
-        
-    for tool_call in tool_calls:
-        try:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            if function_name in ["geo_explorer", "climate_impact", "info_agent"]:
-                if "location" not in function_args or not function_args["location"]:
-                    function_args["location"] = default_location if default_location is not None else ""
-            
-            if function_name not in TOOL_FUNCTIONS:
-                tool_result = json.dumps({"error": f"Unknown function: {function_name}"})
-            else:
-                result = TOOL_FUNCTIONS[function_name](**function_args)
-                tool_result = json.dumps(result)
-                
-            messages.append({
-                "role": "tool",
-                "tool_call_id": tool_call.id,
-                "content": tool_result
-            })
-            
-        except Exception as e:
-            logger.error(f"Error executing function {function_name}: {str(e)}")
-            messages.append({
-                "role": "tool",
+
+    mode = mode or Config.TOOL_EXECUTION_MODE
+    if mode == "serial" or len(tool_calls) == 1:
+        outcomes = _execute_serial(tool_calls, default_location, on_event, prefetch)
+    else:
+        outcomes = _execute_concurrent(tool_calls, default_location, on_event, prefetch)
+
+    for tool_call, outcome in zip(tool_calls, outcomes):
+        messages.append({
+            "role": "tool",
+            "tool_call_id": tool_call.id,
+            "content": json.dumps(outcome["content"])
+        })
+        if tool_timings is not None:
+            tool_timings.append({
+                "tool": tool_call.function.name,
                 "tool_call_id": tool_call.id,
-                "content": json.dumps({"error": str(e)})
+                "wall_time": round(outcome["wall_time"], 4),
+                "status": outcome["status"],
+                "prefetched": outcome.get("prefetched", False)
             })
-            
+
     return messages
 
-def refine_response(client: OpenAI, technical_response: str) -> str:
+class _PooledTool:
+    """
+    A tool call submitted to a thread pool. The per-tool timeout counts from when a worker picks
+    the call up, so time spent queued behind other requests' calls is not held against it.
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, function_name: str, function_args: Dict[str, Any],
+                 notify: Optional[EventCallback] = None):
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None
+        self.future = executor.submit(contextvars.copy_context().run, self._run, function_name, function_args, notify)
+
+    def _run(self, function_name: str, function_args: Dict[str, Any], notify: Optional[EventCallback]) -> Dict[str, Any]:
+        self.started_at = time.monotonic()
+        self.started.set()
+        return _run_tool(function_name, function_args, notify)
+
+    def cancel(self) -> bool:
+        return self.future.cancel()
+
+    def result(self, overall_deadline: float) -> Dict[str, Any]:
+        """
+        The _run_tool result, waiting at most Config.TOOL_TIMEOUT after the call started and never
+        past overall_deadline. Raises concurrent.futures.TimeoutError when either runs out.
+        """
+        if not self.started.wait(timeout=max(0.0, overall_deadline - time.monotonic())):
+            raise FuturesTimeoutError()
+        deadline = min(self.started_at + Config.TOOL_TIMEOUT, overall_deadline)
+        return self.future.result(timeout=max(0.0, deadline - time.monotonic()))
+
+def _take_prefetched(prefetch: Optional[ToolPrefetch], function_name: str, function_args: Dict[str, Any],
+                     notify: Optional[EventCallback]) -> Optional[_PooledTool]:
+    """The prefetched call for a tool call, reporting it as started, or None."""
+    if prefetch is None:
+        return None
+    pooled = prefetch.take(function_name, function_args)
+    if pooled is not None:
+        _emit(notify, "tool_started", {"prefetched": True})
+    return pooled
+
+def _start_prefetch(function_name: str, function_args: Dict[str, Any]) -> Optional[_PooledTool]:
+    """Start a speculative tool call on the prefetch pool, or return None if all its workers are busy."""
+    if not _prefetch_slots.acquire(blocking=False):
+        return None
+    try:
+        pooled = _PooledTool(_prefetch_executor, function_name, function_args)
+    except Exception:
+        _prefetch_slots.release()
+        raise
+    pooled.future.add_done_callback(lambda _: _prefetch_slots.release())
+    return pooled
+
+def _submit_tool(tool_call, default_location: Optional[str], notify: Optional[EventCallback],
+                 prefetch: Optional[ToolPrefetch]) -> Tuple[_PooledTool, bool]:
+    """Start a tool call on the tool pool, or take its prefetch. Returns the call and whether it was prefetched."""
+    function_args = _prepare_tool_call(tool_call, default_location)
+    pooled = _take_prefetched(prefetch, tool_call.function.name, function_args, notify)
+    if pooled is not None:
+        return pooled, True
+    return _PooledTool(_tool_executor, tool_call.function.name, function_args, notify), False
+
+def _await_tool(tool_call, pooled: _PooledTool, prefetched: bool, notify: Optional[EventCallback],
+                submitted: float, overall_deadline: float) -> Dict[str, Any]:
+    """Wait for a pooled tool call and turn its result, timeout or error into an outcome."""
+    function_name = tool_call.function.name
+    try:
+        run = pooled.result(overall_deadline)
+        _emit(notify, "tool_finished", {"wall_time": round(run["wall_time"], 4), "status": run["status"]})
+        return {"content": run["result"], "wall_time": run["wall_time"], "status": run["status"], "prefetched": prefetched}
+    except FuturesTimeoutError:
+        pooled.cancel()
+        wall_time = time.monotonic() - (pooled.started_at or submitted)
+        logger.error(f"Function {function_name} timed out")
+        _emit(notify, "tool_finished", {"wall_time": round(wall_time, 4), "status": "timeout"})
+        return {"content": {"error": f"{function_name} timed out"}, "wall_time": wall_time, "status": "timeout"}
+    except Exception as e:
+        wall_time = time.monotonic() - (pooled.started_at or submitted)
+        logger.error(f"Error executing function {function_name}: {str(e)}")
+        _emit(notify, "tool_finished", {"wall_time": round(wall_time, 4), "status": "error"})
+        return {"content": {"error": str(e)}, "wall_time": wall_time, "status": "error"}
+
+def _submit_error(tool_call, notify: Optional[EventCallback], e: Exception) -> Dict[str, Any]:
+    logger.error(f"Error executing function {tool_call.function.name}: {str(e)}")
+    _emit(notify, "tool_finished", {"wall_time": 0.0, "status": "error"})
+    return {"content": {"error": str(e)}, "wall_time": 0.0, "status": "error"}
+
+def _execute_serial(tool_calls: List[Dict], default_location: Optional[str],
+                    on_event: Optional[EventCallback] = None, prefetch: Optional[ToolPrefetch] = None) -> List[Dict[str, Any]]:
+    """Run tool calls one after the other, enforcing per-tool and overall timeouts."""
+    overall_deadline = time.monotonic() + Config.TOOL_CALLS_TIMEOUT
+    outcomes = []
+    for tool_call in tool_calls:
+        notify = _tool_notifier(on_event, tool_call)
+        submitted = time.monotonic()
+        try:
+            pooled, prefetched = _submit_tool(tool_call, default_location, notify, prefetch)
+        except Exception as e:
+            outcomes.append(_submit_error(tool_call, notify, e))
+            continue
+        outcomes.append(_await_tool(tool_call, pooled, prefetched, notify, submitted, overall_deadline))
+    return outcomes
+
+def _execute_concurrent(tool_calls: List[Dict], default_location: Optional[str],
+                        on_event: Optional[EventCallback] = None, prefetch: Optional[ToolPrefetch] = None) -> List[Dict[str, Any]]:
+    """Run tool calls in parallel on the shared tool pool, enforcing per-tool and overall timeouts."""
+    submitted = time.monotonic()
+    overall_deadline = submitted + Config.TOOL_CALLS_TIMEOUT
+    notifiers = [_tool_notifier(on_event, tool_call) for tool_call in tool_calls]
+    calls = []
+    for tool_call, notify in zip(tool_calls, notifiers):
+        try:
+            calls.append(_submit_tool(tool_call, default_location, notify, prefetch))
+        except Exception as e:
+            calls.append(e)
+
+    outcomes = []
+    for tool_call, call, notify in zip(tool_calls, calls, notifiers):
+        if isinstance(call, Exception):
+            outcomes.append(_submit_error(tool_call, notify, call))
+        else:
+            pooled, prefetched = call
+            outcomes.append(_await_tool(tool_call, pooled, prefetched, notify, submitted, overall_deadline))
+    return outcomes
+
+def _add_usage(totals: Dict[str, int], usage) -> None:
+    """Accumulate an OpenAI usage object into a running per-request total."""
+    totals["llm_calls"] += 1
+    if usage is None:
+        return
+    totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+    totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    totals["total_tokens"] += getattr(usage, "total_tokens", 0) or 0
+
+def _collect_stream(response, on_token: Callable[[str], None], usage: Optional[Dict[str, int]] = None) -> str:
+    """Forward the text deltas of a streamed completion to on_token and return the full text."""
+    parts = []
+    stream_usage = None
+    for chunk in response:
+        if getattr(chunk, "usage", None) is not None:
+            stream_usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            on_token(delta)
+    if usage is not None:
+        _add_usage(usage, stream_usage)
+    return "".join(parts)
+
+def refine_response(client: OpenAI, technical_response: str, on_token: Optional[Callable[[str], None]] = None,
+                    usage: Optional[Dict[str, int]] = None) -> str:
     """
     Convert a technical response into a friendly, conversational answer with suggestions and links.
+    If on_token is given, the answer is streamed and each text delta is passed to it as it arrives.
+    If usage is given, the call's token counts are added to it.
     """
     refine_prompt = f"""Please convert the following technical response into a friendly, concise, and conversational answer.
 Include helpful suggestions and relevant links for further exploration, but avoid unnecessary technical details.
@@ -170,113 +492,300 @@ Include helpful suggestions and relevant links for further exploration, but avoi
 Response:
 {technical_response}"""
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You are a friendly assistant that reformats technical content into engaging, easy-to-understand language with suggestions and links."},
-            {"role": "user", "content": refine_prompt}
-        ],
-        temperature=0.7
-    )
-    refined = response.choices[0].message.content
-    return refined
-
-def generate_llm_response(message: str, coordinates: Optional[Dict[str, Any]] = None, model: str = "gpt-4o") -> Dict[str, Any]:
+    stream_kwargs = {"stream": True, "stream_options": {"include_usage": True}} if on_token is not None else {}
+    with metrics.span("llm.refine"):
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": "You are a friendly assistant that reformats technical content into engaging, easy-to-understand language with suggestions and links."},
+                {"role": "user", "content": refine_prompt}
+            ],
+            temperature=0.7,
+            **stream_kwargs
+        )
+        if on_token is not None:
+            return _collect_stream(response, on_token, usage)
+    if usage is not None:
+        _add_usage(usage, getattr(response, "usage", None))
+    return response.choices[0].message.content
+
+def _record_response_mode(mode: str, latency: float, usage: Dict[str, int]) -> None:
+    with _mode_stats_lock:
+        stats = _mode_stats.setdefault(mode, {"requests": 0, "latency_seconds": 0.0, "prompt_tokens": 0,
+                                              "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0,
+                                              "tokens_saved": 0})
+        stats["requests"] += 1
+        stats["latency_seconds"] += latency
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens", "llm_calls", "tokens_saved"):
+            stats[key] += usage[key]
+
+def response_mode_stats() -> Dict[str, Dict[str, Any]]:
+    """Per response mode totals and averages of latency, token usage and LLM calls."""
+    with _mode_stats_lock:
+        result = {}
+        for mode, stats in _mode_stats.items():
+            requests_count = stats["requests"] or 1
+            result[mode] = {
+                **stats,
+                "avg_latency_seconds": round(stats["latency_seconds"] / requests_count, 4),
+                "avg_total_tokens": round(stats["total_tokens"] / requests_count, 1),
+                "avg_llm_calls": round(stats["llm_calls"] / requests_count, 2)
+            }
+        return result
+
+def parse_request_coordinates(coordinates: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    """
+    Extract (lat, lon) from the chat request's coordinates payload.
+
+    Returns None when no coordinates were sent; raises ValueError when they are malformed.
+    """
+    if not coordinates or "coordinates" not in coordinates:
+        return None
+    coord_value = coordinates['coordinates']['coordinates']
+    if isinstance(coord_value, list):
+        coord_str = ",".join(map(str, coord_value))
+    else:
+        coord_str = str(coord_value)
+    lat_str, lon_str = coord_str.split(",")
+    return float(lat_str.strip()), float(lon_str.strip())
+
+def request_zoom(coordinates: Optional[Dict[str, Any]]) -> Optional[float]:
+    """The map zoom of the chat request's coordinates payload, or None."""
+    try:
+        return float(coordinates["zoom"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _load_tiles(centers: List[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Tile cache loader: location name, country info and weather of tile centers. Weather for all
+    tiles comes from one multi-location request. Places without a name (open sea) are stored
+    with location_name None so they are not retried; other failures leave the tile unloaded.
+    """
+    try:
+        forecasts, _ = climate_impact.get_forecasts(centers)
+    except Exception as e:
+        logger.warning(f"Weather for {len(centers)} prefetched tiles failed: {e}")
+        forecasts = [None] * len(centers)
+    hour = climate_impact.forecast_hour()
+    entries = []
+    for (lat, lon), forecast in zip(centers, forecasts):
+        entry = {"location_name": None, "weather": forecast, "weather_hour": hour if forecast is not None else None}
+        try:
+            name = reverse_geocode(lat, lon)
+            location_info, country = geo_explorer.describe_place(name)
+            entry.update(location_name=name, location=location_info, country=list(country))
+        except ValueError:
+            pass
+        except Exception as e:
+            logger.warning(f"Reverse geocoding prefetched tile {lat},{lon} failed: {e}")
+            entry = None
+        entries.append(entry)
+    return entries
+
+TILES.set_loader(_load_tiles)
+
+def build_system_message(location_name: str, coordinates: Optional[Dict[str, Any]], response_mode: str) -> str:
+    """System prompt with the user's resolved location and, in fast mode, the answer style instructions."""
+    coord_text = f"at coordinates {coordinates['coordinates']['coordinates']} (zoom {coordinates['zoom']})" if coordinates else ""
+    system_message = f"""You are a geospatial AI assistant specialized in providing friendly, concise, and useful location-based information.
+The user is located in '{location_name}' {coord_text}.
+
+When responding, please:
+- Provide clear, succinct answers.
+- Include helpful suggestions and links where relevant.
+- Focus on delivering the most important information first.
+- Use a friendly and conversational tone.
+
+Use the geo_explorer tool for geographical details, the climate_impact tool for weather data, the climate_history tool for past climate and normals, the info_agent tool for regional history, culture, and cuisine,
+and the nearby_places tool for restaurants, shops, sights and other places near a location.
+If you can answer directly, avoid unnecessary technical details."""
+    if response_mode == "fast":
+        system_message += "\n\n" + FAST_MODE_STYLE_INSTRUCTIONS
+    return system_message
+
+def assistant_message(response_message) -> Dict[str, Any]:
+    """Conversation entry for an assistant reply, preserving any tool_calls."""
+    if hasattr(response_message, "tool_calls") and response_message.tool_calls:
+        return {
+            "role": response_message.role,
+            "content": response_message.content or "",
+            "tool_calls": response_message.tool_calls
+        }
+    return {"role": response_message.role, "content": response_message.content or ""}
+
+def finish_response(text: str, response_message, coordinates: Optional[Dict[str, Any]], tool_timings: List[Dict],
+                    response_mode: str, model: str, started: float, usage: Dict[str, int]) -> Dict[str, Any]:
+    """Record per-mode latency and token metrics and build the chat response payload."""
+    latency = time.monotonic() - started
+    _record_response_mode(response_mode, latency, usage)
+    metrics.record_token_usage(model, response_mode, usage)
+    metrics.SPAN_DURATION.observe(latency, span="llm.pipeline", status="ok")
+    logger.info(f"Response mode {response_mode}: {latency:.2f}s, {usage['llm_calls']} LLM calls, {usage['total_tokens']} tokens "
+                f"({usage['tokens_saved']} saved by the token budget)")
+    
+    return {
+        "text": text,
+        "tool_usage": [t.function.name for t in response_message.tool_calls] if hasattr(response_message, "tool_calls") and response_message.tool_calls else [],
+        "analysis": coordinates if coordinates else {},
+        "tool_timings": tool_timings,
+        "response_mode": response_mode,
+        "latency": round(latency, 4),
+        "usage": usage,
+        "cached": False
+    }
+
+def new_usage() -> Dict[str, int]:
+    return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "llm_calls": 0, "tokens_saved": 0}
+
+def answer_cache_key(message: str, coordinates: Optional[Dict[str, Any]], model: str, response_mode: str) -> Tuple[str, ...]:
+    """Answer cache key of a chat request; malformed coordinates are keyed as "no position"."""
+    try:
+        point = parse_request_coordinates(coordinates)
+    except (ValueError, KeyError, TypeError):
+        point = None
+    return answerCache.answer_key(message, point, coordinates, model, response_mode)
+
+def serve_cached_answer(cached: Dict[str, Any], coordinates: Optional[Dict[str, Any]], on_event: Optional[EventCallback],
+                        started: float) -> Dict[str, Any]:
+    """Finish a request from the answer cache: hand the text to the listener and report no LLM usage."""
+    cached.update(analysis=coordinates if coordinates else {}, tool_timings=[],
+                  latency=round(time.monotonic() - started, 4), usage=new_usage())
+    if cached.get("text"):
+        _emit(on_event, "token", {"text": cached["text"]})
+    logger.info(f"Answer cache hit ({cached['cache_age']}s old)")
+    return cached
+
+def generate_llm_response(message: str, coordinates: Optional[Dict[str, Any]] = None, model: str = "gpt-4o",
+                          on_event: Optional[EventCallback] = None, response_mode: Optional[str] = None,
+                          use_cache: bool = True) -> Dict[str, Any]:
     """
     End-to-end processing with tool calling. Resolves the location name using coordinates,
     injects it into the system prompt, processes tool calls, and finally refines the output
-    into a friendly and informative response.
+    into a friendly and informative response. Obvious single-tool questions about the user's
+    position skip the tool-planning completion (see services/intentRouter.py).
     
     Args:
         message: User's query text.
         coordinates: Optional location details, e.g., {"coordinates": {"coordinates": [lat,lon], "zoom": zoom_level}}.
         model: OpenAI model to use.
+        on_event: Optional progress listener called as on_event(event, data) for "location_resolved",
+            "tool_started", "tool_finished" and "token" events. When set, the final answer is streamed.
+        response_mode: "polished" (default, see Config.DEFAULT_RESPONSE_MODE) restyles the answer with an
+            extra refine_response call; "fast" puts the style instructions in the system prompt and
+            returns the model's answer directly, saving one LLM round trip.
+        use_cache: Serve and store the answer in the answer cache (services/answerCache.py); pass
+            False to always run the pipeline.
     
     Returns:
-        A dict containing the final refined response text and additional metadata.
+        A dict containing the final refined response text and additional metadata, including the
+        response_mode, its latency, the token usage of all LLM calls (with the prompt tokens the
+        token budget saved, see services/tokenBudget.py) and whether it was "cached".
     """
+    prefetch = None
     try:
+        started = time.monotonic()
+        response_mode = response_mode or Config.DEFAULT_RESPONSE_MODE
+        if response_mode not in RESPONSE_MODES:
+            raise ValueError(f"Unknown response mode: {response_mode}")
+        cache_key = None
+        if use_cache and Config.ANSWER_CACHE_ENABLED:
+            cache_key = answer_cache_key(message, coordinates, model, response_mode)
+            cached = answerCache.lookup(cache_key)
+            if cached is not None:
+                return serve_cached_answer(cached, coordinates, on_event, started)
+        usage = new_usage()
         client = get_openai_client()
         
         # Resolve the location name from the coordinates.
         location_name = "Unknown location"
-        if coordinates and "coordinates" in coordinates:
-            coord_value = coordinates['coordinates']['coordinates']
-            if isinstance(coord_value, list):
-                coord_str = ",".join(map(str, coord_value))
-            else:
-                coord_str = str(coord_value)
-            try:
-                lat_str, lon_str = coord_str.split(",")
-                lat, lon = float(lat_str.strip()), float(lon_str.strip())
-                location_name = reverse_geocode(lat, lon)
+        point = None
+        try:
+            point = parse_request_coordinates(coordinates)
+            if point is not None:
+                # Warms the point's tile and its neighbours for the agents. The prompt names the user's own
+                # point, not the tile center, so it is always geocoded (a cached lookup after the first).
+                TILES.get(*point, request_zoom(coordinates))
+                with metrics.span("llm.reverse_geocode"):
+                    location_name = reverse_geocode(*point)
                 logger.info(f"Reverse geocoded location: {location_name}")
-            except Exception as e:
-                logger.warning(f"Failed to reverse geocode coordinates: {e}")
-        
-        # Create system message with instructions.
-        coord_text = f"at coordinates {coordinates['coordinates']['coordinates']} (zoom {coordinates['zoom']})" if coordinates else ""
-        system_message = f"""You are a geospatial AI assistant specialized in providing friendly, concise, and useful location-based information.
-The user is located in '{location_name}' {coord_text}.
-
-When responding, please:
-- Provide clear, succinct answers.
-- Include helpful suggestions and links where relevant.
-- Focus on delivering the most important information first.
-- Use a friendly and conversational tone.
-
-Use the geo_explorer tool for geographical details, the climate_impact tool for weather data, and the info_agent tool for regional history, culture, and cuisine.
-If you can answer directly, avoid unnecessary technical details."""
+        except Exception as e:
+            logger.warning(f"Failed to reverse geocode coordinates: {e}")
+        _emit(on_event, "location_resolved", {"location": location_name})
         
         messages = [
-            {"role": "system", "content": system_message},
+            {"role": "system", "content": build_system_message(location_name, coordinates, response_mode)},
             {"role": "user", "content": message}
         ]
         
-        # First API call: Get the initial response with potential tool calls.
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            tools=TOOLS,
-            tool_choice="auto",
-            temperature=0.7
-        )
-        
-        response_message = response.choices[0].message
+        # Obvious single-tool questions are routed locally; otherwise the first API call
+        # gets the initial response with potential tool calls, while the tools the model is
+        # likely to ask for are prefetched for the clicked point.
+        response_message = intentRouter.route_intent(message, location_name, point)
+        if response_message is None:
+            if point is not None and Config.PREFETCH_ENABLED:
+                prefetch = ToolPrefetch(location_name, point, _start_prefetch)
+            with metrics.span("llm.first_completion"):
+                response = client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    tools=TOOLS,
+                    tool_choice="auto",
+                    temperature=0.7
+                )
+            _add_usage(usage, getattr(response, "usage", None))
+            response_message = response.choices[0].message
         
         # Append the assistant's response, preserving any tool_calls.
-        if hasattr(response_message, "tool_calls") and response_message.tool_calls:
-            messages.append({
-                "role": response_message.role,
-                "content": response_message.content or "",
-                "tool_calls": response_message.tool_calls
-            })
-        else:
-            messages.append({"role": response_message.role, "content": response_message.content or ""})
+        messages.append(assistant_message(response_message))
         
+        on_token = (lambda text: _emit(on_event, "token", {"text": text})) if on_event else None
+        streamed = False
+
         # If tool calls are present, execute them.
+        tool_timings = []
         if hasattr(response_message, "tool_calls") and response_message.tool_calls:
-            messages = execute_tool_calls(response_message.tool_calls, messages, default_location=location_name)
-            
-            # Make a second API call with the updated conversation history.
-            final_response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=0.7
-            )
+            messages = execute_tool_calls(response_message.tool_calls, messages, default_location=location_name,
+                                          tool_timings=tool_timings, on_event=on_event, prefetch=prefetch)
+            apply_token_budget(messages, model, usage)
             
-            final_message = final_response.choices[0].message
+            # Make a second API call with the updated conversation history. In fast mode this is
+            # the final answer, so it is streamed straight to the listener.
+            if response_mode == "fast" and on_token is not None:
+                with metrics.span("llm.second_completion"):
+                    final_response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.7,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    final_text = _collect_stream(final_response, on_token, usage)
+                streamed = True
+            else:
+                with metrics.span("llm.second_completion"):
+                    final_response = client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        temperature=0.7
+                    )
+                _add_usage(usage, getattr(final_response, "usage", None))
+                final_text = final_response.choices[0].message.content
         else:
-            final_message = response_message
-        
-        # Refine the final technical response into a friendly, informative answer.
-        refined_text = refine_response(client, final_message.content)
+            final_text = response_message.content
         
-        return {
-            "text": refined_text,
-            "tool_usage": [t.function.name for t in response_message.tool_calls] if hasattr(response_message, "tool_calls") and response_message.tool_calls else [],
-            "analysis": coordinates if coordinates else {}
-        }
+        if response_mode == "polished":
+            # Refine the final technical response into a friendly, informative answer.
+            text = refine_response(client, final_text, on_token=on_token, usage=usage)
+        else:
+            text = final_text or ""
+            if on_token is not None and not streamed and text:
+                on_token(text)
+
+        result = finish_response(text, response_message, coordinates, tool_timings, response_mode, model, started, usage)
+        if cache_key is not None:
+            answerCache.store(cache_key, result)
+        return result
     
     except Exception as e:
         logger.error(f"End-to-end processing failed: {str(e)}")
@@ -284,3 +793,19 @@ If you can answer directly, avoid unnecessary technical details."""
             "text": "I'm having trouble with that request. Please try rephrasing or ask about something else.",
             "error": str(e)
         }
+    finally:
+        if prefetch is not None:
+            prefetch.finish()
+
+def _collect_pipeline_metrics():
+    stats = response_mode_stats()
+    yield ("geoai_response_mode_requests_total", "counter", "Chat responses generated, per response mode.",
+           [({"mode": mode}, mode_stats["requests"]) for mode, mode_stats in stats.items()])
+    yield ("geoai_response_mode_llm_calls_total", "counter", "LLM calls made, per response mode.",
+           [({"mode": mode}, mode_stats["llm_calls"]) for mode, mode_stats in stats.items()])
+    weather = climate_impact.cache_stats()
+    yield ("geoai_weather_cache_lookups_total", "counter", "Weather cache lookups by result.",
+           [({"result": result}, weather[result]) for result in ("fresh", "stale", "miss")])
+    yield ("geoai_weather_cache_size", "gauge", "Grid cells held in the weather cache.", [({}, weather["size"])])
+
+metrics.REGISTRY.register_collector(_collect_pipeline_metrics)
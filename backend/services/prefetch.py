@@ -0,0 +1,103 @@
+"""
+Speculative tool prefetch for chat requests.
+
+Most chats about a clicked point end up calling the weather and location tools for exactly
+that point, but the pipeline only learns this after the first completion. A ToolPrefetch starts
+those tool calls (Config.PREFETCH_TOOLS) as soon as the location is resolved, so they run while
+the first completion is in flight. When the model then asks for one of them with the same
+coordinates, execute_tool_calls takes the prefetched result instead of starting a new call.
+
+Prefetches the model did not ask for are cancelled if they have not started yet; ones already
+running finish in the background and leave their upstream data in the agents' caches. A start
+function may decline a prefetch (returning None) when it has no capacity, which is counted as
+skipped. Every prefetch is counted as a hit or unused, and every tool call that had no usable
+prefetch as a miss (geoai_prefetch_total).
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.config import Config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Model-supplied coordinates within this many degrees of the clicked point match a prefetch.
+COORDINATE_TOLERANCE = 1e-4
+
+PREFETCHES = metrics.REGISTRY.counter(
+    "geoai_prefetch_total",
+    "Speculative tool prefetches by result (hit/unused/skipped) and tool calls without one (miss).",
+    ("tool", "result"))
+
+_stats = {"hit": 0, "unused": 0, "skipped": 0, "miss": 0}
+_stats_lock = threading.Lock()
+
+def _parse_point(coordinates: Any) -> Optional[Tuple[float, float]]:
+    try:
+        lat, lon = str(coordinates).split(",")
+        return float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+
+class ToolPrefetch:
+    """The speculative tool calls of one request, started with start(name, arguments)."""
+
+    def __init__(self, location_name: str, point: Tuple[float, float], start: Callable[[str, Dict[str, Any]], Any]):
+        """
+        Args:
+            location_name: Resolved name of the clicked point, passed as the tools' location.
+            point: The clicked (lat, lon).
+            start: Starts a tool call and returns a handle with cancel(): a pooled call from
+                llmService or an asyncio task, resolving to the {"result", "wall_time"} dict
+                of _run_tool / _arun_tool. Returns None to skip the prefetch.
+        """
+        self.point = point
+        self.arguments = {"location": location_name, "coordinates": f"{point[0]},{point[1]}"}
+        self._pending: Dict[str, Any] = {}
+        for tool in Config.PREFETCH_TOOLS:
+            try:
+                handle = start(tool, dict(self.arguments))
+            except Exception as e:
+                logger.warning(f"Prefetch of {tool} failed to start: {e}")
+                continue
+            if handle is None:
+                _record(tool, "skipped")
+            else:
+                self._pending[tool] = handle
+
+    def take(self, tool: str, function_args: Dict[str, Any]) -> Optional[Any]:
+        """The prefetched call for a tool call with matching coordinates, or None (a miss)."""
+        future = self._pending.get(tool)
+        requested = _parse_point(function_args.get("coordinates"))
+        if future is not None and requested is not None and all(
+                abs(a - b) <= COORDINATE_TOLERANCE for a, b in zip(requested, self.point)):
+            del self._pending[tool]
+            _record(tool, "hit")
+            return future
+        _record(tool, "miss")
+        return None
+
+    def finish(self) -> None:
+        """Cancel (or leave to warm the caches) the prefetches the model did not use."""
+        for tool, future in self._pending.items():
+            future.cancel()
+            _record(tool, "unused")
+        self._pending.clear()
+
+def _record(tool: str, result: str) -> None:
+    PREFETCHES.inc(tool=tool, result=result)
+    with _stats_lock:
+        _stats[result] += 1
+
+def prefetch_stats() -> Dict[str, Any]:
+    """Prefetch hits, unused and skipped prefetches, tool calls without a prefetch, and the hit rate of prefetches."""
+    with _stats_lock:
+        started = _stats["hit"] + _stats["unused"]
+        return {**_stats, "hit_rate": round(_stats["hit"] / started, 4) if started else 0.0}
+
+def _collect_prefetch_metrics():
+    yield ("geoai_prefetch_hit_rate", "gauge", "Share of speculative tool prefetches used by the model.",
+           [({}, prefetch_stats()["hit_rate"])])
+
+metrics.REGISTRY.register_collector(_collect_prefetch_metrics)
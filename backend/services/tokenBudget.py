@@ -0,0 +1,186 @@
+"""
+Prompt token budget for tool results, applied between execute_tool_calls and the next completion.
+
+Tool messages carry the agents' full responses: InfoAgent alone returns up to three Wikipedia
+intro extracts, once in "text" and again in "metadata". apply_token_budget() rewrites each tool
+message so the model gets only what it answers from:
+
+- "text", deduplicated and, when over the tool's budget (TOOL_BUDGETS), cut down extractively:
+  each paragraph keeps its leading sentences in proportion to its share of the text;
+- "suggestions" that are links the answer may cite (UI actions such as "get_weather" are dropped);
+- "error" when the tool failed.
+
+Tokens are counted with tiktoken when it is installed and its encoding loads, otherwise estimated
+from the text length.
+The tokens saved are added to the request's usage and to geoai_prompt_tokens_saved_total.
+"""
+import json
+import logging
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from config.config import Config
+from utils import metrics
+
+try:
+    import tiktoken
+except ImportError:  # optional: token counts fall back to an estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+TOOL_BUDGETS = {
+    "geo_explorer": Config.TOKEN_BUDGET_GEO,
+    "climate_impact": Config.TOKEN_BUDGET_WEATHER,
+    "info_agent": Config.TOKEN_BUDGET_INFO,
+}
+
+# Chat formatting overhead per message, as counted by the OpenAI API.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Links beyond this many are not worth their tokens.
+MAX_SUGGESTIONS = 3
+
+# A paragraph's first sentence is kept whole up to this size even when its share is smaller,
+# so short headings and one-line facts are never cut mid-sentence.
+MIN_SENTENCE_TOKENS = 40
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+
+TOKENS_SAVED = metrics.REGISTRY.counter(
+    "geoai_prompt_tokens_saved_total", "Prompt tokens removed from tool results by the token budget.", ("tool",))
+
+@lru_cache(maxsize=16)
+def _encoding(model: str):
+    """The tiktoken encoding of model, or None if tiktoken is missing or cannot load it."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # tiktoken downloads the BPE files on first use, which fails on offline or sandboxed hosts.
+        # The failure is cached with the result, so this is logged (and attempted) once per model.
+        logger.warning(f"tiktoken encoding for {model} unavailable, estimating token counts: {e}")
+        return None
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Tokens in text for model; about four characters per token without a tiktoken encoding."""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+def message_tokens(message: Dict[str, Any], model: str = "gpt-4o") -> int:
+    """Tokens a chat message adds to the prompt."""
+    return MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content") or "", model)
+
+def _truncate_words(sentence: str, budget: int, model: str) -> str:
+    words = sentence.split()
+    while len(words) > 1 and count_tokens(" ".join(words) + " ...", model) > budget:
+        words = words[:max(1, len(words) * 3 // 4)]
+    return " ".join(words) + " ..."
+
+def compact_text(text: str, budget: int, model: str = "gpt-4o") -> str:
+    """
+    Cut text down to about budget tokens, extractively.
+
+    Repeated sentences are dropped. If the text is still over budget, every paragraph keeps its
+    leading sentences (Wikipedia intros and the agents' summaries put the key facts first) up to
+    a share of the budget proportional to its length, so each aspect stays represented.
+    """
+    seen = set()
+    paragraphs = []
+    for paragraph in text.split("\n\n"):
+        sentences = []
+        for sentence in SENTENCE_BOUNDARY.split(paragraph.strip()):
+            key = sentence.strip().casefold()
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(sentence.strip())
+        if sentences:
+            paragraphs.append(sentences)
+
+    compacted = "\n\n".join(" ".join(sentences) for sentences in paragraphs)
+    total = count_tokens(compacted, model)
+    if total <= budget:
+        return compacted
+
+    kept = []
+    for sentences in paragraphs:
+        share = max(1, budget * count_tokens(" ".join(sentences), model) // total)
+        chosen, used = [], 0
+        for sentence in sentences:
+            tokens = count_tokens(sentence, model) + 1
+            if used + tokens > (share if chosen else max(share, MIN_SENTENCE_TOKENS)):
+                break
+            chosen.append(sentence)
+            used += tokens
+        if not chosen:
+            chosen = [_truncate_words(sentences[0], max(share, MIN_SENTENCE_TOKENS), model)]
+        kept.append(" ".join(chosen))
+    return "\n\n".join(kept)
+
+def compact_tool_result(content: Any, budget: int, model: str = "gpt-4o") -> Any:
+    """The parts of an agent response the model needs, with its text within budget."""
+    if not isinstance(content, dict) or "text" not in content:
+        return content
+    compacted = {"text": compact_text(str(content.get("text") or ""), budget, model)}
+    suggestions = [s for s in content.get("suggestions") or []
+                   if isinstance(s, dict) and str(s.get("action", "")).startswith(("http://", "https://"))]
+    if suggestions:
+        compacted["suggestions"] = suggestions[:MAX_SUGGESTIONS]
+    error = (content.get("metadata") or {}).get("error") or content.get("error")
+    if error:
+        compacted["error"] = error
+    return compacted
+
+def _tool_names(messages: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Tool name per tool_call_id, from the assistant messages' tool calls."""
+    names = {}
+    for message in messages:
+        for tool_call in message.get("tool_calls") or []:
+            if isinstance(tool_call, dict):
+                names[tool_call["id"]] = tool_call["function"]["name"]
+            else:
+                names[tool_call.id] = tool_call.function.name
+    return names
+
+def apply_token_budget(messages: List[Dict[str, Any]], model: str = "gpt-4o",
+                       usage: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+    """
+    Compact the tool messages in messages in place.
+
+    Returns:
+        dict: prompt_tokens_before and prompt_tokens_after (estimates for the whole conversation)
+        and tokens_saved, which is also added to usage when given.
+    """
+    before = sum(message_tokens(message, model) for message in messages)
+    if Config.TOKEN_BUDGET_ENABLED:
+        names = _tool_names(messages)
+        for message in messages:
+            if message.get("role") != "tool":
+                continue
+            tool = names.get(message.get("tool_call_id"), "")
+            try:
+                content = json.loads(message["content"])
+            except (TypeError, ValueError):
+                continue
+            original = count_tokens(message["content"], model)
+            budget = TOOL_BUDGETS.get(tool, Config.TOKEN_BUDGET_DEFAULT)
+            message["content"] = json.dumps(compact_tool_result(content, budget, model), ensure_ascii=False)
+            TOKENS_SAVED.inc(max(0, original - count_tokens(message["content"], model)), tool=tool)
+    after = sum(message_tokens(message, model) for message in messages)
+
+    saved = max(0, before - after)
+    if usage is not None:
+        usage["tokens_saved"] = usage.get("tokens_saved", 0) + saved
+    if saved:
+        logger.info(f"Token budget: prompt {before} -> {after} tokens ({saved} saved)")
+    return {"prompt_tokens_before": before, "prompt_tokens_after": after, "tokens_saved": saved}
@@ -0,0 +1,115 @@
+"""
+Weather grids for map viewports.
+
+weather_grid() samples a map viewport on a regular lattice, gets the forecasts of all lattice
+points through ClimateImpactAgent.get_forecasts (cached grid cells plus one Open-Meteo
+multi-location request for the rest) and returns them as a columnar payload: one flat,
+row-major array per field, south to north and west to east, ready for an overlay layer.
+
+Lattice points are multiples of a step that is WEATHER_CACHE_RESOLUTION times a power of two,
+so they are independent of the exact viewport: panning or zooming reuses every cell that
+stays in view, and grids at different zoom levels share the cells of the coarser lattice.
+"""
+import logging
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Payload field -> (Open-Meteo section, variable, index into daily series or None).
+GRID_FIELDS = {
+    "temperature": ("current", "temperature_2m", None),
+    "humidity": ("current", "relative_humidity_2m", None),
+    "wind_speed": ("current", "wind_speed_10m", None),
+    "weather_code": ("current", "weather_code", None),
+    "temperature_max": ("daily", "temperature_2m_max", 0),
+    "temperature_min": ("daily", "temperature_2m_min", 0),
+}
+
+GRID_UNITS = {
+    "temperature": "°C", "humidity": "%", "wind_speed": "km/h", "weather_code": "wmo code",
+    "temperature_max": "°C", "temperature_min": "°C",
+}
+
+def grid_step(south: float, west: float, north: float, east: float, zoom: float, rows: int, cols: int,
+              resolution: float) -> float:
+    """
+    Lattice spacing in degrees for a viewport.
+
+    The spacing is the smallest resolution * 2**k that keeps the viewport within rows x cols
+    points and is no finer than Config.WEATHER_GRID_POINTS_PER_TILE points per map tile at zoom.
+    """
+    wanted = max((north - south) / max(rows - 1, 1), (east - west) / max(cols - 1, 1),
+                 360 / 2 ** max(zoom, 0) / Config.WEATHER_GRID_POINTS_PER_TILE, resolution)
+    return resolution * 2 ** max(0, math.ceil(math.log2(wanted / resolution) - 1e-9))
+
+def _axis(low: float, high: float, step: float) -> np.ndarray:
+    """Lattice coordinates within [low, high], or the one nearest the middle if none fall inside."""
+    first, last = math.ceil(low / step - 1e-9), math.floor(high / step + 1e-9)
+    if last < first:
+        first = last = round((low + high) / 2 / step)
+    return np.arange(first, last + 1) * step
+
+def grid_axes(south: float, west: float, north: float, east: float, step: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Latitudes and longitudes of the lattice points in a viewport (west > east crosses the antimeridian)."""
+    if east < west:
+        east += 360
+    lats = np.clip(_axis(south, north, step), -90, 90)
+    lons = (_axis(west, east, step) + 180) % 360 - 180
+    return lats, lons
+
+def decode_forecasts(forecasts: List[Optional[Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """One float array per GRID_FIELDS entry, NaN where a point has no forecast or value."""
+    def value(forecast, section, variable, day):
+        found = (forecast or {}).get(section, {}).get(variable)
+        if day is not None:
+            found = found[day] if isinstance(found, list) and len(found) > day else None
+        return np.nan if found is None else found
+
+    return {
+        field: np.array([value(forecast, section, variable, day) for forecast in forecasts], dtype=np.float64)
+        for field, (section, variable, day) in GRID_FIELDS.items()
+    }
+
+def _column(values: np.ndarray, decimals: int) -> List[Optional[float]]:
+    rounded = np.round(values, decimals)
+    return [None if math.isnan(v) else (int(v) if decimals == 0 else v) for v in rounded.tolist()]
+
+def weather_grid(agent, south: float, west: float, north: float, east: float, zoom: float,
+                 rows: Optional[int] = None, cols: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Current weather sampled over a viewport.
+
+    Args:
+        agent (ClimateImpactAgent): Agent whose forecast cache and Open-Meteo client are used.
+        south, west, north, east: Viewport bounds in degrees.
+        zoom: Map zoom level.
+        rows, cols: Maximum grid size, Config.WEATHER_GRID_ROWS x Config.WEATHER_GRID_COLS by default.
+
+    Returns:
+        dict: {"step", "shape", "lats", "lons", "fields", "units", "cache"}, where each field is a
+        flat row-major list of len(lats) * len(lons) values (None where no data is available).
+    """
+    rows = rows or Config.WEATHER_GRID_ROWS
+    cols = cols or Config.WEATHER_GRID_COLS
+    step = grid_step(south, west, north, east if east >= west else east + 360, zoom, rows, cols, agent.resolution)
+    lats, lons = grid_axes(south, west, north, east, step)
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+    points = list(zip(lat_grid.ravel().tolist(), lon_grid.ravel().tolist()))
+
+    forecasts, cache_counts = agent.get_forecasts(points)
+    fields = decode_forecasts(forecasts)
+    logger.info(f"Weather grid {len(lats)}x{len(lons)} at step {step}: {cache_counts}")
+    return {
+        "step": step,
+        "shape": [len(lats), len(lons)],
+        "lats": _column(lats, 6),
+        "lons": _column(lons, 6),
+        "fields": {field: _column(values, 0 if field == "weather_code" else 1) for field, values in fields.items()},
+        "units": GRID_UNITS,
+        "cache": cache_counts,
+    }
@@ -0,0 +1,47 @@
+import asyncio
+
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from agents.geoExplorerAgent import GeoExplorerAgent
+from services import answerCache, asyncLlmService, llmService
+
+def _tool_call(name):
+    return ChatCompletionMessageToolCall.model_validate({
+        "id": f"call_{name}", "type": "function",
+        "function": {"name": name, "arguments": '{"location": "Paris"}'}})
+
+def _answer(tool_timings):
+    return {"text": "Paris is the capital of France.", "tool_usage": [t["tool"] for t in tool_timings],
+            "tool_timings": tool_timings}
+
+def _failing_lookup(location, coordinates=None):
+    # Agents report upstream failures as a normal response with metadata.error.
+    return GeoExplorerAgent._error_response(location, RuntimeError("429 Too Many Requests"))
+
+def test_agent_error_answers_are_not_cached(monkeypatch):
+    monkeypatch.setitem(llmService.TOOL_FUNCTIONS, "geo_explorer", _failing_lookup)
+    tool_timings = []
+    llmService.execute_tool_calls([_tool_call("geo_explorer")], [], tool_timings=tool_timings)
+    assert tool_timings[0]["status"] == "error"
+
+    key = ("agent error", "-", "-", "gpt-4o", "fast")
+    answerCache.store(key, _answer(tool_timings))
+    assert answerCache.lookup(key) is None
+
+def test_async_agent_error_answers_are_not_cached(monkeypatch):
+    async def failing_lookup(location, coordinates=None):
+        return _failing_lookup(location, coordinates)
+
+    monkeypatch.setitem(asyncLlmService.ASYNC_TOOL_FUNCTIONS, "geo_explorer", failing_lookup)
+    tool_timings = []
+    asyncio.run(asyncLlmService.aexecute_tool_calls([_tool_call("geo_explorer")], [], tool_timings=tool_timings))
+    assert tool_timings[0]["status"] == "error"
+
+    key = ("async agent error", "-", "-", "gpt-4o", "fast")
+    answerCache.store(key, _answer(tool_timings))
+    assert answerCache.lookup(key) is None
+
+def test_successful_answers_are_cached():
+    key = ("successful", "-", "-", "gpt-4o", "fast")
+    answerCache.store(key, _answer([{"tool": "geo_explorer", "status": "ok"}]))
+    assert answerCache.lookup(key)["cached"] is True
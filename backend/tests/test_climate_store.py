@@ -0,0 +1,131 @@
+import logging
+
+import numpy as np
+import pytest
+
+from utils.climateStore import ClimateStore, compute_aggregates, parse_archive
+
+VARIABLES = ["temperature_2m_mean", "precipitation_sum"]
+
+def _daily(start, end, temperature=10.0, precipitation=1.0):
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    return days, np.array([np.full(len(days), temperature), np.full(len(days), precipitation)])
+
+def test_leap_years_and_month_lengths():
+    days, daily = _daily("2019-01-01", "2021-12-31")
+    arrays, meta = compute_aggregates("2019-01-01", daily, VARIABLES, (2019, 2021), 0.8)
+    assert arrays["annual"][1].tolist() == [365, 366, 365]
+    assert arrays["annual"][0].tolist() == [10, 10, 10]
+    february_2019, february_2020 = 1, 13
+    assert arrays["monthly"][1, february_2019] == 28
+    assert arrays["monthly"][1, february_2020] == 29
+    assert meta["first_year"] == 2019 and meta["end"] == "2021-12-31"
+
+def test_century_years_are_not_leap_unless_divisible_by_400():
+    _, daily = _daily("1900-01-01", "1900-12-31")
+    arrays, _ = compute_aggregates("1900-01-01", daily, VARIABLES, (1900, 1900), 0.8)
+    assert arrays["annual"][1].tolist() == [365]
+    _, daily = _daily("2000-01-01", "2000-12-31")
+    arrays, _ = compute_aggregates("2000-01-01", daily, VARIABLES, (2000, 2000), 0.8)
+    assert arrays["annual"][1].tolist() == [366]
+
+def test_totals_are_scaled_up_for_missing_days():
+    _, daily = _daily("2020-01-01", "2020-01-31", precipitation=2.0)
+    daily[1, :3] = np.nan
+    daily[0, :3] = np.nan
+    arrays, _ = compute_aggregates("2020-01-01", daily, VARIABLES, (2020, 2020), 0.8)
+    # 28 of 31 days: the total is the daily mean over the full month, the mean is unaffected.
+    assert arrays["monthly"][1, 0] == pytest.approx(62)
+    assert arrays["monthly"][0, 0] == pytest.approx(10)
+
+def test_months_below_coverage_are_missing():
+    _, daily = _daily("2020-01-01", "2020-02-29")
+    daily[:, :10] = np.nan  # January keeps 21 of 31 days, below 80%
+    arrays, _ = compute_aggregates("2020-01-01", daily, VARIABLES, (2020, 2020), 0.8)
+    assert np.isnan(arrays["monthly"][:, 0]).all()
+    assert arrays["monthly"][1, 1] == 29
+    # The partial year is below coverage too.
+    assert np.isnan(arrays["annual"]).all()
+
+def test_normals_use_the_configured_period_when_covered():
+    days, daily = _daily("2018-01-01", "2021-12-31")
+    daily[0] = np.where(days.astype("datetime64[Y]").astype(int) + 1970 == 2020, 12.0, 10.0)
+    arrays, meta = compute_aggregates("2018-01-01", daily, VARIABLES, (2020, 2021), 0.8)
+    assert meta["normals_period"] == [2020, 2021]
+    assert arrays["normals"][0] == pytest.approx(np.full(12, 11.0))
+    assert arrays["normals"][1, 1] == pytest.approx(28.5)  # February: 29 days in 2020, 28 in 2021
+    assert arrays["annual_anomalies"][0] == pytest.approx([-1, -1, 1, -1])
+    assert arrays["monthly_anomalies"][0, 24] == pytest.approx(1)  # January 2020
+
+def test_normals_fall_back_to_the_whole_series_outside_the_period():
+    _, daily = _daily("2019-01-01", "2020-12-31")
+    arrays, meta = compute_aggregates("2019-01-01", daily, VARIABLES, (1961, 1990), 0.8)
+    assert meta["normals_period"] == [2019, 2020]
+    assert not np.isnan(arrays["normals"]).any()
+    assert arrays["annual_anomalies"][0] == pytest.approx([0, 0])
+
+def test_parse_archive_maps_nulls_to_nan():
+    start, series = parse_archive({"daily": {"time": ["2020-01-01", "2020-01-02"],
+                                             "temperature_2m_mean": [1.5, None], "precipitation_sum": [0, 2]}})
+    assert start == "2020-01-01"
+    assert series["temperature_2m_mean"][0] == 1.5 and np.isnan(series["temperature_2m_mean"][1])
+    assert np.isnan(series["temperature_2m_max"]).all()
+    with pytest.raises(ValueError):
+        parse_archive({"daily": {}})
+
+def test_ingest_and_history_round_trip(tmp_path):
+    store = ClimateStore(str(tmp_path), cell_size=0.25)
+    days, daily = _daily("2019-01-01", "2020-12-31", precipitation=1.0)
+    cell = store.ingest(48.86, 2.35, "2019-01-01", dict(zip(VARIABLES, daily)))
+    assert store.cell(48.8, 2.4) is cell
+    assert (cell.lat, cell.lon) == (48.875, 2.375)
+    history = cell.history("2020-02-01", "2020-02-29")
+    assert history["range"]["days"] == 29
+    assert history["range"]["precipitation_sum"]["total"] == 29
+    assert history["monthly"]["months"] == ["2020-02"]
+    assert history["annual"]["values"]["precipitation_sum"] == [365, 366]
+    # Re-ingesting replaces the cell.
+    store.ingest(48.86, 2.35, "2020-01-01", {"precipitation_sum": np.full(366, 2.0)})
+    assert store.cell(48.86, 2.35).history()["annual"]["values"]["precipitation_sum"] == [732]
+
+def test_climate_history_errors_name_their_caller(caplog):
+    from agents.climateImpactAgent import ClimateImpactAgent
+    with caplog.at_level(logging.ERROR):
+        response = ClimateImpactAgent().get_climate_history("", None)
+    assert "error" in response["metadata"]
+    assert response["text"].startswith("Error fetching climate history")
+    assert "Error in get_climate_history" in caplog.text
+
+def test_history_of_a_new_cell_is_ingested_in_the_background(tmp_path, monkeypatch):
+    import threading
+    from agents import climateImpactAgent
+    from utils import climateStore
+
+    monkeypatch.setattr(climateStore, "_store", ClimateStore(str(tmp_path), cell_size=0.25))
+    release, requests = threading.Event(), []
+
+    class Archive:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            days = [str(day) for day in np.arange(np.datetime64("2019-01-01"), np.datetime64("2020-12-31") + 1)]
+            return {"daily": {"time": days, "precipitation_sum": [1.0] * len(days)}}
+
+    def get(url, **kwargs):
+        requests.append(url)
+        release.wait(5)
+        return Archive()
+
+    monkeypatch.setattr(climateImpactAgent.httpClient, "get", get)
+    agent = climateImpactAgent.ClimateImpactAgent()
+    pending = agent.get_climate_history("Paris", "48.86,2.35")
+    assert pending["metadata"]["pending"] is True and "error" in pending["metadata"]
+    assert agent.get_climate_history("Paris", "48.86,2.35")["metadata"]["pending"] is True
+    release.set()
+    agent._ingest_executor.shutdown(wait=True)
+
+    assert len(requests) == 1
+    history = agent.get_climate_history("Paris", "48.86,2.35")
+    assert "error" not in history["metadata"]
+    assert history["metadata"]["history"]["annual"]["values"]["precipitation_sum"] == [365, 366]
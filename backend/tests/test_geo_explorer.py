@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from agents import geoExplorerAgent
+from utils.countryIndex import CountryIndex
+
+FRANCE = {"common_name": "France", "official_name": "French Republic", "cca2": "FR", "cca3": "FRA",
+          "population": 67391582, "capital": ["Paris"], "languages": ["French"], "timezones": ["UTC+01:00"]}
+
+GREENLAND = [{"name": {"common": "Greenland", "official": "Greenland"}, "population": 56367, "capital": ["Nuuk"],
+              "languages": {"kal": "Greenlandic"}, "timezones": ["UTC-04:00"]}]
+
+class Response:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setattr(geoExplorerAgent, "get_country_index", lambda: CountryIndex([FRANCE]))
+    return geoExplorerAgent.GeoExplorerAgent()
+
+def test_indexed_countries_do_not_reach_the_api(agent, monkeypatch):
+    monkeypatch.setattr(geoExplorerAgent.httpClient, "get", lambda url: pytest.fail(f"unexpected request {url}"))
+    assert agent._country_info("france") == (67391582, "Paris", "French", "UTC+01:00")
+
+def test_countries_missing_from_the_index_fall_back_to_the_api(agent, monkeypatch):
+    requests = []
+    monkeypatch.setattr(geoExplorerAgent.httpClient, "get",
+                        lambda url: requests.append(url) or Response(200, GREENLAND))
+    assert agent._country_info("Greenland") == (56367, "Nuuk", "Greenlandic", "UTC-04:00")
+    assert agent._country_info("greenland") == (56367, "Nuuk", "Greenlandic", "UTC-04:00")
+    assert len(requests) == 1
+
+def test_unknown_names_are_remembered_but_failures_are_retried(agent, monkeypatch):
+    responses = iter([Response(429), Response(404), Response(200, GREENLAND)])
+    requests = []
+    monkeypatch.setattr(geoExplorerAgent.httpClient, "get", lambda url: requests.append(url) or next(responses))
+    unknown = ("Unknown", "Unknown", "Unknown", "Unknown")
+    assert agent._country_info("Atlantis") == unknown  # rate limited, not remembered
+    assert agent._country_info("Atlantis") == unknown  # 404, remembered
+    assert agent._country_info("Atlantis") == unknown
+    assert len(requests) == 2
+
+def test_async_fallback(agent, monkeypatch):
+    async def get(url):
+        return Response(200, GREENLAND)
+
+    monkeypatch.setattr(geoExplorerAgent.asyncHttpClient, "get", get)
+    assert asyncio.run(agent._acountry_info("Greenland")) == (56367, "Nuuk", "Greenlandic", "UTC-04:00")
@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+from urllib3 import HTTPResponse
+
+from config.config import Config
+from utils import asyncHttpClient, httpClient
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+
+    async def sleep(seconds):
+        waited.append(seconds)
+
+    monkeypatch.setattr(asyncHttpClient.asyncio, "sleep", sleep)
+    monkeypatch.setattr(Config, "HTTP_RETRIES", 2)
+    return waited
+
+def _serve(monkeypatch, handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(asyncHttpClient, "get_client", lambda: client)
+
+def test_retry_after_is_capped(monkeypatch, sleeps):
+    _serve(monkeypatch, lambda request: httpx.Response(429, headers={"Retry-After": "3600"}))
+    response = asyncio.run(asyncHttpClient.get("http://upstream.test/"))
+    assert response.status_code == 429
+    assert sleeps == [Config.HTTP_BACKOFF_MAX, Config.HTTP_BACKOFF_MAX]
+
+def test_last_transport_error_is_raised(monkeypatch, sleeps):
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    _serve(monkeypatch, refuse)
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(asyncHttpClient.get("http://upstream.test/"))
+    assert len(sleeps) == 2 and all(seconds <= Config.HTTP_BACKOFF_MAX for seconds in sleeps)
+
+def test_recovers_after_a_retry(monkeypatch, sleeps):
+    statuses = iter([503, 200])
+    _serve(monkeypatch, lambda request: httpx.Response(next(statuses), json={"ok": True}))
+    assert asyncio.run(asyncHttpClient.get("http://upstream.test/")).json() == {"ok": True}
+    assert len(sleeps) == 1
+
+def test_sync_retry_after_is_capped():
+    retry = httpClient._Retry(total=2, respect_retry_after_header=True)
+    response = HTTPResponse(status=429, headers={"Retry-After": "3600"})
+    assert retry.get_retry_after(response) == Config.HTTP_BACKOFF_MAX
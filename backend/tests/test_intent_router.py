@@ -0,0 +1,61 @@
+import pytest
+
+from services.intentRouter import classify
+
+@pytest.mark.parametrize("message", [
+    "weather in london",
+    "what is the temperature in paris",
+    "Weather in London",
+    "forecast for new york",
+    "weather in the uk",
+    "history of rawalpindi",
+])
+def test_other_places_skip_the_fast_route(message):
+    tool, confidence, reason = classify(message)
+    assert (confidence, reason) == (0.0, "other_place")
+
+@pytest.mark.parametrize("message, tool", [
+    ("weather here", "climate_impact"),
+    ("what's the weather like here tomorrow", "climate_impact"),
+    ("weather in the morning", "climate_impact"),
+    ("history of this place", "info_agent"),
+    ("history of the area", "info_agent"),
+    ("where am i", "geo_explorer"),
+])
+def test_questions_about_the_current_position_match(message, tool):
+    assert classify(message) == (tool, 1.0, "matched")
+
+@pytest.mark.parametrize("message", [
+    "climate normals here",
+    "how was the climate last year here",
+    "climate anomalies in the past decade",
+])
+def test_climate_history_questions_reach_the_history_tool(message):
+    tool, confidence, _ = classify(message)
+    assert tool == "climate_history" and confidence >= 0.75
+
+@pytest.mark.parametrize("message", [
+    "what is the climate like here",
+    "was the weather warmer last year",
+    "temperature normals for this area",
+    "historical weather here",
+])
+def test_ambiguous_climate_questions_are_not_sent_to_the_forecast(message):
+    tool, confidence, _ = classify(message)
+    assert tool != "climate_impact" or confidence < 0.75
+
+@pytest.mark.parametrize("message", [
+    "restaurants nearby",
+    "where is the nearest pharmacy",
+    "any cafes around here",
+])
+def test_nearby_questions_reach_the_places_tool(message):
+    assert classify(message) == ("nearby_places", 1.0, "matched")
+
+@pytest.mark.parametrize("message", [
+    "any good food nearby",
+    "where can i eat around here",
+])
+def test_mixed_food_and_nearby_questions_are_not_sent_to_the_info_agent(message):
+    tool, confidence, _ = classify(message)
+    assert tool != "info_agent" or confidence < 0.75
@@ -0,0 +1,72 @@
+import math
+
+import numpy as np
+import pytest
+
+from agents.geoExplorerAgent import GeoExplorerAgent
+from utils.offlineGeocoder import KDTree, OfflineReverseGeocoder, chord_to_km, to_unit_vectors
+
+def _random_points(rng, n):
+    return to_unit_vectors(rng.uniform(-90, 90, n), rng.uniform(-180, 180, n))
+
+def _brute_force(points, queries):
+    d = np.sqrt(((points[None, :, :] - queries[:, None, :]) ** 2).sum(axis=2))
+    return d.argmin(axis=1), d.min(axis=1)
+
+@pytest.mark.parametrize("n", [1, 2, 16, 17, 1000])
+def test_kdtree_matches_brute_force(n):
+    rng = np.random.default_rng(n)
+    points = _random_points(rng, n)
+    queries = _random_points(rng, 500)
+    tree = KDTree(points, leaf_size=16)
+    expected_index, expected_distance = _brute_force(points, queries)
+
+    for query, index, distance in zip(queries, expected_index, expected_distance):
+        found, found_distance = tree.query(query)
+        assert found == index
+        assert found_distance == pytest.approx(distance)
+
+    found, found_distance = tree.query_batch(queries)
+    np.testing.assert_array_equal(found, expected_index)
+    np.testing.assert_allclose(found_distance, expected_distance)
+
+def test_kdtree_batch_handles_clusters_and_duplicates():
+    rng = np.random.default_rng(7)
+    cluster = to_unit_vectors(rng.normal(48.85, 0.01, 300), rng.normal(2.35, 0.01, 300))
+    points = np.vstack([cluster, cluster[:50], _random_points(rng, 200)])
+    queries = np.vstack([cluster[:20], _random_points(rng, 200)])
+    _, expected_distance = _brute_force(points, queries)
+    found, found_distance = KDTree(points, leaf_size=4).query_batch(queries)
+    np.testing.assert_allclose(found_distance, expected_distance)
+    np.testing.assert_allclose(np.sqrt(((points[found] - queries) ** 2).sum(axis=1)), expected_distance)
+
+def test_kdtree_empty():
+    tree = KDTree(np.empty((0, 3)))
+    assert tree.query(np.zeros(3)) == (-1, math.inf)
+    found, distance = tree.query_batch(np.zeros((2, 3)))
+    assert found.tolist() == [-1, -1]
+    assert np.isinf(distance).all()
+
+def _geocoder():
+    return OfflineReverseGeocoder(
+        lats=np.array([48.8566, 33.6844, -21.1151]), lons=np.array([2.3522, 73.0479, 55.5364]),
+        names=np.array(["Paris", "Islamabad", "Saint-Denis"], dtype=object),
+        admin_ids=np.array([1, 2, 0]), country_ids=np.array([1, 2, 3]),
+        admin_names=["", "Ile-de-France", "Islamabad Capital Territory"],
+        country_names=["", "France", "Pakistan", "Reunion"])
+
+def test_nearest_and_batch_agree():
+    geocoder = _geocoder()
+    lats, lons = [48.86, 33.7, -21.0], [2.35, 73.0, 55.5]
+    names, distances = geocoder.nearest_batch(lats, lons)
+    for lat, lon, name, distance in zip(lats, lons, names, distances):
+        assert geocoder.nearest(lat, lon) == (name, pytest.approx(distance))
+    assert names[0] == "Paris, Ile-de-France, France"
+    assert distances[0] < 2
+    assert float(chord_to_km(0.0)) == 0.0
+
+def test_display_name_without_region_keeps_country():
+    name = _geocoder().display_name(2)
+    assert name == "Saint-Denis, Reunion"
+    location = GeoExplorerAgent._parse_display_name(name)
+    assert (location["city"], location["state"], location["country"]) == ("Saint-Denis", "Unknown", "Reunion")
@@ -0,0 +1,21 @@
+import pytest
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "test")
+    from app import app, limiter
+    limiter.reset()
+    yield app.test_client()
+    limiter.reset()
+
+def test_route_limits_apply(client):
+    # Invalid queries are rejected before any lookup, but still count against the limit.
+    statuses = [client.get("/api/climate/history", query_string={"lat": "x"}).status_code for _ in range(31)]
+    assert statuses[:30] == [400] * 30
+    assert statuses[30] == 429
+
+def test_route_limits_can_be_turned_off(client, monkeypatch):
+    from config.config import Config
+    monkeypatch.setattr(Config, "RATELIMIT_ROUTE_LIMITS", False)
+    statuses = {client.get("/api/nearby", query_string={"lat": "x"}).status_code for _ in range(70)}
+    assert statuses == {400}
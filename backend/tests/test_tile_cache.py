@@ -0,0 +1,28 @@
+from utils.tileCache import TileCache, tile_center, tile_for
+
+def _cache(load_on_lookup, depth=1):
+    calls = []
+
+    def loader(centers):
+        calls.append(centers)
+        return [{"location_name": "x"} for _ in centers]
+
+    cache = TileCache(maxsize=100, ttl=60, max_bytes=1 << 20, workers=1, max_pending=64, depth=depth,
+                      load_on_lookup=load_on_lookup)
+    cache.set_loader(loader)
+    return cache, calls
+
+def test_lookups_load_the_tile_and_its_neighbours():
+    cache, calls = _cache(load_on_lookup=True)
+    assert cache.get(48.8566, 2.3522, 16) is None
+    cache._executor.shutdown(wait=True)
+    assert len(calls) == 1 and len(calls[0]) == 9
+    assert calls[0][0] == tile_center(tile_for(48.8566, 2.3522, 16))
+    assert cache.get(48.8566, 2.3522, 16) == {"location_name": "x"}
+
+def test_lookups_only_read_the_cache_when_loading_is_off():
+    cache, calls = _cache(load_on_lookup=False)
+    assert cache.get(48.8566, 2.3522, 16) is None
+    cache._executor.shutdown(wait=True)
+    assert calls == []
+    assert cache.stats()["miss"] == 1 and cache.stats()["pending"] == 0
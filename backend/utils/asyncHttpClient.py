@@ -0,0 +1,96 @@
+"""
+Async counterpart of utils/httpClient for the ASGI serving path.
+
+Each event loop gets one pooled httpx.AsyncClient with keep-alive connections, the same
+timeouts, retries with jittered backoff and metrics as the synchronous transport.
+"""
+import asyncio
+import logging
+import random
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.config import Config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_client() -> httpx.AsyncClient:
+    """Return the pooled client of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=Config.ASYNC_HTTP_MAX_CONNECTIONS,
+                                max_keepalive_connections=Config.HTTP_POOL_MAXSIZE * Config.HTTP_POOL_CONNECTIONS),
+            timeout=httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT),
+            headers={'User-Agent': Config.HTTP_USER_AGENT}
+        )
+        _clients[loop] = client
+    return client
+
+async def aclose() -> None:
+    """Close the running loop's client (call on application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def _backoff(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Seconds to wait before the next attempt: the upstream's Retry-After or a jittered backoff, at most Config.HTTP_BACKOFF_MAX."""
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), Config.HTTP_BACKOFF_MAX)
+    return min(Config.HTTP_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, Config.HTTP_BACKOFF_JITTER),
+               Config.HTTP_BACKOFF_MAX)
+
+async def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+              timeout: Optional[Union[float, Tuple[float, float]]] = None) -> httpx.Response:
+    """
+    Issue a GET through the loop's pooled client, retrying connection errors and 429/5xx responses.
+
+    Args:
+        url (str): Absolute URL.
+        params (dict, optional): Query string parameters.
+        headers (dict, optional): Extra headers.
+        timeout (float or tuple, optional): Overrides the configured timeout; a tuple is (connect, read).
+
+    Returns:
+        httpx.Response: The final response. Callers are expected to call raise_for_status().
+
+    Raises:
+        httpx.HTTPError: On connection errors or timeouts once retries are exhausted.
+    """
+    host = urlsplit(url).netloc
+    if isinstance(timeout, tuple):
+        timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+    request_kwargs = {'params': params, 'headers': headers}
+    if timeout is not None:
+        request_kwargs['timeout'] = timeout
+
+    delay, error = 0.0, None
+    for attempt in range(Config.HTTP_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(delay)
+        started = time.monotonic()
+        try:
+            response = await get_client().get(url, **request_kwargs)
+        except httpx.TransportError as e:
+            metrics.record_upstream(host, "error", time.monotonic() - started)
+            delay, error = _backoff(attempt, None), e
+            continue
+        metrics.record_upstream(host, response.status_code, time.monotonic() - started)
+        if response.status_code in RETRY_STATUSES and attempt < Config.HTTP_RETRIES:
+            delay = _backoff(attempt, response)
+            continue
+        return response
+    # Only a transport error on the last attempt gets here; a retryable status on it is returned above.
+    raise error
@@ -0,0 +1,154 @@
+"""
+Thread-safe in-memory LRU cache with per-entry TTL and an optional SQLite backing store.
+
+The SQLite store is write-through: every set() is persisted, and a memory miss falls back to
+the database so entries survive process restarts. Values must be JSON-serializable when a
+database path is configured.
+"""
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """LRU cache whose entries expire after a time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, db_path: Optional[str] = None, namespace: str = "default",
+                 max_bytes: Optional[int] = None, weigher: Optional[Callable[[Any], int]] = None):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept in memory.
+            ttl (float): Default time-to-live in seconds.
+            db_path (str, optional): SQLite file used as a persistent second level.
+            namespace (str): Namespace for this cache's rows in the shared SQLite table.
+            max_bytes (int, optional): Memory budget; least recently used entries are evicted
+                once the total weight of the entries exceeds it.
+            weigher (callable, optional): Size in bytes of a value, used with max_bytes.
+                Defaults to the length of its JSON encoding.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self._weigher = weigher or (lambda value: len(json.dumps(value, default=str)))
+        self._weights: Dict[Hashable, int] = {}
+        self._total_bytes = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._disk_hits = 0
+        self._evictions = 0
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.commit()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                self._remove(key)
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                    (self.namespace, str(key))
+                ).fetchone()
+                if row and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return value
+            self._misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (defaults to the cache's ttl)."""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                        (self.namespace, str(key), json.dumps(value), expires_at)
+                    )
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    logger.warning(f"Failed to persist cache entry {key}: {e}")
+
+    def _store(self, key: Hashable, value: Any, expires_at: float) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        if self.max_bytes is not None:
+            weight = self._weigher(value)
+            self._total_bytes += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self._total_bytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+            self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        del self._data[key]
+        self._total_bytes -= self._weights.pop(key, 0)
+
+    def purge_expired(self) -> int:
+        """Drop expired entries from memory and disk. Returns the number removed from memory."""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+                self._db.commit()
+        return len(expired)
+
+    def clear(self) -> None:
+        """Remove every entry, including persisted ones."""
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self._total_bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "bytes": self._total_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "disk_hits": self._disk_hits,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0
+            }
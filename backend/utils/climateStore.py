@@ -0,0 +1,368 @@
+"""
+Local store of historical daily climate series, one memory-mapped cell per grid cell.
+
+Each cell directory holds the daily series as one float32 .npy matrix of shape
+(variables, days), so every variable is a contiguous column, and the aggregates computed
+once at ingest time:
+
+    daily.npy              daily values
+    monthly.npy            monthly means (totals for precipitation), NaN for poorly covered months
+    monthly_anomalies.npy  monthly values minus the normal of their calendar month
+    annual.npy             annual means / totals
+    annual_anomalies.npy   annual values minus the annual normal
+    normals.npy            mean of each calendar month over the normals period
+    meta.json              start date, variables, cell center, normals period
+
+Queries open the arrays with mmap_mode="r", so a range or aggregate query reads only the
+slices it needs and answers in milliseconds without any archive API call.
+
+Series come from the Open-Meteo historical archive or from CSV files with a date column:
+
+    python -m utils.climateStore fetch 48.85 2.35 --start 1991-01-01
+    python -m utils.climateStore import-csv 48.85 2.35 --input paris.csv
+    python -m utils.climateStore query 48.85 2.35 --start 2023-01-01 --end 2023-12-31
+"""
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Open-Meteo daily variables kept per cell.
+VARIABLES = ("temperature_2m_mean", "temperature_2m_max", "temperature_2m_min", "precipitation_sum")
+
+# Aggregated as totals; all other variables are averaged.
+SUMMED = frozenset({"precipitation_sum"})
+
+# Cells kept open (their memmaps and metadata) between queries.
+OPEN_CELLS = 256
+
+def archive_url(lat: float, lon: float, start: str, end: str) -> str:
+    """Open-Meteo historical archive URL for the daily VARIABLES of a point."""
+    return (
+        f"{Config.OPEN_METEO_ARCHIVE_URL}/v1/archive?latitude={lat}&longitude={lon}"
+        f"&start_date={start}&end_date={end}&daily={','.join(VARIABLES)}&timezone=GMT"
+    )
+
+def default_ingest_range() -> Tuple[str, str]:
+    """Config.CLIMATE_INGEST_START to a week ago (the archive trails real time by a few days)."""
+    return Config.CLIMATE_INGEST_START, (date.today() - timedelta(days=7)).isoformat()
+
+def parse_archive(payload: Dict[str, Any]) -> Tuple[str, Dict[str, np.ndarray]]:
+    """(start date, {variable: daily values}) from an Open-Meteo archive response."""
+    daily = payload.get("daily") or {}
+    days = daily.get("time") or []
+    if not days:
+        raise ValueError("archive response has no daily series")
+    return days[0], {variable: np.array([np.nan if v is None else v for v in daily.get(variable) or [None] * len(days)],
+                                        dtype=np.float32)
+                     for variable in VARIABLES}
+
+def _calendar_days(first_month: np.datetime64, n_months: int) -> np.ndarray:
+    months = first_month + np.arange(n_months + 1)
+    return np.diff(months.astype("datetime64[D]")).astype(np.int64)
+
+def _group(values: np.ndarray, index: np.ndarray, length: int, expected: np.ndarray, summed: bool,
+           min_coverage: float) -> np.ndarray:
+    """Mean (or total, scaled up to the full period) of values per group, NaN below min_coverage."""
+    valid = ~np.isnan(values)
+    counts = np.bincount(index, weights=valid, minlength=length)
+    sums = np.bincount(index, weights=np.where(valid, values, 0.0), minlength=length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = sums / counts * (expected if summed else 1)
+    result[counts < expected * min_coverage] = np.nan
+    return result
+
+def compute_aggregates(start: str, daily: np.ndarray, variables: Sequence[str],
+                       normals_period: Tuple[int, int], min_coverage: float) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Monthly and annual aggregates, normals and anomalies of a (variables, days) matrix.
+
+    Returns:
+        tuple: (arrays by file name, metadata about their layout).
+    """
+    days = np.datetime64(start, "D") + np.arange(daily.shape[1])
+    months = days.astype("datetime64[M]")
+    years = days.astype("datetime64[Y]")
+    first_month, first_year = months[0], years[0]
+    month_index = (months - first_month).astype(np.int64)
+    year_index = (years - first_year).astype(np.int64)
+    n_months, n_years = int(month_index[-1]) + 1, int(year_index[-1]) + 1
+    month_days = _calendar_days(first_month, n_months)
+    year_days = np.array([366 if calendar_year % 4 == 0 and (calendar_year % 100 or calendar_year % 400 == 0) else 365
+                          for calendar_year in first_year.astype(int) + 1970 + np.arange(n_years)])
+
+    summed = [variable in SUMMED for variable in variables]
+    monthly = np.array([_group(daily[i].astype(np.float64), month_index, n_months, month_days, summed[i], min_coverage)
+                        for i in range(len(variables))])
+    annual = np.array([_group(daily[i].astype(np.float64), year_index, n_years, year_days, summed[i], min_coverage)
+                       for i in range(len(variables))])
+
+    month_numbers = (first_month.astype(np.int64) + np.arange(n_months)) % 12
+    month_years = (first_month.astype(np.int64) + np.arange(n_months)) // 12 + 1970
+    in_period = (month_years >= normals_period[0]) & (month_years <= normals_period[1])
+    if not in_period.any():
+        # The series does not reach the normals period: use everything it covers instead.
+        in_period = np.ones(n_months, dtype=bool)
+    used_years = month_years[in_period]
+    normals = np.full((len(variables), 12), np.nan)
+    with np.errstate(invalid="ignore"):
+        for month in range(12):
+            selected = monthly[:, in_period & (month_numbers == month)]
+            if selected.size:
+                counts = (~np.isnan(selected)).sum(axis=1)
+                normals[:, month] = np.where(counts > 0, np.nansum(selected, axis=1) / np.maximum(counts, 1), np.nan)
+    annual_normals = np.array([normals[i].sum() if summed[i] else normals[i].mean() for i in range(len(variables))])
+
+    arrays = {
+        "daily": daily.astype(np.float32),
+        "monthly": monthly.astype(np.float32),
+        "monthly_anomalies": (monthly - normals[:, month_numbers]).astype(np.float32),
+        "annual": annual.astype(np.float32),
+        "annual_anomalies": (annual - annual_normals[:, None]).astype(np.float32),
+        "normals": normals.astype(np.float32),
+    }
+    meta = {
+        "start": str(days[0]),
+        "end": str(days[-1]),
+        "first_month": str(first_month),
+        "first_year": int(str(first_year)),
+        "variables": list(variables),
+        "normals_period": [int(used_years.min()), int(used_years.max())],
+    }
+    return arrays, meta
+
+def _values(array: np.ndarray, decimals: int = 2) -> List[Optional[float]]:
+    return [None if math.isnan(v) else v for v in np.round(array.astype(np.float64), decimals).tolist()]
+
+class ClimateCell:
+    """The memory-mapped series and aggregates of one grid cell."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.lat, self.lon = meta["lat"], meta["lon"]
+        self.variables: List[str] = meta["variables"]
+        self.start = np.datetime64(meta["start"], "D")
+        self.end = np.datetime64(meta["end"], "D")
+        self.first_month = np.datetime64(meta["first_month"], "M")
+        self.first_year = meta["first_year"]
+        self.normals_period = meta["normals_period"]
+        for name in ("daily", "monthly", "monthly_anomalies", "annual", "annual_anomalies", "normals"):
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+
+    def _day_slice(self, start: np.datetime64, end: np.datetime64) -> slice:
+        first = max(0, int((start - self.start).astype(np.int64)))
+        last = min(self.daily.shape[1], int((end - self.start).astype(np.int64)) + 1)
+        return slice(first, max(first, last))
+
+    def summary(self, start: np.datetime64, end: np.datetime64) -> Dict[str, Any]:
+        """Mean (or total), minimum and maximum of each variable's daily values in [start, end]."""
+        selected = np.asarray(self.daily[:, self._day_slice(start, end)], dtype=np.float64)
+        result = {"days": int(selected.shape[1])}
+        for i, variable in enumerate(self.variables):
+            values = selected[i][~np.isnan(selected[i])]
+            if not len(values):
+                result[variable] = None
+                continue
+            result[variable] = {
+                "total" if variable in SUMMED else "mean": round(float(values.sum() if variable in SUMMED else values.mean()), 2),
+                "min": round(float(values.min()), 2),
+                "max": round(float(values.max()), 2),
+            }
+        return result
+
+    def history(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Normals, annual values and anomalies, and the monthly values and daily summary of a range.
+
+        Args:
+            start, end: ISO dates bounding the range; by default the last 365 days in the store.
+
+        Returns:
+            dict: Columnar payload ({variable: [values]} per section).
+        """
+        end_day = min(np.datetime64(end, "D"), self.end) if end else self.end
+        start_day = max(np.datetime64(start, "D"), self.start) if start else max(self.start, end_day - 364)
+        if start_day > end_day:
+            raise ValueError(f"No stored data between {start} and {end}; the store covers {self.start} to {self.end}")
+        first = max(0, int((start_day.astype("datetime64[M]") - self.first_month).astype(np.int64)))
+        last = int((end_day.astype("datetime64[M]") - self.first_month).astype(np.int64)) + 1
+        months = self.first_month + np.arange(first, last)
+        years = self.first_year + np.arange(self.annual.shape[1])
+        return {
+            "cell": {"lat": self.lat, "lon": self.lon},
+            "coverage": {"start": str(self.start), "end": str(self.end)},
+            "normals_period": self.normals_period,
+            "normals": {variable: _values(self.normals[i]) for i, variable in enumerate(self.variables)},
+            "annual": {
+                "years": years.tolist(),
+                "values": {variable: _values(self.annual[i]) for i, variable in enumerate(self.variables)},
+                "anomalies": {variable: _values(self.annual_anomalies[i]) for i, variable in enumerate(self.variables)},
+            },
+            "monthly": {
+                "months": [str(month) for month in months],
+                "values": {variable: _values(self.monthly[i, first:last]) for i, variable in enumerate(self.variables)},
+                "anomalies": {variable: _values(self.monthly_anomalies[i, first:last]) for i, variable in enumerate(self.variables)},
+            },
+            "range": {"start": str(start_day), "end": str(end_day), **self.summary(start_day, end_day)},
+        }
+
+class ClimateStore:
+    """Directory of ClimateCell directories keyed by grid cell."""
+
+    def __init__(self, root: str, cell_size: float = 0.25):
+        self.root = root
+        self.cell_size = cell_size
+        self._open: "OrderedDict[str, Optional[ClimateCell]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cell_center(self, lat: float, lon: float) -> Tuple[float, float]:
+        """Center of the grid cell containing a point."""
+        size = self.cell_size
+        return (round((math.floor(lat / size) + 0.5) * size, 4),
+                round((math.floor(((lon + 180) % 360 - 180) / size) + 0.5) * size, 4))
+
+    def cell_key(self, lat: float, lon: float) -> str:
+        return "{:.4f}_{:.4f}".format(*self.cell_center(lat, lon))
+
+    def cell(self, lat: float, lon: float) -> Optional[ClimateCell]:
+        """The stored cell containing a point, or None if it has not been ingested."""
+        key = self.cell_key(lat, lon)
+        with self._lock:
+            if key in self._open:
+                self._open.move_to_end(key)
+                return self._open[key]
+        path = os.path.join(self.root, key)
+        cell = ClimateCell(path) if os.path.exists(os.path.join(path, "meta.json")) else None
+        if cell is not None:
+            with self._lock:
+                self._open[key] = cell
+                while len(self._open) > OPEN_CELLS:
+                    self._open.popitem(last=False)
+        return cell
+
+    def ingest(self, lat: float, lon: float, start: str, series: Dict[str, Sequence[float]]) -> ClimateCell:
+        """
+        Store the daily series of the cell containing a point, replacing any previous data.
+
+        Args:
+            lat, lon: A point in the cell.
+            start: ISO date of the first value.
+            series: Daily values per variable (missing days as NaN); unknown variables are ignored.
+        """
+        variables = [variable for variable in VARIABLES if variable in series]
+        if not variables:
+            raise ValueError(f"No known variables in series; expected some of {', '.join(VARIABLES)}")
+        daily = np.array([np.asarray(series[variable], dtype=np.float32) for variable in variables])
+        arrays, meta = compute_aggregates(start, daily, variables, Config.CLIMATE_NORMALS_PERIOD,
+                                          Config.CLIMATE_MIN_COVERAGE)
+        meta["lat"], meta["lon"] = self.cell_center(lat, lon)
+
+        key = self.cell_key(lat, lon)
+        final = os.path.join(self.root, key)
+        staging = os.path.join(self.root, f".{key}.{os.getpid()}.{threading.get_ident()}")
+        os.makedirs(staging, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+        with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        # Swap the new directory in; readers with the old files mapped keep reading them.
+        retired = f"{staging}.old"
+        if os.path.exists(final):
+            os.replace(final, retired)
+        os.replace(staging, final)
+        shutil.rmtree(retired, ignore_errors=True)
+        with self._lock:
+            self._open.pop(key, None)
+        logger.info(f"Ingested {daily.shape[1]} days of {', '.join(variables)} into climate cell {key}")
+        return self.cell(lat, lon)
+
+    def ingest_csv(self, lat: float, lon: float, path: str) -> ClimateCell:
+        """Ingest a CSV with a "date" (or "time") column and one column per variable, one row per day."""
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise ValueError(f"{path} has no rows")
+        date_column = "date" if "date" in rows[0] else "time"
+        rows.sort(key=lambda row: row[date_column])
+        start = np.datetime64(rows[0][date_column][:10], "D")
+        offsets = np.array([(np.datetime64(row[date_column][:10], "D") - start).astype(np.int64) for row in rows])
+        series = {}
+        for variable in VARIABLES:
+            if variable not in rows[0]:
+                continue
+            values = np.full(int(offsets[-1]) + 1, np.nan, dtype=np.float32)
+            values[offsets] = [float(row[variable]) if row[variable] not in ("", None) else np.nan for row in rows]
+            series[variable] = values
+        return self.ingest(lat, lon, str(start), series)
+
+_store: Optional[ClimateStore] = None
+_store_lock = threading.Lock()
+
+def get_climate_store() -> ClimateStore:
+    """The store at Config.CLIMATE_STORE_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                os.makedirs(Config.CLIMATE_STORE_PATH, exist_ok=True)
+                _store = ClimateStore(Config.CLIMATE_STORE_PATH, Config.CLIMATE_CELL_DEGREES)
+    return _store
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Historical climate store tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fetch = subparsers.add_parser('fetch', help="Ingest a cell from the Open-Meteo historical archive")
+    import_csv = subparsers.add_parser('import-csv', help="Ingest a cell from a CSV of daily values")
+    import_csv.add_argument('--input', required=True)
+    query = subparsers.add_parser('query', help="Print the history of a stored cell as JSON")
+    for sub in (fetch, import_csv, query):
+        sub.add_argument('lat', type=float)
+        sub.add_argument('lon', type=float)
+    fetch.add_argument('--start', default=default_ingest_range()[0])
+    fetch.add_argument('--end', default=default_ingest_range()[1])
+    query.add_argument('--start')
+    query.add_argument('--end')
+    args = parser.parse_args(argv)
+
+    store = get_climate_store()
+    if args.command == 'fetch':
+        from utils import httpClient
+        center = store.cell_center(args.lat, args.lon)
+        response = httpClient.get(archive_url(*center, args.start, args.end), timeout=(Config.HTTP_CONNECT_TIMEOUT, 120))
+        response.raise_for_status()
+        cell = store.ingest(args.lat, args.lon, *parse_archive(response.json()))
+        print(f"Stored {cell.start} to {cell.end} in {cell.path}")
+    elif args.command == 'import-csv':
+        cell = store.ingest_csv(args.lat, args.lon, args.input)
+        print(f"Stored {cell.start} to {cell.end} in {cell.path}")
+    else:
+        cell = store.cell(args.lat, args.lon)
+        if cell is None:
+            print(f"No data stored for cell {store.cell_key(args.lat, args.lon)}", file=sys.stderr)
+            return 1
+        started = time.perf_counter()
+        history = cell.history(args.start, args.end)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(json.dumps(history, indent=2))
+        print(f"Answered in {elapsed:.2f} ms", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
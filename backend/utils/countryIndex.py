@@ -0,0 +1,148 @@
+"""
+Local country metadata index, replacing per-call REST Countries lookups.
+
+The index is a JSON list of compact country records loaded once per process. Rebuild it
+from a REST Countries v3.1 snapshot (or download a fresh one) with:
+
+    python -m utils.countryIndex refresh --snapshot restcountries-all.json
+    python -m utils.countryIndex refresh            # fetches restcountries.com/v3.1/all
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+REST_COUNTRIES_ALL_URL = f"{Config.REST_COUNTRIES_URL}/v3.1/all"
+REST_COUNTRIES_FIELDS = "name,cca2,cca3,altSpellings,population,capital,languages,currencies,timezones,flags"
+
+def _normalize(name: str) -> str:
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c)).casefold()
+    return re.sub(r'[^a-z0-9]+', ' ', name).strip()
+
+def compact_record(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a REST Countries v3.1 record to the fields the agents use."""
+    name = raw.get('name', {})
+    return {
+        "common_name": name.get('common', ''),
+        "official_name": name.get('official', ''),
+        "cca2": raw.get('cca2', ''),
+        "cca3": raw.get('cca3', ''),
+        "alt_spellings": raw.get('altSpellings', []),
+        "population": raw.get('population'),
+        "capital": raw.get('capital', []),
+        "languages": list(raw.get('languages', {}).values()),
+        "currencies": sorted(raw.get('currencies', {}).keys()),
+        "timezones": raw.get('timezones', []),
+        "flag": raw.get('flags', {}).get('png', '')
+    }
+
+class CountryIndex:
+    """In-memory lookup of country records by common name, official name or ISO code."""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self._by_code: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            for code in (record.get('cca2'), record.get('cca3')):
+                if code:
+                    self._by_code[code.upper()] = record
+            # Official and common names win over alternative spellings on collisions.
+            for name in record.get('alt_spellings', []):
+                self._by_name.setdefault(_normalize(name), record)
+        for record in records:
+            for name in (record.get('official_name'), record.get('common_name')):
+                if name:
+                    self._by_name[_normalize(name)] = record
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def load(cls, path: str) -> "CountryIndex":
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def lookup(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a country by ISO 3166 alpha-2/alpha-3 code, common name, official name or
+        alternative spelling. Matching is exact after case and accent folding.
+
+        Returns:
+            dict or None: The country record.
+        """
+        if not query or not query.strip():
+            return None
+        query = query.strip()
+        if len(query) in (2, 3) and query.isalpha():
+            record = self._by_code.get(query.upper())
+            if record is not None:
+                return record
+        return self._by_name.get(_normalize(query))
+
+_index: Optional[CountryIndex] = None
+_index_lock = threading.Lock()
+
+def get_country_index() -> CountryIndex:
+    """Return the process-wide index, loading Config.COUNTRY_INDEX_PATH on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = CountryIndex.load(Config.COUNTRY_INDEX_PATH)
+                    logger.info(f"Loaded {len(_index)} countries from {Config.COUNTRY_INDEX_PATH}")
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Country index unavailable, falling back to REST Countries: {e}")
+                    _index = CountryIndex([])
+    return _index
+
+def reload_country_index() -> CountryIndex:
+    """Reload the index from disk, e.g. after running the refresh command."""
+    global _index
+    with _index_lock:
+        _index = None
+    return get_country_index()
+
+def build_index(raw_records: List[Dict[str, Any]], out_path: str) -> int:
+    """Write a compact index built from REST Countries records. Returns the number of countries."""
+    records = sorted((compact_record(raw) for raw in raw_records), key=lambda r: r['cca3'])
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, out_path)
+    return len(records)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local country metadata index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    refresh = subparsers.add_parser('refresh', help="Rebuild the index from a REST Countries snapshot")
+    refresh.add_argument('--snapshot', help="REST Countries v3.1 JSON dump; downloaded when omitted")
+    refresh.add_argument('--out', default=Config.COUNTRY_INDEX_PATH, help="Index path to write")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        with open(args.snapshot, encoding='utf-8') as f:
+            raw_records = json.load(f)
+    else:
+        from utils import httpClient
+        response = httpClient.get(REST_COUNTRIES_ALL_URL, params={"fields": REST_COUNTRIES_FIELDS}, timeout=30)
+        response.raise_for_status()
+        raw_records = response.json()
+    count = build_index(raw_records, args.out)
+    print(f"Wrote {count} countries to {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
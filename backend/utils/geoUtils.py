@@ -1,41 +1,215 @@
 import requests
+import httpx
+from utils import httpClient, asyncHttpClient
+from utils.cache import TTLCache
+from utils.singleFlight import SingleFlight
+from utils.rateLimiter import TokenBucket
+from utils import metrics
+from config.config import Config
 import re
+import unicodedata
+
+_GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+NOMINATIM_SEARCH_URL = f'{Config.NOMINATIM_URL}/search'
+NOMINATIM_REVERSE_URL = f'{Config.NOMINATIM_URL}/reverse'
+
+# Forward lookups are keyed by the normalized query, reverse lookups by geohash cell.
+geocode_cache = TTLCache(maxsize=Config.GEOCODE_CACHE_SIZE, ttl=Config.GEOCODE_CACHE_TTL,
+                         db_path=Config.GEOCODE_CACHE_DB or None, namespace='geocode')
+reverse_geocode_cache = TTLCache(maxsize=Config.GEOCODE_CACHE_SIZE, ttl=Config.GEOCODE_CACHE_TTL,
+                                 db_path=Config.GEOCODE_CACHE_DB or None, namespace='reverse_geocode')
+
+# Concurrent cache misses for the same key share one upstream lookup.
+geocode_flight = SingleFlight('nominatim_search')
+reverse_geocode_flight = SingleFlight('nominatim_reverse')
+
+# Every Nominatim request in this process (routes, chats, batches, tile prefetch) takes a token
+# first, so together they stay within the Nominatim usage policy. The bucket is per process:
+# with several server workers, divide NOMINATIM_RATE_LIMIT among them.
+nominatim_bucket = TokenBucket(rate=Config.NOMINATIM_RATE_LIMIT, capacity=1)
+
+def _nominatim_slot():
+    """Wait for a Nominatim token, giving up after Config.NOMINATIM_MAX_WAIT seconds."""
+    if not nominatim_bucket.acquire(timeout=Config.NOMINATIM_MAX_WAIT):
+        raise Exception('Geocoding service busy: Nominatim rate limit reached')
+
+async def _anominatim_slot():
+    """Async variant of _nominatim_slot."""
+    if not await nominatim_bucket.aacquire(timeout=Config.NOMINATIM_MAX_WAIT):
+        raise Exception('Geocoding service busy: Nominatim rate limit reached')
+
 def validate_coordinates(lat, lon):
     try:
         lat, lon = float(lat), float(lon)
         return -90 <= lat <= 90 and -180 <= lon <= 180
     except ValueError:
         return False
-    
-def geocode_location(location):
-    # Check if input is coordinates
+
+def geohash_encode(lat, lon, precision=7):
+    """
+    Encode a point as a geohash string.
+
+    Args:
+        lat (float): Latitude.
+        lon (float): Longitude.
+        precision (int): Number of base32 characters (7 ~ 150 m, 6 ~ 1.2 km, 5 ~ 5 km cells).
+
+    Returns:
+        str: The geohash of the cell containing the point.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+def normalize_query(location):
+    """Normalize a free-text location for use as a cache key."""
+    location = unicodedata.normalize('NFKC', location).casefold()
+    return re.sub(r'\s+', ' ', location).strip(' ,')
+
+def _parse_coordinate_literal(location):
+    """Return {'lat', 'lon'} if location is a "lat,lon" literal, None if it is a place name."""
     coord_match = re.match(r'^([-+]?\d+\.?\d*)[,\s]+([-+]?\d+\.?\d*)$', location)
     if coord_match:
         lat, lon = coord_match.groups()
         if validate_coordinates(lat, lon):
             return {'lat': float(lat), 'lon': float(lon)}
         raise ValueError('Invalid coordinates range')
+    return None
+
+def _offline_reverse_geocode(lat, lon):
+    if Config.REVERSE_GEOCODER != 'offline':
+        return None
+    from utils.offlineGeocoder import offline_reverse_geocode
+    return offline_reverse_geocode(float(lat), float(lon))
 
-    # Geocode via Nominatim
+def _nominatim_search(location, key):
+    """Look a place name up on Nominatim and cache the result under key."""
+    _nominatim_slot()
     try:
-        response = requests.get(
-            'https://nominatim.openstreetmap.org/search',
+        response = httpClient.get(
+            NOMINATIM_SEARCH_URL,
             params={'q': location, 'format': 'json', 'limit': 1, 'accept-language': 'en'},
-            headers={'User-Agent': 'Geospatial-AI-App'},
             timeout=5
         )
         response.raise_for_status()
         data = response.json()
         if not data:
             raise ValueError('Location not found')
-        return {'lat': float(data[0]['lat']), 'lon': float(data[0]['lon'])}
+        result = {'lat': float(data[0]['lat']), 'lon': float(data[0]['lon'])}
+        geocode_cache.set(key, result)
+        return result
     except requests.RequestException as e:
         raise Exception(f'Geocoding service error: {str(e)}')
 
+async def _anominatim_search(location, key):
+    """Async variant of _nominatim_search."""
+    await _anominatim_slot()
+    try:
+        response = await asyncHttpClient.get(
+            NOMINATIM_SEARCH_URL,
+            params={'q': location, 'format': 'json', 'limit': 1, 'accept-language': 'en'},
+            timeout=5
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            raise ValueError('Location not found')
+        result = {'lat': float(data[0]['lat']), 'lon': float(data[0]['lon'])}
+        geocode_cache.set(key, result)
+        return result
+    except httpx.HTTPError as e:
+        raise Exception(f'Geocoding service error: {str(e)}')
+
+def _reverse_lookup(lat, lon, key):
+    """Resolve a point offline or on Nominatim and cache it under key. Returns (name, source)."""
+    name = _offline_reverse_geocode(lat, lon)
+    if name:
+        reverse_geocode_cache.set(key, name)
+        return name, 'offline'
+
+    _nominatim_slot()
+    try:
+        response = httpClient.get(
+            NOMINATIM_REVERSE_URL,
+            params={'lat': lat, 'lon': lon, 'format': 'json', 'accept-language': 'en'},
+            timeout=5
+        )
+        response.raise_for_status()
+        data = response.json()
+        if 'display_name' in data:
+            reverse_geocode_cache.set(key, data['display_name'])
+            return data['display_name'], 'nominatim'
+        else:
+            raise ValueError('No location found for the given coordinates')
+    except requests.RequestException as e:
+        raise Exception(f'Reverse geocoding service error: {str(e)}')
+
+async def _areverse_lookup(lat, lon, key):
+    """Async variant of _reverse_lookup."""
+    name = _offline_reverse_geocode(lat, lon)
+    if name:
+        reverse_geocode_cache.set(key, name)
+        return name, 'offline'
+
+    await _anominatim_slot()
+    try:
+        response = await asyncHttpClient.get(
+            NOMINATIM_REVERSE_URL,
+            params={'lat': lat, 'lon': lon, 'format': 'json', 'accept-language': 'en'},
+            timeout=5
+        )
+        response.raise_for_status()
+        data = response.json()
+        if 'display_name' in data:
+            reverse_geocode_cache.set(key, data['display_name'])
+            return data['display_name'], 'nominatim'
+        else:
+            raise ValueError('No location found for the given coordinates')
+    except httpx.HTTPError as e:
+        raise Exception(f'Reverse geocoding service error: {str(e)}')
+
+def geocode_location(location):
+    # Check if input is coordinates
+    literal = _parse_coordinate_literal(location)
+    if literal is not None:
+        return literal
+
+    with metrics.span('geo.geocode') as span:
+        key = normalize_query(location)
+        cached = geocode_cache.get(key)
+        if cached is not None:
+            span['cache'] = 'hit'
+            return dict(cached)
+
+        # Geocode via Nominatim; concurrent misses for the same query share one request.
+        span['cache'] = 'miss'
+        return dict(geocode_flight.do(key, lambda: _nominatim_search(location, key)))
+
 
 def reverse_geocode(lat, lon):
     """
     Reverse geocode latitude and longitude to a human-readable location name.
+
+    Results are cached per geohash cell (Config.GEOCODE_CACHE_PRECISION), so nearby
+    points resolve without another Nominatim round trip, and concurrent misses for the
+    same cell share one lookup. With REVERSE_GEOCODER=offline the local gazetteer is tried
+    first, and Nominatim is only used when the nearest place is farther than
+    Config.OFFLINE_GEOCODER_MAX_DISTANCE_KM.
     
     Args:
         lat (float): Latitude.
@@ -51,23 +225,62 @@ def reverse_geocode(lat, lon):
     if not validate_coordinates(lat, lon):
         raise ValueError('Invalid coordinates')
 
-    try:
-        response = requests.get(
-            'https://nominatim.openstreetmap.org/reverse',
-            params={'lat': lat, 'lon': lon, 'format': 'json', 'accept-language': 'en'},
-            headers={'User-Agent': 'Geospatial-AI-App'},
-            timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
-        if 'display_name' in data:
-            return data['display_name']
-        else:
-            raise ValueError('No location found for the given coordinates')
-    except requests.RequestException as e:
-        raise Exception(f'Reverse geocoding service error: {str(e)}')
+    with metrics.span('geo.reverse_geocode') as span:
+        key = geohash_encode(float(lat), float(lon), Config.GEOCODE_CACHE_PRECISION)
+        cached = reverse_geocode_cache.get(key)
+        if cached is not None:
+            span['cache'] = 'hit'
+            return cached
+
+        name, span['source'] = reverse_geocode_flight.do(key, lambda: _reverse_lookup(lat, lon, key))
+        return name
+
+async def async_geocode_location(location):
+    """Async variant of geocode_location for the ASGI serving path; shares the same cache."""
+    literal = _parse_coordinate_literal(location)
+    if literal is not None:
+        return literal
+
+    with metrics.span('geo.geocode') as span:
+        key = normalize_query(location)
+        cached = geocode_cache.get(key)
+        if cached is not None:
+            span['cache'] = 'hit'
+            return dict(cached)
+
+        span['cache'] = 'miss'
+        return dict(await geocode_flight.ado(key, lambda: _anominatim_search(location, key)))
+
+async def async_reverse_geocode(lat, lon):
+    """Async variant of reverse_geocode for the ASGI serving path; shares the same cache."""
+    if not validate_coordinates(lat, lon):
+        raise ValueError('Invalid coordinates')
+
+    with metrics.span('geo.reverse_geocode') as span:
+        key = geohash_encode(float(lat), float(lon), Config.GEOCODE_CACHE_PRECISION)
+        cached = reverse_geocode_cache.get(key)
+        if cached is not None:
+            span['cache'] = 'hit'
+            return cached
+
+        name, span['source'] = await reverse_geocode_flight.ado(key, lambda: _areverse_lookup(lat, lon, key))
+        return name
+
+def geocode_cache_stats():
+    """Hit/miss statistics of the forward and reverse geocode caches."""
+    return {'geocode': geocode_cache.stats(), 'reverse_geocode': reverse_geocode_cache.stats()}
+
+def _collect_geocode_cache_metrics():
+    stats = geocode_cache_stats()
+    for field in ('hits', 'misses', 'evictions'):
+        yield (f'geoai_geocode_cache_{field}_total', 'counter', f'Geocode cache {field}.',
+               [({'cache': name}, cache_stats[field]) for name, cache_stats in stats.items()])
+    yield ('geoai_geocode_cache_size', 'gauge', 'Entries held in the geocode caches.',
+           [({'cache': name}, cache_stats['size']) for name, cache_stats in stats.items()])
+
+metrics.REGISTRY.register_collector(_collect_geocode_cache_metrics)
 
 # # Example usage for testing
 # if __name__ == "__main__":
 #     print("Geocoding 'Paris':", geocode_location("Paris"))
-#     print("Reverse geocoding (48.8566, 2.3522):", reverse_geocode(48.8566, 2.3522))
\ No newline at end of file
+#     print("Reverse geocoding (48.8566, 2.3522):", reverse_geocode(48.8566, 2.3522))
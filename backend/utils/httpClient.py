@@ -0,0 +1,151 @@
+"""
+Shared, pooled HTTP transport for the agents, services and utils.
+
+A single requests.Session is shared by the whole process so that upstream calls
+(Nominatim, Open-Meteo, REST Countries, Wikipedia) reuse keep-alive connections
+instead of paying DNS + TCP + TLS setup on every request.
+"""
+import threading
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, Any, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config.config import Config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_request_counts: Dict[str, int] = defaultdict(int)
+_error_counts: Dict[str, int] = defaultdict(int)
+
+class _Retry(Retry):
+    """Retry that never waits longer than Config.HTTP_BACKOFF_MAX, even for a longer Retry-After."""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, Config.HTTP_BACKOFF_MAX)
+
+def _build_session() -> requests.Session:
+    """Create a session with per-host keep-alive pools and jittered retries."""
+    retry = _Retry(
+        total=Config.HTTP_RETRIES,
+        connect=Config.HTTP_RETRIES,
+        read=Config.HTTP_RETRIES,
+        status=Config.HTTP_RETRIES,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        backoff_factor=Config.HTTP_BACKOFF_FACTOR,
+        backoff_jitter=Config.HTTP_BACKOFF_JITTER,
+        backoff_max=Config.HTTP_BACKOFF_MAX,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+        pool_block=False
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': Config.HTTP_USER_AGENT})
+    return session
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def default_timeout() -> Tuple[float, float]:
+    """The (connect, read) timeout applied when a caller does not pass one."""
+    return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+
+def get(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Union[float, Tuple[float, float]]] = None) -> requests.Response:
+    """
+    Issue a GET through the shared pooled session.
+
+    Args:
+        url (str): Absolute URL.
+        params (dict, optional): Query string parameters.
+        headers (dict, optional): Extra headers; the default User-Agent is always sent.
+        timeout (float or tuple, optional): Overrides the configured (connect, read) timeout.
+
+    Returns:
+        requests.Response: The response. Callers are expected to call raise_for_status().
+
+    Raises:
+        requests.RequestException: On connection errors, timeouts or exhausted retries.
+    """
+    host = urlsplit(url).netloc
+    with _stats_lock:
+        _request_counts[host] += 1
+    started = time.monotonic()
+    try:
+        response = get_session().get(url, params=params, headers=headers,
+                                     timeout=timeout if timeout is not None else default_timeout())
+    except requests.RequestException:
+        with _stats_lock:
+            _error_counts[host] += 1
+        metrics.record_upstream(host, "error", time.monotonic() - started)
+        raise
+    metrics.record_upstream(host, response.status_code, time.monotonic() - started)
+    return response
+
+def transport_stats() -> Dict[str, Any]:
+    """
+    Per-host request, error and connection counters.
+
+    "connections" is the number of TCP/TLS connections opened by the host's pool and
+    "reused" the number of requests served over an already open keep-alive connection.
+    """
+    pool_counters: Dict[str, Dict[str, int]] = {}
+    session = _session
+    if session is not None:
+        adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+                counters = pool_counters.setdefault(host, {"connections": 0, "pool_requests": 0})
+                counters["connections"] += pool.num_connections
+                counters["pool_requests"] += pool.num_requests
+
+    with _stats_lock:
+        hosts = set(_request_counts) | set(pool_counters)
+        stats = {}
+        for host in sorted(hosts):
+            counters = pool_counters.get(host, {"connections": 0, "pool_requests": 0})
+            stats[host] = {
+                "requests": _request_counts.get(host, 0),
+                "errors": _error_counts.get(host, 0),
+                "connections": counters["connections"],
+                "reused": max(0, counters["pool_requests"] - counters["connections"])
+            }
+    return stats
+
+def _collect_transport_metrics():
+    stats = transport_stats()
+    yield ("geoai_http_pool_connections_total", "counter", "Connections opened by the shared HTTP transport, per host.",
+           [({"host": host}, counters["connections"]) for host, counters in stats.items()])
+    yield ("geoai_http_pool_reused_total", "counter", "Requests served over a reused keep-alive connection, per host.",
+           [({"host": host}, counters["reused"]) for host, counters in stats.items()])
+
+metrics.REGISTRY.register_collector(_collect_transport_metrics)
@@ -0,0 +1,201 @@
+"""
+Lightweight in-process tracing and Prometheus metrics.
+
+Spans time a block of work and feed a latency histogram; counters and histograms are kept
+in a process-wide registry and rendered in the Prometheus text exposition format by
+/api/metrics. Each request gets an ID (see app.py) that is attached to log records.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Counter:
+    """Monotonically increasing counter with labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            # Per-bucket counts, then sum and count.
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames + ("le",), key + (repr(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+# A collector returns (name, type, help, [(labels, value), ...]) tuples computed at scrape time.
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+class Registry:
+    """Holds metrics and scrape-time collectors and renders them for Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, documentation, labelnames)
+            return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._metrics[name]
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                for name, metric_type, documentation, samples in collector():
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    for labels, value in samples:
+                        lines.append(f"{name}{_format_labels(labels.keys(), labels.values())} {value}")
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+SPAN_DURATION = REGISTRY.histogram(
+    "geoai_span_duration_seconds", "Duration of traced pipeline stages.", ("span", "status"))
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "geoai_upstream_requests_total", "Upstream HTTP requests by host and status code.", ("host", "status"))
+UPSTREAM_DURATION = REGISTRY.histogram(
+    "geoai_upstream_request_duration_seconds", "Upstream HTTP request latency.", ("host",))
+LLM_TOKENS = REGISTRY.counter(
+    "geoai_llm_tokens_total", "OpenAI tokens used, by model, response mode and kind.", ("model", "mode", "kind"))
+HTTP_REQUESTS = REGISTRY.histogram(
+    "geoai_http_request_duration_seconds", "Latency of API requests served by this process.", ("endpoint", "method", "status"))
+
+@contextmanager
+def span(name: str) -> Iterator[Dict[str, object]]:
+    """
+    Time a block of work and record it in geoai_span_duration_seconds.
+
+    The yielded dict can be used to attach attributes (e.g. "status" or "cache"), which are
+    included in the debug log line for the span. Exceptions mark the span as "error".
+    """
+    attributes: Dict[str, object] = {}
+    started = time.monotonic()
+    status = "ok"
+    try:
+        yield attributes
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.monotonic() - started
+        status = str(attributes.pop("status", status))
+        SPAN_DURATION.observe(duration, span=name, status=status)
+        logger.debug(f"span {name} status={status} duration={duration * 1000:.1f}ms {attributes or ''}")
+
+def record_upstream(host: str, status: object, duration: float) -> None:
+    """Count an upstream call by status code (or "error" when no response was received)."""
+    UPSTREAM_REQUESTS.inc(host=host, status=status)
+    UPSTREAM_DURATION.observe(duration, host=host)
+
+def record_token_usage(model: str, mode: str, usage: Dict[str, int]) -> None:
+    for kind in ("prompt_tokens", "completion_tokens"):
+        LLM_TOKENS.inc(usage.get(kind, 0), model=model, mode=mode, kind=kind.replace("_tokens", ""))
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request ID to every log record as record.request_id."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+def install_request_id_logging(fmt: Optional[str] = None) -> None:
+    """Add the request ID to the root handlers' records and log format."""
+    fmt = fmt or "%(levelname)s:%(name)s:[%(request_id)s] %(message)s"
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(level=logging.INFO)
+    for handler in root.handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
+        handler.setFormatter(logging.Formatter(fmt))
@@ -0,0 +1,370 @@
+"""
+Offline reverse geocoder backed by a local GeoNames-style gazetteer.
+
+Places are stored as unit vectors on the sphere in an array-backed KD-tree, so the
+Euclidean nearest neighbour is also the great-circle nearest neighbour. Names are kept
+as integer indexes into small string tables to keep the index compact.
+
+Build a compiled gazetteer once from the GeoNames dumps (cities500.txt or similar,
+admin1CodesASCII.txt and countryInfo.txt):
+
+    python -m utils.offlineGeocoder build --cities cities500.txt \
+        --admin1 admin1CodesASCII.txt --countries countryInfo.txt --out data/gazetteer.npz
+"""
+import argparse
+import csv
+import logging
+import math
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+def to_unit_vectors(lats, lons) -> np.ndarray:
+    """Convert latitude/longitude arrays (degrees) to an (n, 3) array of unit vectors."""
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def chord_to_km(chord):
+    """Convert straight-line distance between unit vectors to great-circle kilometres."""
+    return 2.0 * np.arcsin(np.clip(np.asarray(chord) / 2.0, 0.0, 1.0)) * EARTH_RADIUS_KM
+
+# Batch queries are processed in chunks of this many points to bound temporary arrays.
+BATCH_CHUNK = 65536
+
+class KDTree:
+    """Static KD-tree stored in flat NumPy arrays (one entry per node)."""
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 16):
+        """
+        Args:
+            points (np.ndarray): (n, k) array of points.
+            leaf_size (int): Maximum number of points per leaf.
+        """
+        points = np.ascontiguousarray(points, dtype=np.float64)
+        order = np.arange(len(points))
+        starts, ends, split_dims, split_vals, lefts, rights, depths = [], [], [], [], [], [], []
+
+        def new_node(start, end, depth=0):
+            starts.append(start)
+            ends.append(end)
+            depths.append(depth)
+            split_dims.append(-1)
+            split_vals.append(0.0)
+            lefts.append(-1)
+            rights.append(-1)
+            return len(starts) - 1
+
+        stack = [new_node(0, len(points))] if len(points) else []
+        while stack:
+            node = stack.pop()
+            start, end = starts[node], ends[node]
+            if end - start <= leaf_size:
+                continue
+            segment = points[order[start:end]]
+            dim = int(np.argmax(segment.max(axis=0) - segment.min(axis=0)))
+            mid = (end - start) // 2
+            partition = np.argpartition(segment[:, dim], mid)
+            order[start:end] = order[start:end][partition]
+            split_dims[node] = dim
+            split_vals[node] = float(points[order[start + mid], dim])
+            lefts[node] = new_node(start, start + mid, depths[node] + 1)
+            rights[node] = new_node(start + mid, end, depths[node] + 1)
+            stack.extend((lefts[node], rights[node]))
+
+        self.points = points[order]
+        self.index = order
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.split_dims = np.array(split_dims, dtype=np.int8)
+        self.split_vals = np.array(split_vals, dtype=np.float64)
+        self.lefts = np.array(lefts, dtype=np.int64)
+        self.rights = np.array(rights, dtype=np.int64)
+        self.leaf_size = leaf_size
+        self.mins, self.maxs = self._bounding_boxes(np.array(depths, dtype=np.int64))
+
+    def _bounding_boxes(self, depths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-node bounding boxes: leaves reduce their points, inner nodes merge their children bottom-up."""
+        mins = np.empty((len(self.starts), self.points.shape[1]))
+        maxs = np.empty_like(mins)
+        if not len(self.starts):
+            return mins, maxs
+        leaves = np.flatnonzero(self.split_dims < 0)
+        leaves = leaves[np.argsort(self.starts[leaves])]
+        mins[leaves] = np.minimum.reduceat(self.points, self.starts[leaves], axis=0)
+        maxs[leaves] = np.maximum.reduceat(self.points, self.starts[leaves], axis=0)
+        for depth in range(int(depths.max()), -1, -1):
+            nodes = np.flatnonzero((depths == depth) & (self.split_dims >= 0))
+            mins[nodes] = np.minimum(mins[self.lefts[nodes]], mins[self.rights[nodes]])
+            maxs[nodes] = np.maximum(maxs[self.lefts[nodes]], maxs[self.rights[nodes]])
+        return mins, maxs
+
+    def query(self, point: np.ndarray) -> Tuple[int, float]:
+        """
+        Find the nearest stored point.
+
+        Returns:
+            tuple: (original index of the nearest point, Euclidean distance), or (-1, inf) if empty.
+        """
+        if not len(self.points):
+            return -1, math.inf
+        best_d2, best = math.inf, -1
+        stack = [(0, 0.0)]
+        while stack:
+            node, bound = stack.pop()
+            if bound >= best_d2:
+                continue
+            dim = self.split_dims[node]
+            if dim < 0:
+                start, end = self.starts[node], self.ends[node]
+                d2 = ((self.points[start:end] - point) ** 2).sum(axis=1)
+                i = int(np.argmin(d2))
+                if d2[i] < best_d2:
+                    best_d2, best = float(d2[i]), start + i
+                continue
+            diff = point[dim] - self.split_vals[node]
+            near, far = (self.lefts[node], self.rights[node]) if diff < 0 else (self.rights[node], self.lefts[node])
+            stack.append((far, diff * diff))
+            stack.append((near, bound))
+        return int(self.index[best]), math.sqrt(best_d2)
+
+    def query_batch(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest stored point for each row of an (m, k) array, with all queries walking the tree together.
+
+        Returns:
+            tuple: (int64 array of original indexes, float64 array of Euclidean distances);
+            -1 and inf for every query if the tree is empty.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        if not len(self.points):
+            return np.full(len(points), -1, dtype=np.int64), np.full(len(points), math.inf)
+        indexes = np.empty(len(points), dtype=np.int64)
+        distances = np.empty(len(points))
+        for start in range(0, len(points), BATCH_CHUNK):
+            chunk = slice(start, start + BATCH_CHUNK)
+            indexes[chunk], distances[chunk] = self._query_chunk(points[chunk])
+        return indexes, distances
+
+    def _query_chunk(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Seed each query with the nearest point in the leaf it falls into.
+        nodes = np.zeros(len(points), dtype=np.int64)
+        inner = np.flatnonzero(self.split_dims[nodes] >= 0)
+        while len(inner):
+            current = nodes[inner]
+            left = points[inner, self.split_dims[current]] < self.split_vals[current]
+            nodes[inner] = np.where(left, self.lefts[current], self.rights[current])
+            inner = inner[self.split_dims[nodes[inner]] >= 0]
+        best_d2, best = self._scan_leaves(points, np.arange(len(points)), nodes)
+
+        # Then walk the tree breadth-first with (query, node) pairs, dropping every pair whose
+        # bounding box is no closer than the query's best so far.
+        queries, nodes = np.arange(len(points)), np.zeros(len(points), dtype=np.int64)
+        while len(queries):
+            p = points[queries]
+            gap = np.maximum(self.mins[nodes] - p, 0) + np.maximum(p - self.maxs[nodes], 0)
+            keep = (gap * gap).sum(axis=1) < best_d2[queries]
+            queries, nodes = queries[keep], nodes[keep]
+            leaf = self.split_dims[nodes] < 0
+            if leaf.any():
+                pair_queries = queries[leaf]
+                pair_d2, pair_best = self._scan_leaves(points, pair_queries, nodes[leaf])
+                # Nearest candidate per query: sort by (query, distance) and take each query's first.
+                order = np.lexsort((pair_d2, pair_queries))
+                first = order[np.r_[True, pair_queries[order][1:] != pair_queries[order][:-1]]]
+                improved = first[pair_d2[first] < best_d2[pair_queries[first]]]
+                best_d2[pair_queries[improved]] = pair_d2[improved]
+                best[pair_queries[improved]] = pair_best[improved]
+            inner = ~leaf
+            queries = np.concatenate((queries[inner], queries[inner]))
+            nodes = np.concatenate((self.lefts[nodes[inner]], self.rights[nodes[inner]]))
+        return self.index[best], np.sqrt(best_d2)
+
+    def _scan_leaves(self, points: np.ndarray, queries: np.ndarray, leaves: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Squared distance to, and tree position of, the nearest point in leaves[i] for each points[queries[i]]."""
+        positions = self.starts[leaves][:, None] + np.arange(self.leaf_size)
+        valid = positions < self.ends[leaves][:, None]
+        positions = np.where(valid, positions, 0)
+        d2 = ((self.points[positions] - points[queries][:, None, :]) ** 2).sum(axis=2)
+        d2[~valid] = math.inf
+        nearest = np.argmin(d2, axis=1)
+        rows = np.arange(len(queries))
+        return d2[rows, nearest], positions[rows, nearest]
+
+class OfflineReverseGeocoder:
+    """Nearest-place reverse geocoder over a compiled gazetteer."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, names: np.ndarray, admin_ids: np.ndarray,
+                 country_ids: np.ndarray, admin_names: List[str], country_names: List[str]):
+        self.lats = np.asarray(lats, dtype=np.float32)
+        self.lons = np.asarray(lons, dtype=np.float32)
+        self.names = np.asarray(names, dtype=object)
+        self.admin_ids = np.asarray(admin_ids, dtype=np.int32)
+        self.country_ids = np.asarray(country_ids, dtype=np.int16)
+        self.admin_names = list(admin_names)
+        self.country_names = list(country_names)
+        self.tree = KDTree(to_unit_vectors(lats, lons))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def load(cls, path: str) -> "OfflineReverseGeocoder":
+        """Load a gazetteer compiled with the build command."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                lats=data['lats'], lons=data['lons'], names=data['names'].astype(object),
+                admin_ids=data['admin_ids'], country_ids=data['country_ids'],
+                admin_names=data['admin_names'].tolist(), country_names=data['country_names'].tolist()
+            )
+
+    @classmethod
+    def from_geonames(cls, cities_path: str, admin1_path: Optional[str] = None,
+                      countries_path: Optional[str] = None) -> "OfflineReverseGeocoder":
+        """Build a gazetteer from GeoNames cities, admin1 code and country info dumps."""
+        admin1 = _read_admin1(admin1_path) if admin1_path else {}
+        countries = _read_countries(countries_path) if countries_path else {}
+        admin_names, admin_lookup = [''], {}
+        country_names, country_lookup = [''], {}
+        lats, lons, names, admin_ids, country_ids = [], [], [], [], []
+        with open(cities_path, encoding='utf-8') as f:
+            for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+                if len(row) < 11:
+                    continue
+                country_code, admin1_code = row[8], row[10]
+                admin_key = f"{country_code}.{admin1_code}"
+                if admin_key not in admin_lookup:
+                    admin_lookup[admin_key] = len(admin_names)
+                    admin_names.append(admin1.get(admin_key, ''))
+                if country_code not in country_lookup:
+                    country_lookup[country_code] = len(country_names)
+                    country_names.append(countries.get(country_code, country_code))
+                lats.append(float(row[4]))
+                lons.append(float(row[5]))
+                names.append(row[1])
+                admin_ids.append(admin_lookup[admin_key])
+                country_ids.append(country_lookup[country_code])
+        return cls(np.array(lats), np.array(lons), np.array(names, dtype=object), np.array(admin_ids),
+                   np.array(country_ids), admin_names, country_names)
+
+    def save(self, path: str) -> None:
+        """Write the gazetteer in the compact .npz format read by load()."""
+        np.savez_compressed(
+            path, lats=self.lats, lons=self.lons, names=self.names.astype(str),
+            admin_ids=self.admin_ids, country_ids=self.country_ids,
+            admin_names=np.array(self.admin_names, dtype=str), country_names=np.array(self.country_names, dtype=str)
+        )
+
+    def display_name(self, i: int) -> str:
+        """Nominatim-style "City, Region, Country" name for place i ("City, Country" without a region)."""
+        parts = [self.names[i], self.admin_names[self.admin_ids[i]], self.country_names[self.country_ids[i]]]
+        return ", ".join(part for part in parts if part)
+
+    def nearest(self, lat: float, lon: float) -> Tuple[Optional[str], float]:
+        """
+        Find the nearest place to a point.
+
+        Returns:
+            tuple: (display name, distance in km), or (None, inf) if the gazetteer is empty.
+        """
+        i, chord = self.tree.query(to_unit_vectors([lat], [lon])[0])
+        if i < 0:
+            return None, math.inf
+        return self.display_name(i), float(chord_to_km(chord))
+
+    def nearest_batch(self, lats, lons) -> Tuple[List[Optional[str]], np.ndarray]:
+        """
+        Vectorized counterpart of nearest() for arrays of latitudes and longitudes.
+
+        Returns:
+            tuple: (list of display names, float64 array of distances in km).
+        """
+        indexes, chords = self.tree.query_batch(to_unit_vectors(lats, lons))
+        names = [self.display_name(i) if i >= 0 else None for i in indexes.tolist()]
+        return names, chord_to_km(chords)
+
+def _read_admin1(path: str) -> Dict[str, str]:
+    admin1 = {}
+    with open(path, encoding='utf-8') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) >= 2:
+                admin1[row[0]] = row[1]
+    return admin1
+
+def _read_countries(path: str) -> Dict[str, str]:
+    countries = {}
+    with open(path, encoding='utf-8') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) >= 5 and not row[0].startswith('#'):
+                countries[row[0]] = row[4]
+    return countries
+
+_geocoder: Optional[OfflineReverseGeocoder] = None
+_load_failed = False
+_load_lock = threading.Lock()
+
+def get_offline_geocoder() -> Optional[OfflineReverseGeocoder]:
+    """Load the configured gazetteer once. Returns None if it is unavailable."""
+    global _geocoder, _load_failed
+    if _geocoder is None and not _load_failed:
+        with _load_lock:
+            if _geocoder is None and not _load_failed:
+                try:
+                    _geocoder = OfflineReverseGeocoder.load(Config.GAZETTEER_PATH)
+                    logger.info(f"Loaded offline gazetteer with {len(_geocoder)} places from {Config.GAZETTEER_PATH}")
+                except (OSError, KeyError, ValueError) as e:
+                    _load_failed = True
+                    logger.warning(f"Offline reverse geocoder unavailable, using Nominatim: {e}")
+    return _geocoder
+
+def offline_reverse_geocode(lat: float, lon: float, max_distance_km: Optional[float] = None) -> Optional[str]:
+    """
+    Resolve a point from the local gazetteer.
+
+    Returns:
+        str or None: The display name, or None when no place lies within max_distance_km
+        (Config.OFFLINE_GEOCODER_MAX_DISTANCE_KM by default) or no gazetteer is loaded.
+    """
+    geocoder = get_offline_geocoder()
+    if geocoder is None:
+        return None
+    name, distance = geocoder.nearest(lat, lon)
+    limit = Config.OFFLINE_GEOCODER_MAX_DISTANCE_KM if max_distance_km is None else max_distance_km
+    return name if distance <= limit else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline reverse geocoder tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Compile GeoNames dumps into a gazetteer file")
+    build.add_argument('--cities', required=True, help="GeoNames cities file (e.g. cities500.txt)")
+    build.add_argument('--admin1', help="GeoNames admin1CodesASCII.txt")
+    build.add_argument('--countries', help="GeoNames countryInfo.txt")
+    build.add_argument('--out', default=Config.GAZETTEER_PATH, help="Output .npz path")
+    lookup = subparsers.add_parser('lookup', help="Reverse geocode a point with a compiled gazetteer")
+    lookup.add_argument('lat', type=float)
+    lookup.add_argument('lon', type=float)
+    lookup.add_argument('--gazetteer', default=Config.GAZETTEER_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        geocoder = OfflineReverseGeocoder.from_geonames(args.cities, args.admin1, args.countries)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        geocoder.save(args.out)
+        print(f"Wrote {len(geocoder)} places to {args.out}")
+    else:
+        name, distance = OfflineReverseGeocoder.load(args.gazetteer).nearest(args.lat, args.lon)
+        print(f"{name} ({distance:.1f} km)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
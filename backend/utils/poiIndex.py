@@ -0,0 +1,316 @@
+"""
+Nearby places search over a local points-of-interest extract.
+
+POIs are bucketed into a regular latitude/longitude grid and stored sorted by grid cell, so
+the cells of one grid row that a query touches form a single contiguous slice found with a
+binary search. Candidates are ranked with a vectorized haversine distance. Names are kept as
+one UTF-8 blob with offsets and categories as indexes into a small table, so an index of a
+million POIs stays around 30 MB and needs no upstream service.
+
+Build a compiled index once from a CSV extract (or Parquet, with pyarrow installed) with lat,
+lon, name and category columns, for example exported from OpenStreetMap:
+
+    python -m utils.poiIndex build --input pois.csv --out data/pois.npz
+    python -m utils.poiIndex query 48.8566 2.3522 --radius 2 --category cafe -k 10
+"""
+import argparse
+import csv
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.config import Config
+from utils.offlineGeocoder import EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+
+# Accepted column names in POI extracts.
+COLUMN_ALIASES = {
+    "lat": ("lat", "latitude", "y"),
+    "lon": ("lon", "lng", "long", "longitude", "x"),
+    "name": ("name", "title"),
+    "category": ("category", "amenity", "type", "kind", "fclass"),
+}
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points (all in degrees)."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2 = np.radians(lats.astype(np.float64, copy=False))
+    lon2 = np.radians(lons.astype(np.float64, copy=False))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class PoiIndex:
+    """Grid-bucketed POI index with radius, k-nearest and category queries."""
+
+    def __init__(self, lats, lons, name_blob: np.ndarray, name_offsets: np.ndarray, category_ids,
+                 category_names: Sequence[str], cell_size: float = 0.02):
+        """
+        Args:
+            lats, lons: POI coordinates in degrees.
+            name_blob (np.ndarray): uint8 array of all names, UTF-8 encoded back to back.
+            name_offsets (np.ndarray): n + 1 offsets into name_blob; name i is blob[off[i]:off[i + 1]].
+            category_ids: Index into category_names per POI.
+            category_names: Category table.
+            cell_size (float): Grid cell size in degrees.
+        """
+        self.cell_size = float(cell_size)
+        self.n_lat = int(math.ceil(180 / self.cell_size))
+        self.n_lon = int(math.ceil(360 / self.cell_size))
+        lats = np.asarray(lats, dtype=np.float32)
+        lons = np.asarray(lons, dtype=np.float32)
+        keys = self._keys(lats, lons)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+        self.category_ids = np.asarray(category_ids, dtype=np.int32)[order]
+        self.category_names = list(category_names)
+        self._category_lookup = {name.casefold(): i for i, name in enumerate(self.category_names)}
+        name_offsets = np.asarray(name_offsets, dtype=np.int64)
+        if np.array_equal(order, np.arange(len(order))):
+            self.name_blob = np.asarray(name_blob, dtype=np.uint8)
+            self.name_offsets = name_offsets
+        else:
+            self.name_blob, self.name_offsets = _reorder_names(np.asarray(name_blob, dtype=np.uint8), name_offsets, order)
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _lat_bin(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_size), 0, self.n_lat - 1).astype(np.int64)
+
+    def _lon_bin(self, lon):
+        return (np.floor((np.asarray(lon) + 180) / self.cell_size).astype(np.int64)) % self.n_lon
+
+    def _keys(self, lats, lons) -> np.ndarray:
+        return self._lat_bin(lats) * self.n_lon + self._lon_bin(lons)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[float, float, str, str]], cell_size: Optional[float] = None) -> "PoiIndex":
+        """Build an index from (lat, lon, name, category) tuples."""
+        lats, lons, categories, offsets, encoded = [], [], [], [0], []
+        category_names, category_lookup = [], {}
+        for lat, lon, name, category in records:
+            category = (category or "").strip().lower()
+            if category not in category_lookup:
+                category_lookup[category] = len(category_names)
+                category_names.append(category)
+            data = (name or "").encode("utf-8")
+            encoded.append(data)
+            offsets.append(offsets[-1] + len(data))
+            lats.append(lat)
+            lons.append(lon)
+            categories.append(category_lookup[category])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(np.array(lats), np.array(lons), blob, np.array(offsets), np.array(categories),
+                   category_names, cell_size or Config.POI_GRID_CELL_DEGREES)
+
+    @classmethod
+    def from_file(cls, path: str, cell_size: Optional[float] = None) -> "PoiIndex":
+        """Build an index from a CSV or Parquet extract; rows without valid coordinates are skipped."""
+        return cls.from_records(_read_extract(path), cell_size)
+
+    @classmethod
+    def load(cls, path: str) -> "PoiIndex":
+        """Load an index written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['lats'], data['lons'], data['name_blob'], data['name_offsets'], data['category_ids'],
+                       data['category_names'].tolist(), float(data['cell_size']))
+
+    def save(self, path: str) -> None:
+        """Write the index in the compact .npz format read by load(), already sorted by grid cell."""
+        np.savez_compressed(
+            path, lats=self.lats, lons=self.lons, name_blob=self.name_blob, name_offsets=self.name_offsets,
+            category_ids=self.category_ids, category_names=np.array(self.category_names, dtype=str),
+            cell_size=np.float64(self.cell_size)
+        )
+
+    def name(self, i: int) -> str:
+        return self.name_blob[self.name_offsets[i]:self.name_offsets[i + 1]].tobytes().decode("utf-8")
+
+    def categories(self) -> Dict[str, int]:
+        """POI count per category."""
+        counts = np.bincount(self.category_ids, minlength=len(self.category_names))
+        return {name: int(count) for name, count in zip(self.category_names, counts) if count}
+
+    def _category_filter(self, categories: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        if not categories:
+            return None
+        ids = [self._category_lookup[c.strip().casefold()] for c in categories if c.strip().casefold() in self._category_lookup]
+        return np.array(ids, dtype=np.int32)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Indexes of every POI in the grid cells that a circle of radius_km around the point touches."""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        rows = np.arange(self._lat_bin(lat_lo), self._lat_bin(lat_hi) + 1)
+        widest = math.cos(math.radians(max(abs(lat_lo), abs(lat_hi))))
+        dlon = dlat / widest if widest > 1e-9 else 360.0
+        if dlon >= 180:
+            ranges = [(0, self.n_lon - 1)]
+        else:
+            first, last = int(self._lon_bin(lon - dlon)), int(self._lon_bin(lon + dlon))
+            ranges = [(first, last)] if first <= last else [(first, self.n_lon - 1), (0, last)]
+        lo = np.concatenate([rows * self.n_lon + first for first, _ in ranges])
+        hi = np.concatenate([rows * self.n_lon + last for _, last in ranges])
+        starts = np.searchsorted(self.keys, lo, side="left")
+        ends = np.searchsorted(self.keys, hi, side="right")
+        slices = [np.arange(start, end) for start, end in zip(starts, ends) if end > start]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _within(self, lat: float, lon: float, radius_km: float, category_ids: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        candidates = self._candidates(lat, lon, radius_km)
+        if category_ids is not None and len(candidates):
+            candidates = candidates[np.isin(self.category_ids[candidates], category_ids)]
+        distances = haversine_km(lat, lon, self.lats[candidates], self.lons[candidates])
+        inside = distances <= radius_km
+        return candidates[inside], distances[inside]
+
+    def query(self, lat: float, lon: float, radius_km: Optional[float] = None, k: Optional[int] = None,
+              categories: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Find POIs near a point, nearest first.
+
+        Args:
+            lat, lon: Query point in degrees.
+            radius_km: Only return POIs within this distance. Without it, the search widens from
+                one grid cell until k POIs are found or Config.NEARBY_MAX_RADIUS_KM is reached.
+            k: Maximum number of results (Config.NEARBY_DEFAULT_LIMIT without a radius).
+            categories: Only return POIs in these categories (case-insensitive).
+
+        Returns:
+            list: {"name", "category", "lat", "lon", "distance_km"} dicts.
+        """
+        category_ids = self._category_filter(categories)
+        if category_ids is not None and not len(category_ids):
+            return []
+        if radius_km is not None:
+            radius_km = min(float(radius_km), Config.NEARBY_MAX_RADIUS_KM)
+            indexes, distances = self._within(lat, lon, radius_km, category_ids)
+        else:
+            k = k or Config.NEARBY_DEFAULT_LIMIT
+            radius = self.cell_size * KM_PER_DEGREE
+            while True:
+                indexes, distances = self._within(lat, lon, radius, category_ids)
+                if len(indexes) >= k or radius >= Config.NEARBY_MAX_RADIUS_KM:
+                    break
+                radius = min(radius * 2, Config.NEARBY_MAX_RADIUS_KM)
+
+        k = min(k or Config.NEARBY_MAX_RESULTS, Config.NEARBY_MAX_RESULTS)
+        if len(indexes) > k:
+            nearest = np.argpartition(distances, k - 1)[:k]
+            indexes, distances = indexes[nearest], distances[nearest]
+        order = np.argsort(distances, kind="stable")
+        return [{
+            "name": self.name(int(i)),
+            "category": self.category_names[self.category_ids[i]],
+            "lat": round(float(self.lats[i]), 6),
+            "lon": round(float(self.lons[i]), 6),
+            "distance_km": round(float(d), 3)
+        } for i, d in zip(indexes[order], distances[order])]
+
+def _reorder_names(blob: np.ndarray, offsets: np.ndarray, order: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Permute a name blob and its offsets into a new POI order."""
+    lengths = np.diff(offsets)[order]
+    new_offsets = np.zeros(len(order) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    # Byte i of the new blob comes from old offset of its POI plus its position within the name.
+    owners = np.repeat(np.arange(len(order)), lengths)
+    positions = np.arange(new_offsets[-1]) - new_offsets[owners]
+    return blob[offsets[order][owners] + positions], new_offsets
+
+def _column(header: Sequence[str], field: str) -> Optional[str]:
+    lowered = {column.strip().lower(): column for column in header}
+    for alias in COLUMN_ALIASES[field]:
+        if alias in lowered:
+            return lowered[alias]
+    return None
+
+@contextmanager
+def _rows(path: str) -> Iterator[Tuple[Sequence[str], Iterable[Dict[str, Any]]]]:
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq  # optional dependency, only needed for Parquet extracts
+        table = pq.read_table(path)
+        yield table.column_names, table.to_pylist()
+        return
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        yield reader.fieldnames or [], reader
+
+def _read_extract(path: str) -> Iterator[Tuple[float, float, str, str]]:
+    with _rows(path) as (header, rows):
+        columns = {field: _column(header, field) for field in COLUMN_ALIASES}
+        if not columns["lat"] or not columns["lon"]:
+            raise ValueError(f"{path} needs latitude and longitude columns, got: {', '.join(header)}")
+        for row in rows:
+            try:
+                lat, lon = float(row[columns["lat"]]), float(row[columns["lon"]])
+            except (TypeError, ValueError):
+                continue
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                continue
+            name = row.get(columns["name"]) if columns["name"] else ""
+            category = row.get(columns["category"]) if columns["category"] else ""
+            yield lat, lon, str(name or ""), str(category or "")
+
+_index: Optional[PoiIndex] = None
+_load_failed = False
+_load_lock = threading.Lock()
+
+def get_poi_index() -> Optional[PoiIndex]:
+    """Load the configured POI index once. Returns None if it is unavailable."""
+    global _index, _load_failed
+    if _index is None and not _load_failed:
+        with _load_lock:
+            if _index is None and not _load_failed:
+                try:
+                    _index = PoiIndex.load(Config.POI_INDEX_PATH)
+                    logger.info(f"Loaded POI index with {len(_index)} places from {Config.POI_INDEX_PATH}")
+                except (OSError, KeyError, ValueError) as e:
+                    _load_failed = True
+                    logger.warning(f"POI index unavailable, nearby search disabled: {e}")
+    return _index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nearby places index tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Compile a CSV or Parquet POI extract into an index file")
+    build.add_argument('--input', required=True, help="POI extract with lat, lon, name and category columns")
+    build.add_argument('--out', default=Config.POI_INDEX_PATH, help="Output .npz path")
+    build.add_argument('--cell-size', type=float, default=Config.POI_GRID_CELL_DEGREES, help="Grid cell size in degrees")
+    query = subparsers.add_parser('query', help="Find POIs near a point with a compiled index")
+    query.add_argument('lat', type=float)
+    query.add_argument('lon', type=float)
+    query.add_argument('--radius', type=float, help="Search radius in km")
+    query.add_argument('-k', type=int, help="Maximum number of results")
+    query.add_argument('--category', action='append', help="Only this category (repeatable)")
+    query.add_argument('--index', default=Config.POI_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        index = PoiIndex.from_file(args.input, args.cell_size)
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        index.save(args.out)
+        print(f"Wrote {len(index)} places in {len(index.category_names)} categories to {args.out}")
+    else:
+        index = PoiIndex.load(args.index)
+        started = time.perf_counter()
+        results = index.query(args.lat, args.lon, radius_km=args.radius, k=args.k, categories=args.category)
+        elapsed = (time.perf_counter() - started) * 1000
+        for poi in results:
+            print(f"{poi['distance_km']:8.3f} km  {poi['category']:<16} {poi['name']}")
+        print(f"{len(results)} results in {elapsed:.2f} ms")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
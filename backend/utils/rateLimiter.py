@@ -0,0 +1,77 @@
+"""
+Token-bucket rate limiting for outbound calls to upstreams with a usage policy
+(e.g. Nominatim's one request per second).
+"""
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are added continuously at `rate` per second up to `capacity`; each call takes one.
+    With rate=1 and capacity=1 callers are spaced at least one second apart.
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available, without waiting."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _take_or_wait(self, deadline):
+        """Take a token and return 0, or return the seconds to wait for one (None if past deadline)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            wait = (1 - self._tokens) / self.rate
+        if deadline is not None and now + wait > deadline:
+            return None
+        return wait
+
+    def acquire(self, timeout=None):
+        """
+        Block until a token is available and take it.
+
+        Returns:
+            bool: False if no token became available within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take_or_wait(deadline)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            time.sleep(wait)
+
+    async def aacquire(self, timeout=None):
+        """Async variant of acquire that sleeps on the event loop instead of blocking the thread."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._take_or_wait(deadline)
+            if wait is None:
+                return False
+            if wait == 0:
+                return True
+            await asyncio.sleep(wait)
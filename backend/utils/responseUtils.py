@@ -0,0 +1,10 @@
+import json
+from typing import Any, Dict
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Serialize one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_comment(text: str = "keep-alive") -> str:
+    """An SSE comment line, used as a heartbeat to keep idle connections open."""
+    return f": {text}\n\n"
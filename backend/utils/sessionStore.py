@@ -0,0 +1,235 @@
+"""
+Pluggable server-side session storage.
+
+Config.SESSION_BACKEND selects how Flask sessions are kept:
+
+    filesystem  Flask-Session's filesystem store (one file per session in ./flask_session)
+    sqlite      one SQLite table shared by all worker processes on the host (default)
+    memory      an in-process dict; fastest, but not shared between worker processes
+    signed      stateless: the session lives in a signed cookie and the server stores
+                nothing, so the initialized/session_id check costs no I/O at all
+
+The memory and sqlite stores only write when a session changes, and a background sweeper
+deletes expired sessions every Config.SESSION_SWEEP_INTERVAL seconds.
+"""
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKENDS = ("filesystem", "sqlite", "memory", "signed")
+
+class StoredSession(CallbackDict, SessionMixin):
+    """Session dict that remembers its ID and whether it was modified."""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, sid: Optional[str] = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.refresh = False  # set when the stored expiry should be pushed forward
+
+class MemorySessionStore:
+    """Sessions in a process-local dict."""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """The session data and its expiry time, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(sid)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return dict(entry[1]), entry[0]
+
+    def set(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        with self._lock:
+            self._data[sid] = (expires_at, dict(data))
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def sweep(self) -> int:
+        """Delete expired sessions; returns how many were removed."""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (expires_at, _) in self._data.items() if expires_at <= now]
+            for sid in expired:
+                del self._data[sid]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite table (WAL mode), shared by the processes of one host."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        db = self._connection()
+        db.execute("CREATE TABLE IF NOT EXISTS sessions (sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        db.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, so readers do not serialize on a shared connection.
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, sid: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """The session data and its expiry time, or None if missing or expired."""
+        row = self._connection().execute(
+            "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?", (sid, time.time())).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, sid: str, data: Dict[str, Any], expires_at: float) -> None:
+        db = self._connection()
+        db.execute("INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+                   (sid, json.dumps(data), expires_at))
+        db.commit()
+
+    def delete(self, sid: str) -> None:
+        db = self._connection()
+        db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        db.commit()
+
+    def sweep(self) -> int:
+        """Delete expired sessions; returns how many were removed."""
+        db = self._connection()
+        removed = db.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+        db.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+class StoreSessionInterface(SessionInterface):
+    """
+    Server-side sessions in a MemorySessionStore or SQLiteSessionStore.
+
+    The cookie holds only a random session ID. A session is written when it changes, and its
+    expiry is pushed forward at most once per half lifetime, so read-only requests such as
+    /api/chat normally cost a single lookup and no write.
+    """
+
+    def __init__(self, store, lifetime: float):
+        self.store = store
+        self.lifetime = lifetime
+
+    def open_session(self, app: Flask, request) -> StoredSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            entry = self.store.get(sid)
+            if entry is not None:
+                data, expires_at = entry
+                session = StoredSession(data, sid=sid)
+                session.refresh = expires_at - time.time() < self.lifetime / 2
+                return session
+        return StoredSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app: Flask, session: StoredSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not (session.modified or session.refresh):
+            return
+
+        self.store.set(session.sid, dict(session), time.time() + self.lifetime)
+        response.set_cookie(
+            name, session.sid,
+            max_age=int(self.lifetime),
+            httponly=self.get_cookie_httponly(app),
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+            domain=domain,
+            path=path
+        )
+
+class SessionSweeper(threading.Thread):
+    """Daemon thread deleting expired sessions from a store at a fixed interval."""
+
+    def __init__(self, store, interval: float):
+        super().__init__(name="session-sweeper", daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                removed = self.store.sweep()
+                if removed:
+                    logger.info(f"Swept {removed} expired sessions")
+            except Exception as e:
+                logger.warning(f"Session sweep failed: {e}")
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+def create_store(backend: str):
+    """The session store for a server-side backend ("memory" or "sqlite")."""
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(Config.SESSION_SQLITE_PATH)
+    raise ValueError(f"No session store for backend {backend!r}")
+
+def init_session_backend(app: Flask, backend: Optional[str] = None) -> Optional[object]:
+    """
+    Install the configured session backend on app.
+
+    Returns:
+        The session store for the memory and sqlite backends, otherwise None.
+    """
+    backend = backend or Config.SESSION_BACKEND
+    if backend not in SESSION_BACKENDS:
+        raise ValueError(f"SESSION_BACKEND must be one of: {', '.join(SESSION_BACKENDS)}")
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(seconds=Config.SESSION_LIFETIME)
+
+    if backend == 'filesystem':
+        from flask_session import Session
+        app.config['SESSION_TYPE'] = 'filesystem'
+        Session(app)
+        return None
+    if backend == 'signed':
+        # Flask's default interface: the whole session is a signed cookie.
+        return None
+
+    store = create_store(backend)
+    app.session_interface = StoreSessionInterface(store, Config.SESSION_LIFETIME)
+    if Config.SESSION_SWEEP_INTERVAL > 0:
+        SessionSweeper(store, Config.SESSION_SWEEP_INTERVAL).start()
+    return store
@@ -0,0 +1,108 @@
+"""
+Single-flight coalescing of identical in-flight upstream requests.
+
+When several callers ask for the same key at the same time, only the first (the leader)
+calls the upstream; the others wait for it and share its result or exception. Nothing is
+remembered once the call completes, so this complements the TTL caches rather than
+replacing them: it covers the window between a cache miss and the cache being filled.
+"""
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from utils import metrics
+
+COALESCED = metrics.REGISTRY.counter(
+    "geoai_singleflight_coalesced_total", "Upstream requests served by joining an identical in-flight request.", ("group",))
+LEADERS = metrics.REGISTRY.counter(
+    "geoai_singleflight_calls_total", "Upstream requests actually issued through a single-flight group.", ("group",))
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    A named group of coalesced calls.
+
+    `do` coalesces calls from threads and `ado` coalesces coroutines on the same event loop;
+    the two do not wait for each other.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Task]]" = weakref.WeakKeyDictionary()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Return fn(), sharing the call with any concurrent caller using the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            COALESCED.inc(group=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        LEADERS.inc(group=self.name)
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn(), sharing the call with any concurrent coroutine using the same key.
+
+        The upstream call runs as its own task, so a caller that is cancelled does not cancel
+        it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            tasks = self._tasks.setdefault(loop, {})
+            task = tasks.get(key)
+            leader = task is None
+            if leader:
+                task = tasks[key] = loop.create_task(fn())
+                task.add_done_callback(lambda done: self._forget(tasks, key, done))
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            LEADERS.inc(group=self.name)
+        else:
+            COALESCED.inc(group=self.name)
+        return await asyncio.shield(task)
+
+    def _forget(self, tasks: Dict[Hashable, asyncio.Task], key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if tasks.get(key) is task:
+                del tasks[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled.
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.leaders, "coalesced": self.coalesced, "in_flight": len(self._calls)}
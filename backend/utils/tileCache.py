@@ -0,0 +1,181 @@
+"""
+Slippy-map tile cache of location data, with background prefetch of neighbouring tiles.
+
+Chats are bound to the map position and zoom the user is looking at. The cache keys the
+resolved location name, country information and weather by the z/x/y tile of that position
+(zoom clamped to Config.TILE_CACHE_MIN_ZOOM..TILE_CACHE_MAX_ZOOM, so a tile is never coarser
+than a few kilometres). Entries are loaded for the tile center by a loader the chat pipeline
+installs with set_loader(), which keeps this module free of agent imports.
+
+Every lookup through get() also queues the tile (on a miss) and the missing tiles in the rings
+around it (up to Config.TILE_PREFETCH_DEPTH rings) on a small worker pool, as one loader call per
+request, so the follow-up question after a pan lands on a warm tile. Tiles are only loaded with the
+offline reverse geocoder: with Nominatim, every tile center is an extra lookup against its
+one-request-per-second budget (utils.geoUtils.nominatim_bucket), which chats need more, so get()
+then only reads the cache. The pool is bounded by Config.TILE_PREFETCH_MAX_PENDING queued tiles
+(extra requests are dropped, not queued) and the cache by Config.TILE_CACHE_MAX_BYTES.
+"""
+import logging
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.config import Config
+from utils import metrics
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+Tile = Tuple[int, int, int]
+
+# Loads the entries of tile centers: [(lat, lon), ...] -> [entry dict or None, ...].
+TileLoader = Callable[[List[Tuple[float, float]]], List[Optional[Dict[str, Any]]]]
+
+# Web Mercator stops at this latitude.
+MAX_LATITUDE = 85.05112878
+
+LOOKUPS = metrics.REGISTRY.counter(
+    "geoai_tile_cache_total", "Tile cache lookups by result (hit/miss).", ("result",))
+PREFETCHES = metrics.REGISTRY.counter(
+    "geoai_tile_prefetch_total", "Tiles by prefetch outcome (loaded/failed/dropped).", ("result",))
+
+def tile_for(lat: float, lon: float, zoom: int) -> Tile:
+    """The (z, x, y) slippy-map tile containing a point."""
+    n = 2 ** zoom
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = int((lon + 180) / 360 * n) % n
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return zoom, x, min(max(y, 0), n - 1)
+
+def tile_center(tile: Tile) -> Tuple[float, float]:
+    """(lat, lon) of the center of a tile."""
+    z, x, y = tile
+    n = 2 ** z
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 0.5) / n))))
+    return round(lat, 6), round((x + 0.5) / n * 360 - 180, 6)
+
+def neighbours(tile: Tile, depth: int) -> List[Tile]:
+    """Tiles in the rings 1..depth around a tile, nearest ring first (wrapping in x, clipped in y)."""
+    z, x, y = tile
+    n = 2 ** z
+    found = []
+    for ring in range(1, depth + 1):
+        for dy in range(-ring, ring + 1):
+            for dx in range(-ring, ring + 1):
+                if max(abs(dx), abs(dy)) == ring and 0 <= y + dy < n:
+                    neighbour = (z, (x + dx) % n, y + dy)
+                    if neighbour != tile and neighbour not in found:
+                        found.append(neighbour)
+    return found
+
+class TileCache:
+    """Tile-keyed entries with a bounded background prefetch pool."""
+
+    def __init__(self, maxsize: int, ttl: float, max_bytes: int, workers: int, max_pending: int, depth: int,
+                 load_on_lookup: bool = True):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, namespace='tiles', max_bytes=max_bytes)
+        self.depth = depth
+        self.load_on_lookup = load_on_lookup
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tile-prefetch")
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._loader: Optional[TileLoader] = None
+        self._counters = {"hit": 0, "miss": 0, "loaded": 0, "failed": 0, "dropped": 0}
+
+    def set_loader(self, loader: TileLoader) -> None:
+        self._loader = loader
+
+    @staticmethod
+    def zoom(zoom: Optional[float]) -> int:
+        """The cache zoom level for a map zoom (TILE_CACHE_MAX_ZOOM when unknown)."""
+        if zoom is None:
+            return Config.TILE_CACHE_MAX_ZOOM
+        return max(Config.TILE_CACHE_MIN_ZOOM, min(Config.TILE_CACHE_MAX_ZOOM, int(zoom)))
+
+    def get(self, lat: float, lon: float, zoom: Optional[float]) -> Optional[Dict[str, Any]]:
+        """
+        The entry of the tile containing a point at a map zoom, or None on a miss. Either way,
+        unless load_on_lookup is off, the tile (on a miss) and its missing neighbours are queued
+        for prefetch.
+        """
+        if not Config.TILE_CACHE_ENABLED:
+            return None
+        tile = tile_for(lat, lon, self.zoom(zoom))
+        entry = self.cache.get(tile)
+        self._record("hit" if entry is not None else "miss")
+        if self.load_on_lookup:
+            self.prefetch(tile, include_self=entry is None)
+        return entry
+
+    def peek(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """The entry of the most detailed cached tile containing a point, without prefetching."""
+        if not Config.TILE_CACHE_ENABLED:
+            return None
+        for zoom in range(Config.TILE_CACHE_MAX_ZOOM, Config.TILE_CACHE_MIN_ZOOM - 1, -1):
+            entry = self.cache.get(tile_for(lat, lon, zoom))
+            if entry is not None:
+                return entry
+        return None
+
+    def prefetch(self, tile: Tile, include_self: bool = True) -> int:
+        """Queue a tile and its neighbours that are neither cached nor pending. Returns the number queued."""
+        if self._loader is None:
+            return 0
+        candidates = ([tile] if include_self else []) + neighbours(tile, self.depth)
+        with self._lock:
+            wanted = [t for t in candidates if t not in self._pending and self.cache.get(t) is None]
+            room = max(0, self.max_pending - len(self._pending))
+            queued, dropped = wanted[:room], len(wanted) - room
+            self._pending.update(queued)
+        if dropped > 0:
+            self._record("dropped", dropped)
+        if queued:
+            self._executor.submit(self._load, queued)
+        return len(queued)
+
+    def _load(self, tiles: List[Tile]) -> None:
+        try:
+            with metrics.span("tile_cache.prefetch") as span:
+                span["tiles"] = len(tiles)
+                entries = self._loader([tile_center(tile) for tile in tiles])
+            for tile, entry in zip(tiles, entries):
+                if entry is None:
+                    self._record("failed")
+                    continue
+                self.cache.set(tile, entry)
+                self._record("loaded")
+        except Exception as e:
+            self._record("failed", len(tiles))
+            logger.warning(f"Tile prefetch of {len(tiles)} tiles failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.difference_update(tiles)
+
+    def _record(self, result: str, count: int = 1) -> None:
+        with self._lock:
+            self._counters[result] += count
+        if result in ("hit", "miss"):
+            LOOKUPS.inc(count, result=result)
+        else:
+            PREFETCHES.inc(count, result=result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Lookup and prefetch counters, pending prefetches and the cache's size in entries and bytes."""
+        cache = self.cache.stats()
+        with self._lock:
+            lookups = self._counters["hit"] + self._counters["miss"]
+            return {**self._counters, "pending": len(self._pending), "size": cache["size"], "bytes": cache["bytes"],
+                    "hit_rate": round(self._counters["hit"] / lookups, 4) if lookups else 0.0}
+
+TILES = TileCache(maxsize=Config.TILE_CACHE_SIZE, ttl=Config.TILE_CACHE_TTL, max_bytes=Config.TILE_CACHE_MAX_BYTES,
+                  workers=Config.TILE_PREFETCH_WORKERS, max_pending=Config.TILE_PREFETCH_MAX_PENDING,
+                  depth=Config.TILE_PREFETCH_DEPTH, load_on_lookup=Config.REVERSE_GEOCODER == 'offline')
+
+def _collect_tile_metrics():
+    stats = TILES.stats()
+    yield ("geoai_tile_cache_bytes", "gauge", "Approximate size of the tile cache entries.", [({}, stats["bytes"])])
+    yield ("geoai_tile_prefetch_pending", "gauge", "Tiles queued or loading in the prefetch pool.", [({}, stats["pending"])])
+
+metrics.REGISTRY.register_collector(_collect_tile_metrics)
@@ -0,0 +1,272 @@
+"""
+Local index of Wikipedia extracts for the regional information agent.
+
+InfoAgent asks for articles such as "Cuisine of Rawalpindi", most of which do not exist on
+Wikipedia under that exact title. The index keeps article intros in SQLite with an FTS5 index
+over their titles, so a lookup can fall back to ranked fuzzy matches ("Pakistani cuisine",
+"History of Punjab") without a network round trip. Build it from a Wikipedia extracts dump:
+
+    python -m utils.wikiIndex import --dump enwiki-latest-abstract.xml.gz
+    python -m utils.wikiIndex import --dump extracts.jsonl.bz2 --all
+    python -m utils.wikiIndex query Cuisine "Rawalpindi, Punjab, Pakistan"
+
+Dumps are Wikimedia abstract XML files (<doc><title>Wikipedia: ...</title><abstract>) or JSON
+lines with a "title" and an "extract", "abstract" or "text" field, optionally gzip or bzip2
+compressed. By default only the articles whose titles mention one of Config.INFO_AGENT_ASPECTS
+are kept, which is all the agent ever looks up and a small fraction of a full dump.
+"""
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ET
+from difflib import SequenceMatcher
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from config.config import Config
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Intros longer than this are cut at a paragraph boundary when importing full article texts.
+MAX_EXTRACT_CHARS = 2000
+
+# Title words ignored when comparing a candidate title with the place name.
+STOPWORDS = {"of", "the", "in", "and", "de", "la"}
+
+LOOKUPS = metrics.REGISTRY.counter(
+    "geoai_wiki_index_lookups_total", "Local Wikipedia index lookups by result (exact/fuzzy/miss).", ("result",))
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return re.sub(r'[^\w]+', ' ', text).strip()
+
+def _tokens(text: str) -> List[str]:
+    return [token for token in _normalize(text).split() if token]
+
+def place_names(location: str, limit: int = 5) -> List[str]:
+    """
+    Candidate place names of a location, most specific first: the comma-separated parts of a
+    geocoder display name ("Rawalpindi, Punjab, Pakistan"), without postcodes and duplicates.
+    """
+    names, seen = [], set()
+    for part in location.split(','):
+        part = part.strip()
+        key = _normalize(part)
+        if not key or any(c.isdigit() for c in key) or key in seen:
+            continue
+        seen.add(key)
+        names.append(part)
+    return names[:limit]
+
+def _intro(text: str) -> str:
+    """The leading paragraphs of an article text, up to MAX_EXTRACT_CHARS."""
+    text = text.strip()
+    if len(text) <= MAX_EXTRACT_CHARS:
+        return text
+    intro = ""
+    for paragraph in text.split("\n\n"):
+        if intro and len(intro) + len(paragraph) > MAX_EXTRACT_CHARS:
+            break
+        intro = f"{intro}\n\n{paragraph}" if intro else paragraph
+    return intro[:MAX_EXTRACT_CHARS]
+
+class WikiIndex:
+    """Read-only lookups of article intros by aspect and place, backed by SQLite FTS5."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        db = self._connection()
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"{path} has schema version {version}, expected {SCHEMA_VERSION}")
+        self._size = db.execute("SELECT COALESCE(MAX(id), 0) FROM articles").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _connection(self) -> sqlite3.Connection:
+        # One read-only connection per thread; lookups never write.
+        db = getattr(self._local, "db", None)
+        if db is None:
+            if not os.path.exists(self.path):
+                raise FileNotFoundError(self.path)
+            db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.db = db
+        return db
+
+    def lookup(self, aspect: str, location: str) -> Optional[Tuple[str, str]]:
+        """
+        Find the article on an aspect of a location.
+
+        Each place name of the location is tried in turn, most specific first: the exact title
+        "<Aspect> of <place>", then FTS5 title matches containing the aspect and every word of
+        the place as a prefix ("Parisian cuisine"), ranked by bm25 and accepted when the rest of
+        the title is at least Config.WIKI_INDEX_MIN_SCORE similar to the place name.
+
+        Returns:
+            tuple or None: (title, extract) of the best match.
+        """
+        db = self._connection()
+        aspect_tokens = _tokens(aspect)
+        for place in place_names(location):
+            row = db.execute("SELECT title, extract FROM articles WHERE key = ?",
+                             (_normalize(f"{aspect} of {place}"),)).fetchone()
+            if row:
+                LOOKUPS.inc(result="exact")
+                return row[0], row[1]
+            match = self._fuzzy(db, aspect_tokens, _tokens(place))
+            if match:
+                LOOKUPS.inc(result="fuzzy")
+                return match
+        LOOKUPS.inc(result="miss")
+        return None
+
+    @staticmethod
+    def _fuzzy(db: sqlite3.Connection, aspect_tokens: List[str], place_tokens: List[str]) -> Optional[Tuple[str, str]]:
+        if not aspect_tokens or not place_tokens:
+            return None
+        # Aspect words are matched exactly: as prefixes they would each expand to a large share of the index.
+        terms = " AND ".join([f'"{token}"' for token in aspect_tokens] + [f'"{token}" *' for token in place_tokens])
+        rows = db.execute(
+            "SELECT a.title, a.extract FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts) LIMIT 20",
+            (f"title : ({terms})",)).fetchall()
+        place = " ".join(place_tokens)
+        best, best_score = None, Config.WIKI_INDEX_MIN_SCORE
+        for title, extract in rows:
+            rest = " ".join(t for t in _tokens(title) if t not in aspect_tokens and t not in STOPWORDS)
+            score = SequenceMatcher(None, place, rest).ratio()
+            if score > best_score or (best is None and score == best_score):
+                best, best_score = (title, extract), score
+        return best
+
+def read_dump(path: str) -> Iterator[Tuple[str, str]]:
+    """(title, extract) pairs of an abstract XML or JSON lines dump, optionally .gz/.bz2 compressed."""
+    opener = gzip.open if path.endswith('.gz') else bz2.open if path.endswith('.bz2') else open
+    stem = re.sub(r'\.(gz|bz2)$', '', path)
+    if stem.endswith('.xml'):
+        with opener(path, 'rb') as f:
+            events = ET.iterparse(f, events=('start', 'end'))
+            _, root = next(events)
+            for event, element in events:
+                if event != 'end' or element.tag != 'doc':
+                    continue
+                title = (element.findtext('title') or '').strip()
+                if title.startswith('Wikipedia: '):
+                    title = title[len('Wikipedia: '):]
+                yield title, (element.findtext('abstract') or '').strip()
+                # Drop finished docs from the tree; abstract dumps are several gigabytes.
+                root.clear()
+        return
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            text = record.get('extract') or record.get('abstract') or record.get('text') or ''
+            yield (record.get('title') or '').strip(), _intro(text)
+
+def import_dump(pages: Iterable[Tuple[str, str]], out_path: str, aspects: Optional[List[str]] = None) -> int:
+    """
+    Write an index of (title, extract) pairs, keeping only titles that mention one of the
+    aspects unless aspects is None. The first page wins on duplicate titles. The file is built
+    next to out_path and swapped in atomically. Returns the number of articles.
+    """
+    aspect_tokens = {token for aspect in aspects for token in _tokens(aspect)} if aspects is not None else None
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp_path = f"{out_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    db = sqlite3.connect(tmp_path)
+    try:
+        db.execute("PRAGMA journal_mode=OFF")
+        db.execute("PRAGMA synchronous=OFF")
+        db.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, "
+                   "title TEXT NOT NULL, extract TEXT NOT NULL)")
+        db.execute("CREATE VIRTUAL TABLE articles_fts USING fts5(title, content='articles', content_rowid='id', "
+                   "tokenize='unicode61 remove_diacritics 2')")
+
+        def rows():
+            for title, extract in pages:
+                if not title or not extract:
+                    continue
+                key = _normalize(title)
+                if aspect_tokens is not None and aspect_tokens.isdisjoint(key.split()):
+                    continue
+                yield key, title, extract
+
+        db.executemany("INSERT OR IGNORE INTO articles (key, title, extract) VALUES (?, ?, ?)", rows())
+        db.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        db.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        count = db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        db.commit()
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    os.replace(tmp_path, out_path)
+    return count
+
+_index: Optional[WikiIndex] = None
+_load_failed = False
+_load_lock = threading.Lock()
+
+def get_wiki_index() -> Optional[WikiIndex]:
+    """Open the configured index once. Returns None if it is unavailable."""
+    global _index, _load_failed
+    if _index is None and not _load_failed:
+        with _load_lock:
+            if _index is None and not _load_failed:
+                try:
+                    _index = WikiIndex(Config.WIKI_INDEX_PATH)
+                    logger.info(f"Opened Wikipedia index with {len(_index)} articles at {Config.WIKI_INDEX_PATH}")
+                except (OSError, sqlite3.Error, ValueError) as e:
+                    _load_failed = True
+                    logger.warning(f"Wikipedia index unavailable, regional info uses the live API: {e}")
+    return _index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Wikipedia extracts index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    load = subparsers.add_parser('import', help="Load a Wikipedia extracts dump into the index")
+    load.add_argument('--dump', required=True, help="Abstract XML or JSON lines dump (.gz/.bz2 accepted)")
+    load.add_argument('--out', default=Config.WIKI_INDEX_PATH, help="SQLite index path to write")
+    load.add_argument('--all', action='store_true', help="Keep every article, not only the aspect articles")
+    query = subparsers.add_parser('query', help="Look up an aspect of a location")
+    query.add_argument('aspect')
+    query.add_argument('location')
+    query.add_argument('--index', default=Config.WIKI_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == 'import':
+        started = time.perf_counter()
+        count = import_dump(read_dump(args.dump), args.out, None if args.all else Config.INFO_AGENT_ASPECTS)
+        print(f"Wrote {count} articles to {args.out} in {time.perf_counter() - started:.1f}s")
+        return 0
+
+    index = WikiIndex(args.index)
+    started = time.perf_counter()
+    match = index.lookup(args.aspect, args.location)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if match is None:
+        print(f"No article found ({elapsed_ms:.2f} ms)")
+        return 1
+    print(f"{match[0]} ({elapsed_ms:.2f} ms)\n\n{match[1]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())